@@ -0,0 +1,80 @@
+"""
+Lazily-built AWS clients
+boto3 clients are built on first use (or by a background warm-up at startup),
+each from its own Session so several can be built in parallel threads. Until
+then nothing boto3-related is imported, which keeps module import — and so
+container cold start — fast.
+"""
+
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+
+def _session():
+    import boto3
+    return boto3.session.Session(
+        region_name=os.getenv("AWS_DEFAULT_REGION", "us-east-1"),
+        aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
+        aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
+        aws_session_token=os.getenv("AWS_SESSION_TOKEN"),  # for temporary/SSO creds only
+    )
+
+
+def client_factory(service: str, endpoint_url: Optional[str] = None, **config) -> Callable:
+    def build():
+        from botocore.config import Config
+        return _session().client(service, endpoint_url=endpoint_url, config=Config(**config))
+    return build
+
+
+def resource_factory(service: str, endpoint_url: Optional[str] = None, **config) -> Callable:
+    def build():
+        from botocore.config import Config
+        return _session().resource(service, endpoint_url=endpoint_url, config=Config(**config))
+    return build
+
+
+class LazyClient:
+    """Proxy that builds the wrapped client on first attribute access (thread-safe)."""
+
+    IDLE = "idle"
+    READY = "ready"
+    ERROR = "error"
+
+    def __init__(self, name: str, factory: Callable):
+        self.name = name
+        self._factory = factory
+        self._client = None
+        self._lock = threading.Lock()
+        self.state = self.IDLE
+        self.error: Optional[str] = None
+        self.init_ms: Optional[float] = None
+
+    def get(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    t0 = time.perf_counter()
+                    try:
+                        self._client = self._factory()
+                    except Exception as e:
+                        self.state, self.error = self.ERROR, str(e)
+                        raise
+                    self.init_ms = round((time.perf_counter() - t0) * 1000, 1)
+                    self.state, self.error = self.READY, None
+        return self._client
+
+    def warm(self) -> None:
+        """Build now (for a background thread at startup); failures are kept in `state`."""
+        try:
+            self.get()
+        except Exception as e:
+            print(f"⚠  {self.name} client init failed (will retry on use): {e}")
+
+    def status(self) -> dict:
+        return {"state": self.state, "init_ms": self.init_ms, "error": self.error}
+
+    def __getattr__(self, attr):
+        return getattr(self.get(), attr)
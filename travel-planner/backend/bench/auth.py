@@ -0,0 +1,92 @@
+"""
+Cognito JWT verification overhead: full RS256 verification vs claims-cache
+hits, plus unknown-kid refresh behaviour, against a local JWKS stand-in.
+
+Usage (from backend/):
+    python bench/auth.py [--iterations 2000]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import httpx
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+
+import main
+from cognito_auth import ClaimsCache, JWKSManager
+
+
+def make_signer(kid: str):
+    private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = private.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                serialization.NoEncryption())
+    public = jwk.construct(pem, "RS256").public_key().to_dict()
+    public.update(kid=kid, alg="RS256", use="sig")
+    return pem, public
+
+
+async def run(iterations: int) -> dict:
+    main.COGNITO_ISSUER = "https://cognito-idp.local/pool"
+    main.COGNITO_APP_CLIENT_ID = "bench-client"
+    pem, public = make_signer("k1")
+    jwks = {"keys": [public]}
+    fetches = {"n": 0}
+
+    def handler(request):
+        fetches["n"] += 1
+        return httpx.Response(200, json=jwks)
+
+    main.jwks_manager = JWKSManager("https://cognito-idp.local/pool/.well-known/jwks.json",
+                                    transport=httpx.MockTransport(handler))
+    main.claims_cache = ClaimsCache()
+    await main.jwks_manager.refresh(force=True)
+
+    claims = {"sub": "user-1", "aud": "bench-client", "iss": main.COGNITO_ISSUER,
+              "exp": int(time.time()) + 3600, "token_use": "id"}
+    tokens = [jwt.encode(dict(claims, jti=str(i)), pem, algorithm="RS256", headers={"kid": "k1"})
+              for i in range(iterations)]
+
+    t0 = time.perf_counter()
+    for tok in tokens:
+        await main.verify_cognito_token(tok)
+    uncached = (time.perf_counter() - t0) / iterations
+
+    t0 = time.perf_counter()
+    for tok in tokens:
+        await main.verify_cognito_token(tok)
+    cached = (time.perf_counter() - t0) / iterations
+
+    # Key rotation: a token signed by a kid we haven't seen triggers one refresh
+    pem2, public2 = make_signer("k2")
+    jwks["keys"].append(public2)
+    main.jwks_manager.min_refresh_interval = 0
+    rotated = jwt.encode(claims, pem2, algorithm="RS256", headers={"kid": "k2"})
+    before = fetches["n"]
+    await main.verify_cognito_token(rotated)
+
+    return {
+        "iterations": iterations,
+        "verify_uncached_us": round(uncached * 1e6, 1),
+        "verify_cached_us": round(cached * 1e6, 2),
+        "rotation_refetches": fetches["n"] - before,
+        "claims_cache": {"hits": main.claims_cache.hits, "misses": main.claims_cache.misses},
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.iterations))))
+
+
+if __name__ == "__main__":
+    main_cli()
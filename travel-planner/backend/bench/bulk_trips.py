@@ -0,0 +1,99 @@
+"""
+Bulk saved-trip benchmark: N single-item requests vs one bulk request for
+save, export and delete, against an in-memory DynamoDB stand-in with
+per-call latency and (optionally) throttled batches.
+
+Usage (from backend/):
+    python bench/bulk_trips.py [--trips 60] [--latency 0.01] [--unprocessed-rate 0.1]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import httpx
+
+import main
+from stubs import StubDynamoResource, sample_itinerary
+from trip_store import TripStore
+
+
+def trip(i: int) -> dict:
+    return {"destination": "Lisbon", "dates": "Jun 1 - Jun 5", "travelers": 2,
+            "budget": "moderate", "title": f"Lisbon #{i}",
+            "itinerary": sample_itinerary(5), "tripForm": {"destination": "Lisbon"}}
+
+
+async def timed(coro) -> float:
+    t0 = time.perf_counter()
+    await coro
+    return round(time.perf_counter() - t0, 3)
+
+
+async def run(n: int, latency: float, unprocessed_rate: float) -> dict:
+    ddb = StubDynamoResource(latency=latency, unprocessed_rate=unprocessed_rate)
+    main.trip_store = TripStore(ddb, main.DYNAMODB_TABLE)
+    main.app.dependency_overrides[main.get_current_user] = lambda: {"sub": "bench-user"}
+    trips = [trip(i) for i in range(n)]
+    report = {"trips": n, "latency_s": latency, "unprocessed_rate": unprocessed_rate}
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def post(path, body):
+            resp = await client.post(path, json=body)
+            resp.raise_for_status()
+            return resp.json()
+
+        async def single_save():
+            return [(await post("/api/itineraries", t))["data"]["id"] for t in trips]
+
+        async def single_export(ids):
+            for trip_id in ids:
+                (await client.get(f"/api/itineraries/{trip_id}")).raise_for_status()
+
+        async def single_delete(ids):
+            for trip_id in ids:
+                (await client.delete(f"/api/itineraries/{trip_id}")).raise_for_status()
+
+        t0 = time.perf_counter()
+        ids = await single_save()
+        report["single_save_s"] = round(time.perf_counter() - t0, 3)
+        report["single_export_s"] = await timed(single_export(ids))
+        report["single_delete_s"] = await timed(single_delete(ids))
+        single_calls = ddb.calls["single"]
+
+        t0 = time.perf_counter()
+        saved = await post("/api/itineraries/batch", {"trips": trips})
+        report["bulk_save_s"] = round(time.perf_counter() - t0, 3)
+        ids = [t["id"] for t in saved["data"]]
+        t0 = time.perf_counter()
+        exported = await post("/api/itineraries/export", {"ids": ids})
+        report["bulk_export_s"] = round(time.perf_counter() - t0, 3)
+        report["bulk_exported"] = len(exported["data"])
+        report["bulk_delete_s"] = await timed(post("/api/itineraries/batch-delete", {"all": True}))
+        report["remaining_items"] = len(ddb.items)
+
+    report["single_ddb_calls"] = single_calls
+    report["bulk_ddb_calls"] = ddb.calls["batch"] + ddb.calls["single"] - single_calls
+    main.trip_store.shutdown()
+    return report
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--trips", type=int, default=60)
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--unprocessed-rate", type=float, default=0.1)
+    args = parser.parse_args()
+
+    main.limiter.enabled = False
+    print(json.dumps(asyncio.run(run(args.trips, args.latency, args.unprocessed_rate))))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,72 @@
+"""
+Response-cache benchmark: repeated packing / budget / tips requests against a
+stub Bedrock. Reports cold (miss) vs warm (hit) latency and Bedrock call count.
+
+Usage (from backend/):
+    python bench/cache_hits.py [--latency 1.0] [--repeats 20] [--db /tmp/nova-cache.db]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import httpx
+
+import main
+from llm_cache import ResponseCache
+from nova_client import AsyncNovaClient
+from stubs import StubBedrockClient
+
+REQUESTS = {
+    "packing": ("/api/plan/packing-list", {"json": {
+        "destination": "Lisbon", "start_date": "2026-06-01", "end_date": "2026-06-05"}}),
+    "budget": ("/api/plan/budget", {"json": {
+        "destination": "Lisbon", "duration_days": 5, "travelers": 2, "budget_level": "moderate"}}),
+    "tips": ("/api/plan/quick-tips", {"params": {"destination": "Lisbon", "category": "food"}}),
+}
+
+
+async def run(latency: float, repeats: int, db_path) -> dict:
+    stub = StubBedrockClient(latency=latency)
+    cache = ResponseCache(db_path=db_path)
+    main.response_cache = cache
+    main.nova = AsyncNovaClient(stub, main.MODEL_ID, cache=cache)
+    transport = httpx.ASGITransport(app=main.app)
+    report = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for name, (path, kwargs) in REQUESTS.items():
+            timings = []
+            for _ in range(repeats):
+                t0 = time.perf_counter()
+                (await client.post(path, **kwargs)).raise_for_status()
+                timings.append((time.perf_counter() - t0) * 1000)
+            report[name] = {
+                "cold_ms": round(timings[0], 2),
+                "warm_p50_ms": round(statistics.median(timings[1:]), 3),
+            }
+    main.nova.shutdown()
+    report["bedrock_calls"] = stub.calls
+    report["requests"] = repeats * len(REQUESTS)
+    report["cache"] = cache.stats()
+    return report
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--latency", type=float, default=1.0)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--db", default=None, help="SQLite path for the persistent tier")
+    args = parser.parse_args()
+
+    main.limiter.enabled = False
+    print(json.dumps(asyncio.run(run(args.latency, args.repeats, args.db)), indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
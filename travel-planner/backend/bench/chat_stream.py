@@ -0,0 +1,125 @@
+"""
+Streaming-chat benchmark: concurrent chat clients against a stub Bedrock
+generating at --token-rate, through blocking /api/chat vs /api/chat/stream,
+then streaming clients that disconnect after --read-tokens token events
+(the user navigated away or hit stop). Reports time to first token, time
+to the full reply, output tokens Bedrock generated and the server's
+cancellation stats.
+
+Usage (from backend/):
+    python bench/chat_stream.py [--clients 8] [--reply-tokens 400] [--token-rate 80] [--read-tokens 40]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import httpx
+
+import main
+from harness import percentile
+from nova_client import AsyncNovaClient
+from stubs import StubBedrockClient
+
+MESSAGES = [{"role": "user", "content": "Where should we eat in Lisbon on our first night?"}]
+
+
+async def blocking_client(client) -> tuple:
+    t0 = time.perf_counter()
+    resp = await client.post("/api/chat", json={"messages": MESSAGES})
+    resp.raise_for_status()
+    elapsed = time.perf_counter() - t0
+    return elapsed, elapsed   # the first token arrives with the last
+
+
+async def streaming_client(read_tokens: int) -> tuple:
+    """POST /api/chat/stream over raw ASGI so the client can really disconnect
+    (httpx's ASGITransport only reports a disconnect once the response ends)."""
+    payload = json.dumps({"messages": MESSAGES}).encode()
+    left, requested = asyncio.Event(), False
+    tokens, first, t0 = 0, None, time.perf_counter()
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": payload, "more_body": False}
+        await left.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal tokens, first
+        if message["type"] != "http.response.body" or left.is_set():
+            return
+        n = message.get("body", b"").count(b"event: token")
+        if n and first is None:
+            first = time.perf_counter() - t0
+        tokens += n
+        if read_tokens and tokens >= read_tokens:
+            left.set()
+
+    scope = {"type": "http", "asgi": {"version": "3.0", "spec_version": "2.4"}, "http_version": "1.1",
+             "method": "POST", "scheme": "http", "path": "/api/chat/stream", "raw_path": b"/api/chat/stream",
+             "query_string": b"", "root_path": "", "client": ("127.0.0.1", 50000), "server": ("bench", 80),
+             "headers": [(b"host", b"bench"), (b"content-type", b"application/json")]}
+    await main.app(scope, receive, send)
+    return first or 0.0, time.perf_counter() - t0
+
+
+async def run(mode: str, args) -> dict:
+    stub = StubBedrockClient(latency=args.latency, token_rate=args.token_rate,
+                             reply="Try the tascas in Alfama for grilled sardines. " * (args.reply_tokens // 12),
+                             simulate_generation=True)
+    main.nova = AsyncNovaClient(stub, main.MODEL_ID, max_concurrency=max(8, args.clients))
+    # Server stats are not reset: replies streamed in full set the expected length tokens saved are measured by
+    stats_before = dict(main.chat_stream_stats)
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        started = time.perf_counter()
+        if mode == "blocking":
+            results = await asyncio.gather(*(blocking_client(client) for _ in range(args.clients)))
+        else:
+            read = args.read_tokens if mode == "stream_disconnect" else 0
+            results = await asyncio.gather(*(streaming_client(read) for _ in range(args.clients)))
+        elapsed = time.perf_counter() - started
+    drained = time.perf_counter()
+    while main.nova.in_flight:   # abandoned calls keep generating until Bedrock is told to stop
+        await asyncio.sleep(0.01)
+    drain_s = time.perf_counter() - drained
+    main.nova.shutdown()
+    first, full = [r[0] for r in results], [r[1] for r in results]
+    return {
+        "mode": mode,
+        "clients": args.clients,
+        "first_token_p50_s": round(percentile(first, 50), 2),
+        "first_token_p95_s": round(percentile(first, 95), 2),
+        "client_done_p50_s": round(percentile(full, 50), 2),
+        "elapsed_s": round(elapsed, 2),
+        "upstream_drain_s": round(drain_s, 2),
+        "output_tokens_generated": stub.output_tokens + sum(s.tokens_sent for s in stub.streams),
+        "streams_closed_early": sum(s.closed and s.tokens_sent * 4 < len(s.text) for s in stub.streams),
+        "chat_stream": {k: v - stats_before[k] for k, v in main.chat_stream_stats.items()},
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--reply-tokens", type=int, default=400, help="length of the stub reply")
+    parser.add_argument("--latency", type=float, default=0.3, help="stub Bedrock time to first token")
+    parser.add_argument("--token-rate", type=float, default=80.0, help="stub Bedrock output tokens/s")
+    parser.add_argument("--read-tokens", type=int, default=40, help="token events read before disconnecting")
+    args = parser.parse_args()
+
+    main.limiter.enabled = False
+    for mode in ("blocking", "stream", "stream_disconnect"):
+        print(json.dumps(asyncio.run(run(mode, args))))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,68 @@
+"""
+Chat prompt-size benchmark: a long /api/chat conversation carrying a full
+itinerary as trip_context, against a stub Bedrock. Reports, per turn, the
+estimated prompt tokens actually sent vs what the unbounded prompt (whole
+history + raw itinerary JSON) would have been.
+
+Usage (from backend/):
+    python bench/chat_window.py [--turns 30] [--days 7] [--reply-words 120]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import httpx
+
+import main
+from nova_client import AsyncNovaClient
+from stubs import StubBedrockClient, sample_itinerary
+
+
+async def run(turns: int, days: int, reply_words: int) -> dict:
+    reply = ("Great question. " + "Here is a specific suggestion with names and times. " * reply_words)[
+        :reply_words * 6]
+    stub = StubBedrockClient(latency=0.0, reply=reply)
+    main.nova = AsyncNovaClient(stub, main.MODEL_ID)
+    itinerary = sample_itinerary(days)
+    messages, per_turn = [], []
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for t in range(turns):
+            messages.append({"role": "user",
+                             "content": f"Turn {t}: what should we do on day {t % days + 1}? "
+                                        f"We like food markets and viewpoints."})
+            resp = await client.post("/api/chat", json={"messages": messages, "trip_context": itinerary})
+            resp.raise_for_status()
+            data = resp.json()
+            messages.append({"role": "assistant", "content": data["reply"]})
+            per_turn.append(data["context"])
+    main.nova.shutdown()
+
+    sent = sum(c["prompt_tokens_est"] for c in per_turn)
+    unbounded = sum(c["unbounded_tokens_est"] for c in per_turn)
+    return {
+        "turns": turns, "itinerary_days": days,
+        "first_turn": per_turn[0], "last_turn": per_turn[-1],
+        "total_prompt_tokens_est": sent, "total_unbounded_tokens_est": unbounded,
+        "reduction_pct": round(100 * (1 - sent / unbounded), 1),
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--turns", type=int, default=30)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--reply-words", type=int, default=120)
+    args = parser.parse_args()
+
+    main.limiter.enabled = False
+    print(json.dumps(asyncio.run(run(args.turns, args.days, args.reply_words))))
+
+
+if __name__ == "__main__":
+    main_cli()
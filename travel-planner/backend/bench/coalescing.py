@@ -0,0 +1,61 @@
+"""
+Single-flight benchmark: a burst of identical quick-tips / budget requests
+arriving together should cost one Bedrock call per distinct prompt.
+The response cache is disabled so only coalescing is measured.
+
+Usage (from backend/):
+    python bench/coalescing.py [--burst 50] [--distinct 3] [--latency 1.0]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import httpx
+
+import main
+from nova_client import AsyncNovaClient
+from stubs import StubBedrockClient
+
+
+async def run(burst: int, distinct: int, latency: float) -> dict:
+    stub = StubBedrockClient(latency=latency)
+    main.nova = AsyncNovaClient(stub, main.MODEL_ID)   # no cache attached
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def tip(i):
+            r = await client.post("/api/plan/quick-tips",
+                                  params={"destination": f"City {i % distinct}", "category": "food"})
+            r.raise_for_status()
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(tip(i) for i in range(burst)))
+        elapsed = time.perf_counter() - t0
+    main.nova.shutdown()
+    return {
+        "requests": burst,
+        "distinct_prompts": distinct,
+        "bedrock_calls": stub.calls,
+        "elapsed_s": round(elapsed, 3),
+        "coalescing": main.nova.coalescing,
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--burst", type=int, default=50)
+    parser.add_argument("--distinct", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=1.0)
+    args = parser.parse_args()
+
+    main.limiter.enabled = False
+    print(json.dumps(asyncio.run(run(args.burst, args.distinct, args.latency))))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,143 @@
+"""
+Compact-output benchmark: output tokens of recorded sample responses
+(itinerary, fan-out day, packing list, budget) in the verbose schema Nova
+used to echo — pretty-printed and minified — vs the compact wire format,
+then per-endpoint latency through main.app with COMPACT_OUTPUT off and on
+(stub Bedrock generating at --token-rate), checking the public responses
+are identical.
+
+Usage (from backend/):
+    python bench/compact_output.py [--token-rate 200] [--latency 0.3] [--repeats 1]
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import httpx
+
+import main
+import wire_format
+from chat_context import estimate_tokens
+from nova_client import AsyncNovaClient
+from stubs import (StubBedrockClient, itinerary_reply, prompt_text, sample_budget_estimate, sample_itinerary,
+                   sample_packing_list)
+
+TRIP = {"destination": "Lisbon", "origin": "London", "start_date": "2026-06-01", "budget": "moderate",
+        "travelers": 2, "interests": ["food", "history"]}
+ENDPOINTS = [
+    ("itinerary_4d", "/api/plan/full", dict(TRIP, end_date="2026-06-04", planning_mode="single")),
+    ("itinerary_7d_fanout", "/api/plan/full", dict(TRIP, end_date="2026-06-07", planning_mode="fanout")),
+    ("packing", "/api/plan/packing-list", {"destination": "Lisbon", "start_date": "2026-06-01",
+                                           "end_date": "2026-06-07", "activities": ["hiking"]}),
+    ("budget", "/api/plan/budget", {"destination": "Lisbon", "duration_days": 7, "travelers": 2,
+                                    "budget_level": "moderate"}),
+]
+
+
+def pretty(obj) -> str:
+    return json.dumps(obj, indent=2, ensure_ascii=False)
+
+
+def minified(obj) -> str:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
+def samples() -> list:
+    """(name, verbose object, its wire form) for each recorded sample."""
+    full = sample_itinerary(4)
+    packing, budget = sample_packing_list(), sample_budget_estimate()
+    return [
+        ("itinerary_4d", full, wire_format.compact_itinerary(full)),
+        ("day", full["daily_itinerary"][0], wire_format.compact_day(full["daily_itinerary"][0])),
+        ("packing", packing, wire_format.compact_packing(packing)),
+        ("budget", budget, wire_format.compact_budget(budget)),
+    ]
+
+
+def recorded_reply(body: dict) -> str:
+    """The recorded samples, written the way each prompt asks: pretty verbose or minified wire."""
+    system, message = prompt_text(body, "system"), prompt_text(body)
+    compact = wire_format.MINIFIED in system
+    if "packing expert" in system:
+        verbose = sample_packing_list()
+        return minified(wire_format.compact_packing(verbose)) if compact else pretty(verbose)
+    if "budget expert" in system:
+        verbose = sample_budget_estimate()
+        return minified(wire_format.compact_budget(verbose)) if compact else pretty(verbose)
+    if "travel planner" not in system or "an outline only" in system or message.rstrip().endswith("breakdown."):
+        return itinerary_reply(body)
+    full = sample_itinerary(int(re.search(r"(\d+)[- ]day", message).group(1)))
+    if "one day of a longer trip" in system:
+        day = full["daily_itinerary"][0]
+        return minified(wire_format.compact_day(day)) if compact else pretty(day)
+    return minified(wire_format.compact_itinerary(full)) if compact else pretty(full)
+
+
+def token_report() -> list:
+    rows = []
+    for name, verbose, wire in samples():
+        before, before_min, after = (estimate_tokens(t) for t in (pretty(verbose), minified(verbose), minified(wire)))
+        rows.append({"sample": name, "verbose_tokens": before, "verbose_minified_tokens": before_min,
+                     "compact_tokens": after, "reduction": round(1 - after / before, 3)})
+    return rows
+
+
+async def endpoint_latency(args) -> dict:
+    results = {}
+    transport = httpx.ASGITransport(app=main.app)
+    for name, path, body in ENDPOINTS:
+        stub = StubBedrockClient(latency=args.latency, token_rate=args.token_rate, reply=recorded_reply,
+                                 simulate_generation=True)
+        main.nova = AsyncNovaClient(stub, main.MODEL_ID, max_concurrency=main.NOVA_MAX_CONCURRENCY)
+        timings, data = [], None
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            for _ in range(args.repeats):
+                t0 = time.perf_counter()
+                resp = await client.post(path, json=body)
+                timings.append(time.perf_counter() - t0)
+                data = resp.json().get("data")
+        main.nova.shutdown()
+        results[name] = {"latency_s": round(sorted(timings)[len(timings) // 2], 2),
+                         "output_tokens": stub.output_tokens // args.repeats,
+                         "bedrock_calls": stub.calls // args.repeats, "data": data}
+    return results
+
+
+def main_cli():
+    global main
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--token-rate", type=float, default=200.0, help="stub Bedrock output tokens/s")
+    parser.add_argument("--latency", type=float, default=0.3, help="stub Bedrock time to first token")
+    parser.add_argument("--repeats", type=int, default=1)
+    args = parser.parse_args()
+
+    for row in token_report():
+        print(json.dumps(row))
+    runs = {}
+    for mode in ("verbose", "compact"):
+        os.environ["COMPACT_OUTPUT"] = "true" if mode == "compact" else "false"
+        main = importlib.reload(main)   # prompts are built at import
+        main.limiter.enabled = False
+        main.CACHE_TTLS = {}
+        runs[mode] = asyncio.run(endpoint_latency(args))
+    for name, *_ in ENDPOINTS:
+        before, after = runs["verbose"][name], runs["compact"][name]
+        print(json.dumps({
+            "endpoint": name,
+            "verbose_latency_s": before["latency_s"], "compact_latency_s": after["latency_s"],
+            "verbose_output_tokens": before["output_tokens"], "compact_output_tokens": after["output_tokens"],
+            "bedrock_calls": [before["bedrock_calls"], after["bedrock_calls"]],
+            "same_response": before["data"] == after["data"] and before["data"] is not None,
+        }))
+
+
+if __name__ == "__main__":
+    main_cli()
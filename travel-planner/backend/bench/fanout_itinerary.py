@@ -0,0 +1,82 @@
+"""
+Single-shot vs fan-out itinerary benchmark against a stub Nova that takes
+tokens/token_rate seconds to generate and truncates at maxTokens.
+
+Single-shot latency grows with trip length (and long trips truncate into a
+500); fan-out should stay roughly flat.
+
+Usage (from backend/):
+    python bench/fanout_itinerary.py [--days 3,7,10,14] [--token-rate 400] [--latency 0.4]
+                                     [--fanout-concurrency 6]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import httpx
+
+import main
+from nova_client import AsyncNovaClient
+from stubs import StubBedrockClient, prompt_text, sample_itinerary
+
+
+def stub_reply(body: dict) -> str:
+    """Answer whichever prompt main.py sent with a plausibly-sized response."""
+    system, message = prompt_text(body, "system"), prompt_text(body)
+    days = int(re.search(r"(\d+)[- ]day", message).group(1))
+    full = sample_itinerary(days)
+    if "an outline only" in system:
+        outline = [{k: d[k] for k in ("day", "date", "title", "theme")} | {"area": "Baixa"}
+                   for d in full["daily_itinerary"]]
+        return json.dumps({"trip_summary": full["trip_summary"], "days": outline}, indent=2)
+    m = re.search(r"^Plan day (\d+)", message, re.M)
+    if m:
+        return json.dumps(full["daily_itinerary"][int(m.group(1)) - 1], indent=2)
+    if "practical info and budget" in message:
+        return json.dumps({k: full[k] for k in ("practical_info", "budget_breakdown")}, indent=2)
+    return json.dumps(full, indent=2)
+
+
+async def run(days: int, token_rate: float, latency: float) -> dict:
+    stub = StubBedrockClient(latency=latency, reply=stub_reply, token_rate=token_rate,
+                             simulate_generation=True)
+    main.nova = AsyncNovaClient(stub, main.MODEL_ID, max_concurrency=16)
+    transport = httpx.ASGITransport(app=main.app)
+    trip = {"destination": "Lisbon", "origin": "London", "start_date": "2026-06-01",
+            "end_date": f"2026-06-{days:02d}", "budget": "moderate", "travelers": 2}
+    report = {"days": days}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for mode in ("single", "fanout"):
+            calls = stub.calls
+            t0 = time.perf_counter()
+            resp = await client.post("/api/plan/full", json=dict(trip, planning_mode=mode))
+            ok = resp.status_code == 200 and len(resp.json()["data"]["daily_itinerary"]) == days
+            report[mode] = {"elapsed_s": round(time.perf_counter() - t0, 3), "complete": ok,
+                            "nova_calls": stub.calls - calls}
+    main.nova.shutdown()
+    return report
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--days", default="3,7,10,14")
+    parser.add_argument("--token-rate", type=float, default=400.0)
+    parser.add_argument("--latency", type=float, default=0.4)
+    parser.add_argument("--fanout-concurrency", type=int, default=main.FANOUT_CONCURRENCY)
+    args = parser.parse_args()
+
+    main.limiter.enabled = False
+    main.FANOUT_CONCURRENCY = args.fanout_concurrency
+    for days in (int(d) for d in args.days.split(",")):
+        print(json.dumps(asyncio.run(run(days, args.token_rate, args.latency))))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,43 @@
+"""
+Shared helpers for the benchmarks: run an ASGI app on a real local socket
+(httpx.ASGITransport buffers whole responses, which hides streaming), and
+latency percentiles.
+"""
+
+import contextlib
+import socket
+import threading
+import time
+
+import uvicorn
+
+
+def percentile(values: list, p: float) -> float:
+    """Nearest-rank `p`th percentile (0.0 for no values)."""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextlib.contextmanager
+def serve(app, port: int = 0):
+    """Run `app` under uvicorn in a background thread; yields the base URL."""
+    port = port or free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port,
+                                           log_level="warning", lifespan="off"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        thread.join(timeout=5)
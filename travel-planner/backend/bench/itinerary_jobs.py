@@ -0,0 +1,115 @@
+"""
+Itinerary job-queue benchmark: clients that give up after --client-timeout
+seconds and retry (like the frontend's axios timeout) call /api/plan/full
+directly, then use job mode — submit to /api/plan/jobs and long-poll for
+the result. Some clients ask for the same trip. Reports completed trips,
+time to result, Bedrock calls and output tokens generated (wasted when a
+client had already given up).
+
+Usage (from backend/):
+    python bench/itinerary_jobs.py [--clients 24] [--distinct 12] [--client-timeout 1.5] [--retries 2]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import httpx
+
+import main
+from harness import percentile
+from job_queue import JobQueue, MemoryJobBackend
+from nova_client import AsyncNovaClient
+from stubs import StubBedrockClient, itinerary_reply
+
+CITIES = ["Lisbon", "Porto", "Madrid", "Seville", "Rome", "Florence", "Vienna", "Prague",
+          "Krakow", "Berlin", "Paris", "Lyon", "Athens", "Istanbul", "Dublin", "Edinburgh"]
+
+
+def trips(clients: int, distinct: int) -> list:
+    rng = random.Random(0)
+    pool = [{"destination": CITIES[i % len(CITIES)], "origin": "London", "start_date": "2026-06-01",
+             "end_date": f"2026-06-{rng.choice([3, 5, 7, 10]):02d}", "budget": "moderate"}
+            for i in range(distinct)]
+    return [pool[i % distinct] for i in range(clients)]
+
+
+async def sync_client(client, trip: dict, args) -> bool:
+    for _ in range(args.retries + 1):
+        try:
+            resp = await asyncio.wait_for(client.post("/api/plan/full", json=trip), args.client_timeout)
+            return resp.status_code == 200
+        except asyncio.TimeoutError:
+            continue   # gave up — the call keeps generating server-side
+    return False
+
+
+async def job_client(client, trip: dict, args) -> bool:
+    job = (await client.post("/api/plan/jobs", json=trip)).json()
+    while True:   # each poll returns well inside the client timeout
+        status = (await client.get(job["poll_url"], params={"wait": args.client_timeout * 0.8})).json()
+        if status["status"] in ("done", "failed"):
+            return status["status"] == "done"
+
+
+async def run(mode: str, args) -> dict:
+    stub = StubBedrockClient(latency=args.latency, token_rate=args.token_rate, reply=itinerary_reply,
+                             simulate_generation=True)
+    main.nova = AsyncNovaClient(stub, main.MODEL_ID, max_concurrency=8)
+    main.itinerary_jobs = JobQueue(MemoryJobBackend(), main._run_itinerary_job, workers=args.workers,
+                                   error_info=main._job_error)
+    timings, done = [], 0
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def one(trip):
+            nonlocal done
+            t0 = time.perf_counter()
+            if await (sync_client if mode == "sync" else job_client)(client, trip, args):
+                done += 1
+                timings.append(time.perf_counter() - t0)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(t) for t in trips(args.clients, args.distinct)))
+        elapsed = time.perf_counter() - started
+    await main.itinerary_jobs.stop()
+    while main.nova.in_flight:   # let abandoned calls finish so their tokens are counted
+        await asyncio.sleep(0.05)
+    main.nova.shutdown()
+    return {
+        "mode": mode,
+        "clients": args.clients,
+        "completed": done,
+        "result_p50_s": round(percentile(timings, 50), 2),
+        "result_p95_s": round(percentile(timings, 95), 2),
+        "elapsed_s": round(elapsed, 2),
+        "bedrock_calls": stub.calls,
+        "output_tokens_generated": stub.output_tokens,
+        "tokens_per_completed_trip": round(stub.output_tokens / done) if done else None,
+        "jobs": main.itinerary_jobs.stats() if mode == "jobs" else None,
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=24)
+    parser.add_argument("--distinct", type=int, default=12, help="distinct trips among the clients")
+    parser.add_argument("--client-timeout", type=float, default=1.5)
+    parser.add_argument("--retries", type=int, default=2)
+    parser.add_argument("--workers", type=int, default=4, help="job-queue workers")
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--token-rate", type=float, default=3000.0)
+    args = parser.parse_args()
+
+    main.limiter.enabled = False
+    for mode in ("sync", "jobs"):
+        print(json.dumps(asyncio.run(run(mode, args))))
+
+
+if __name__ == "__main__":
+    main_cli()
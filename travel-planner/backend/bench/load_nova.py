@@ -0,0 +1,77 @@
+"""
+Load test for the async Nova layer against a local stub Bedrock.
+
+Fires REQUESTS concurrent /api/plan/quick-tips calls at main.app for several
+NOVA_MAX_CONCURRENCY caps and reports throughput plus /health latency while
+the generations are in flight. Throughput should scale ~linearly with the
+cap and /health should stay in the low milliseconds throughout.
+
+Usage (from backend/):
+    python bench/load_nova.py [--requests 64] [--latency 0.5] [--caps 1,4,16]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import httpx
+
+import main
+from nova_client import AsyncNovaClient
+from stubs import StubBedrockClient
+
+
+async def run_once(cap: int, requests: int, latency: float) -> dict:
+    stub = StubBedrockClient(latency=latency)
+    main.nova = AsyncNovaClient(stub, main.MODEL_ID, max_concurrency=cap)
+    transport = httpx.ASGITransport(app=main.app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def tip(i):
+            r = await client.post("/api/plan/quick-tips",
+                                  params={"destination": f"City {i}", "category": "general"})
+            r.raise_for_status()
+
+        async def probe_health():
+            await asyncio.sleep(latency / 2)   # let the generations pile up first
+            t0 = time.perf_counter()
+            (await client.get("/health")).raise_for_status()
+            return time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        health_task = asyncio.create_task(probe_health())
+        await asyncio.gather(*(tip(i) for i in range(requests)))
+        elapsed = time.perf_counter() - t0
+        health_latency = await health_task
+
+    main.nova.shutdown()
+    return {
+        "max_concurrency": cap,
+        "requests": requests,
+        "stub_latency_s": latency,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(requests / elapsed, 2),
+        "bedrock_peak_in_flight": stub.max_in_flight,
+        "health_latency_ms": round(health_latency * 1000, 2),
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--caps", default="1,4,16")
+    args = parser.parse_args()
+
+    main.limiter.enabled = False   # measure the Nova layer, not the rate limiter
+    for cap in (int(c) for c in args.caps.split(",")):
+        print(json.dumps(asyncio.run(run_once(cap, args.requests, args.latency))))
+
+
+if __name__ == "__main__":
+    main_cli()
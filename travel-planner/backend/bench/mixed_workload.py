@@ -0,0 +1,170 @@
+"""
+Mixed-workload benchmark: closed-loop clients hit main.app with a weighted
+mix of /api/plan/*, /api/chat, /api/destination-photos and /api/itineraries
+requests, against stub Bedrock (latency, token rate, throttle injection),
+DynamoDB and MediaWiki. Prints one JSON object — throughput, p50/p95/p99
+per endpoint and overall, status codes and event-loop lag — so runs can be
+diffed or plotted.
+
+Usage (from backend/):
+    python bench/mixed_workload.py [--concurrency 16] [--seconds 10] [--latency 0.2]
+        [--token-rate 1500] [--throttle-rate 0] [--mix tips=20,chat=15,...] [--out run.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import httpx
+
+import main
+from harness import percentile
+from nova_client import AsyncNovaClient
+from stubs import StubBedrockClient, StubDynamoResource, itinerary_reply, sample_itinerary, stub_mediawiki
+from trip_store import TripStore
+
+CITIES = ["Lisbon", "Porto", "Madrid", "Seville", "Rome", "Florence", "Vienna", "Prague",
+          "Krakow", "Berlin", "Paris", "Lyon", "Athens", "Istanbul", "Dublin", "Edinburgh"]
+DEFAULT_MIX = "tips=20,packing=10,budget=10,chat=15,full=5,stream=5,photos=20,list=10,save=5"
+
+
+def summary(values: list) -> dict:
+    return {f"p{p}_ms": round(percentile(values, p) * 1000, 1) for p in (50, 95, 99)}
+
+
+def make_request(kind: str, rng: random.Random, days: int) -> tuple:
+    """(method, path, httpx kwargs) for one request of `kind`."""
+    city = rng.choice(CITIES)
+    trip = {"destination": city, "origin": "London", "start_date": "2026-06-01",
+            "end_date": f"2026-06-{days:02d}", "budget": "moderate", "travelers": 2}
+    if kind == "tips":
+        return "POST", "/api/plan/quick-tips", {"params": {"destination": city, "category": "food"}}
+    if kind == "packing":
+        return "POST", "/api/plan/packing-list", {"json": {
+            "destination": city, "start_date": "2026-06-01", "end_date": "2026-06-05"}}
+    if kind == "budget":
+        return "POST", "/api/plan/budget", {"json": {
+            "destination": city, "duration_days": days, "travelers": 2, "budget_level": "moderate"}}
+    if kind == "chat":
+        turns = [{"role": "user" if i % 2 == 0 else "assistant", "content": f"Question {i} about {city}?"}
+                 for i in range(rng.randrange(1, 12, 2))]
+        return "POST", "/api/chat", {"json": {"messages": turns}}
+    if kind == "full":
+        return "POST", "/api/plan/full", {"json": trip}
+    if kind == "stream":
+        return "POST", "/api/plan/full/stream", {"json": trip}
+    if kind == "photos":
+        return "GET", "/api/destination-photos", {"params": {"destination": city}}
+    if kind == "list":
+        return "GET", "/api/itineraries", {"params": {"limit": 20}}
+    if kind == "save":
+        return "POST", "/api/itineraries", {"json": {
+            "destination": city, "dates": "Jun 1 - Jun 5", "travelers": 2, "budget": "moderate",
+            "title": f"{city} trip", "itinerary": sample_itinerary(days, city), "tripForm": trip}}
+    raise ValueError(f"Unknown request kind: {kind}")
+
+
+async def loop_lag(samples: list, stop: asyncio.Event, interval: float = 0.01) -> None:
+    """How late a timer wakes up — time the event loop spent unable to run callbacks."""
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, time.perf_counter() - t0 - interval))
+
+
+async def run(args) -> dict:
+    rng = random.Random(args.seed)
+    throttle_rng = random.Random(args.seed + 1)
+    stub = StubBedrockClient(latency=args.latency, token_rate=args.token_rate, reply=itinerary_reply,
+                             simulate_generation=True,
+                             throttle=(lambda m: throttle_rng.random() < args.throttle_rate)
+                             if args.throttle_rate else None)
+    main.nova = AsyncNovaClient(stub, main.MODEL_ID, max_concurrency=main.NOVA_MAX_CONCURRENCY,
+                                timeout=main.NOVA_TIMEOUT_SECONDS, cache=main.response_cache,
+                                observer=main.observe_nova, governor=main.governor)
+    ddb = StubDynamoResource(latency=args.ddb_latency)
+    main.trip_store = TripStore(ddb, main.DYNAMODB_TABLE, observer=main.observe_dynamodb)
+    wiki = stub_mediawiki(args.wiki_latency)
+    main._wiki_client = httpx.AsyncClient(transport=httpx.MockTransport(wiki))
+    main.app.dependency_overrides[main.get_current_user] = lambda: {"sub": "bench-user"}
+
+    mix = {k: float(v) for k, v in (part.split("=") for part in args.mix.split(","))}
+    kinds, weights = list(mix), list(mix.values())
+    latencies: dict = {k: [] for k in kinds}
+    statuses: dict = {k: Counter() for k in kinds}
+    lag: list = []
+    stop = asyncio.Event()
+    deadline = time.perf_counter() + args.seconds
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def worker() -> None:
+            while time.perf_counter() < deadline:
+                kind = rng.choices(kinds, weights)[0]
+                method, path, kwargs = make_request(kind, rng, rng.choice(args.days))
+                t0 = time.perf_counter()
+                resp = await client.request(method, path, **kwargs)
+                latencies[kind].append(time.perf_counter() - t0)
+                statuses[kind][resp.status_code] += 1
+
+        probe = asyncio.create_task(loop_lag(lag, stop))
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await probe
+
+    await main._wiki_client.aclose()
+    main.nova.shutdown()
+    main.trip_store.shutdown()
+    every = [t for ts in latencies.values() for t in ts]
+    ok = sum(c[200] for c in statuses.values())
+    return {
+        "config": {k: v for k, v in vars(args).items() if k != "out"},
+        "duration_s": round(elapsed, 2),
+        "requests": len(every),
+        "throughput_rps": round(len(every) / elapsed, 1),
+        "ok_rps": round(ok / elapsed, 1),
+        "latency": summary(every),
+        "endpoints": {k: {"requests": len(latencies[k]), "statuses": dict(statuses[k]), **summary(latencies[k])}
+                      for k in kinds if latencies[k]},
+        "event_loop_lag": {**summary(lag), "max_ms": round(max(lag, default=0) * 1000, 1)},
+        "bedrock": {"calls": stub.calls, "throttled": stub.throttled, "max_in_flight": stub.max_in_flight},
+        "dynamodb_calls": ddb.calls,
+        "wiki_requests": wiki.counts["requests"],
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, default=16, help="closed-loop clients")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="kind=weight,... (" + DEFAULT_MIX + ")")
+    parser.add_argument("--days", type=lambda s: [int(d) for d in s.split(",")], default=[3, 5, 7],
+                        help="trip lengths to draw from")
+    parser.add_argument("--latency", type=float, default=0.2, help="stub Bedrock time to first token")
+    parser.add_argument("--token-rate", type=float, default=1500.0, help="stub Bedrock output tokens/s")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="share of Bedrock calls throttled")
+    parser.add_argument("--wiki-latency", type=float, default=0.1)
+    parser.add_argument("--ddb-latency", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    main.limiter.enabled = False
+    report = asyncio.run(run(args))
+    print(json.dumps(report))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,130 @@
+"""
+Model-routing benchmark: a mixed workload (quick tips, packing, budget, a
+short and a 14-day itinerary) on a stub whose Micro / Lite / Pro models
+differ in speed, run with every call pinned to Lite (the old behaviour) and
+with adaptive routing — then with Lite slowed down (SLO step-down) and with
+Lite throttled (fail-over). Reports latency per endpoint and model_used.
+
+Usage (from backend/):
+    python bench/model_routing.py [--rounds 6]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import httpx
+
+import main
+from model_router import ModelProfile, ModelRouter, Route
+from nova_client import AsyncNovaClient
+from stubs import StubBedrockClient, planning_reply, prompt_text, sample_itinerary
+
+CITIES = ["Lisbon", "Porto", "Madrid", "Rome", "Vienna", "Prague", "Berlin", "Paris"]
+SCALE = 10   # the stub models run 10x faster than the router's priors; SLOs are scaled to match
+SPEEDS = {   # stub model behaviour: seconds to first token, output tokens/s
+    "micro": {"latency": 0.03, "token_rate": 2100},
+    "lite": {"latency": 0.04, "token_rate": 1500},
+    "pro": {"latency": 0.07, "token_rate": 900},
+}
+ROUTER = main.router
+PROFILES = {t: ModelProfile(p.model_id, p.overhead_s / SCALE, p.output_tps * SCALE)
+            for t, p in ROUTER.profiles.items()}
+ROUTES = {task: Route(r.tier, r.slo_s / SCALE, r.min_tier) for task, r in ROUTER.routes.items()}
+ROUTER_PRO_MIN_DAYS = main.PRO_MIN_DAYS
+
+
+def reply(body: dict) -> str:
+    system, message = prompt_text(body, "system"), prompt_text(body)
+    if "travel planner" not in system:
+        return planning_reply(body)
+    full = sample_itinerary(int(re.search(r"(\d+)[- ]day", message).group(1)))
+    if "an outline only" in system:
+        return json.dumps({"trip_summary": full["trip_summary"],
+                           "days": [{k: d[k] for k in ("day", "date", "title", "theme")}
+                                    for d in full["daily_itinerary"]]})
+    if message.rstrip().endswith("budget breakdown."):
+        return json.dumps({k: full[k] for k in ("practical_info", "budget_breakdown")})
+    if "one day of a longer trip" in system:
+        return json.dumps(full["daily_itinerary"][0])
+    return json.dumps(full)
+
+
+def requests_for(city: str) -> list:
+    return [
+        ("tips", "/api/plan/quick-tips", {"params": {"destination": city, "category": "food"}}),
+        ("packing", "/api/plan/packing-list", {"json": {
+            "destination": city, "start_date": "2026-06-01", "end_date": "2026-06-05"}}),
+        ("budget", "/api/plan/budget", {"json": {
+            "destination": city, "duration_days": 5, "travelers": 2, "budget_level": "moderate"}}),
+        ("itinerary_3d", "/api/plan/full", {"json": {
+            "destination": city, "origin": "London", "start_date": "2026-06-01",
+            "end_date": "2026-06-03", "budget": "moderate"}}),
+        ("itinerary_14d", "/api/plan/full", {"json": {
+            "destination": city, "origin": "London", "start_date": "2026-06-01",
+            "end_date": "2026-06-14", "budget": "moderate"}}),
+    ]
+
+
+async def run(label: str, adaptive: bool, rounds: int, speeds: dict, throttle=None) -> dict:
+    if adaptive:
+        router = ModelRouter(PROFILES, ROUTES, ROUTER.default_route, throttle_cooldown=1.0)
+        main.PRO_MIN_DAYS = ROUTER_PRO_MIN_DAYS
+    else:   # every task on Lite, no fail-over
+        router = ModelRouter(PROFILES, {}, Route("lite", 30.0), adaptive=False)
+        main.PRO_MIN_DAYS = 10 ** 6
+    main.router = router
+    stub = StubBedrockClient(reply=reply, simulate_generation=True, throttle=throttle,
+                             models={PROFILES[t].model_id: s for t, s in speeds.items()})
+    main.nova = AsyncNovaClient(stub, main.MODEL_ID, max_concurrency=16, observer=router.observe)
+    timings, models, errors = {}, {}, 0
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for r in range(rounds):
+            for kind, path, kwargs in requests_for(CITIES[r % len(CITIES)]):
+                t0 = time.perf_counter()
+                resp = await client.post(path, **kwargs)
+                if resp.status_code != 200:
+                    errors += 1
+                    continue
+                timings.setdefault(kind, []).append(time.perf_counter() - t0)
+                models.setdefault(kind, Counter())[resp.json()["model_used"].split(".")[1]] += 1
+    main.nova.shutdown()
+    return {
+        "run": label,
+        "errors": errors,
+        **{f"{k}_mean_ms": round(sum(v) / len(v) * 1000, 1) for k, v in timings.items()},
+        "model_used": {k: dict(v) for k, v in models.items()},
+        "bedrock_calls": {m.split(".")[1]: n for m, n in stub.calls_by_model.items()},
+        "throttled_calls": stub.throttled,
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rounds", type=int, default=6)
+    args = parser.parse_args()
+
+    main.limiter.enabled = False
+    main.CACHE_TTLS = {}   # measure the models, not the response cache
+    slow_lite = dict(SPEEDS, lite={"latency": 0.04, "token_rate": 500})
+    lite_id = main.NOVA_MODELS["lite"]
+    for label, adaptive, speeds, throttle in (
+        ("all_lite", False, SPEEDS, None),
+        ("adaptive", True, SPEEDS, None),
+        ("adaptive_slow_lite", True, slow_lite, None),
+        ("all_lite_throttled", False, SPEEDS, lambda m: m == lite_id),
+        ("adaptive_throttled", True, SPEEDS, lambda m: m == lite_id),
+    ):
+        print(json.dumps(asyncio.run(run(label, adaptive, args.rounds, speeds, throttle))))
+
+
+if __name__ == "__main__":
+    main_cli()
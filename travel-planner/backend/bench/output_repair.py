@@ -0,0 +1,116 @@
+"""
+Output-repair benchmark: /api/plan/full against a stub Bedrock that damages a
+share of its itineraries (trailing commas, stray braces, truncation, a broken
+section). Compares the old find/rfind + json.loads extraction with repair +
+section retry: success rate, and output tokens spent on retries vs
+regenerating the whole itinerary.
+
+Usage (from backend/):
+    python bench/output_repair.py [--requests 40] [--days 4] [--damage-rate 0.5]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import httpx
+
+import main
+from nova_client import AsyncNovaClient
+from stubs import StubBedrockClient, prompt_text, sample_itinerary
+
+DAMAGES = ("trailing_comma", "stray_brace", "truncated", "broken_section")
+
+
+def damage(text: str, kind: str) -> str:
+    if kind == "trailing_comma":
+        return text.replace('"culture"\n', '"culture",\n')
+    if kind == "stray_brace":
+        return text.replace('"practical_info"', '}\n  "practical_info"', 1)
+    if kind == "truncated":   # cut off inside the last day
+        return text[:text.rfind('"meals"')]
+    return text.replace('"budget_breakdown": {', '"budget_breakdown": "see above", "x": {', 1)
+
+
+def old_extract_ok(text: str) -> bool:
+    try:
+        json.loads(text[text.find("{"):text.rfind("}") + 1])
+        return True
+    except ValueError:
+        return False
+
+
+class DamagingModel:
+    def __init__(self, days: int, damage_rate: float, seed: int = 0):
+        self.itinerary = sample_itinerary(days)
+        self.full = json.dumps(self.itinerary, indent=2)
+        self.damage_rate = damage_rate
+        self.rng = random.Random(seed)
+        self.kinds = []
+        self.tokens = {"full": 0, "retry": 0}
+
+    def __call__(self, body: dict) -> str:
+        prompt = prompt_text(body)
+        day = re.search(r"daily_itinerary entry for day (\d+)", prompt)
+        section = re.search(r'Return ONLY the "(\w+)" part', prompt)
+        if day:
+            text = json.dumps(self.itinerary["daily_itinerary"][int(day.group(1)) - 1])
+        elif section:
+            text = json.dumps({section.group(1): self.itinerary[section.group(1)]})
+        else:
+            kind = self.rng.choice(DAMAGES) if self.rng.random() < self.damage_rate else "clean"
+            self.kinds.append(kind)
+            text = self.full if kind == "clean" else damage(self.full, kind)
+            self.tokens["full"] += len(text) // 4
+            return text
+        self.tokens["retry"] += len(text) // 4
+        return text
+
+
+async def run(requests: int, days: int, damage_rate: float) -> dict:
+    model = DamagingModel(days, damage_rate)
+    main.nova = AsyncNovaClient(StubBedrockClient(latency=0.01, reply=model), main.MODEL_ID)
+    trip = {"destination": "Lisbon", "origin": "London", "start_date": "2026-06-01",
+            "end_date": f"2026-06-{days:02d}", "budget": "moderate", "travelers": 2,
+            "planning_mode": "single"}
+    ok = 0
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for _ in range(requests):
+            resp = await client.post("/api/plan/full", json=trip)
+            ok += resp.status_code == 200 and len(resp.json()["data"]["daily_itinerary"]) == days
+    main.nova.shutdown()
+
+    full_tokens = len(model.full) // 4
+    damaged = [k for k in model.kinds if k != "clean"]
+    old_ok = sum(old_extract_ok(model.full if k == "clean" else damage(model.full, k)) for k in model.kinds)
+    return {
+        "requests": requests, "damaged": len(damaged),
+        "damage_kinds": {k: model.kinds.count(k) for k in DAMAGES},
+        "old_success_rate": round(old_ok / requests, 3),
+        "new_success_rate": round(ok / requests, 3),
+        "retry_output_tokens": model.tokens["retry"],
+        "full_regenerate_output_tokens": (requests - old_ok) * full_tokens,
+        "model_output_stats": main.output_stats.stats().get("itinerary"),
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--days", type=int, default=4)
+    parser.add_argument("--damage-rate", type=float, default=0.5)
+    args = parser.parse_args()
+
+    main.limiter.enabled = False
+    print(json.dumps(asyncio.run(run(args.requests, args.days, args.damage_rate))))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,97 @@
+"""
+Overload benchmark: open-loop quick-tips traffic at a multiple of what a
+stub Bedrock quota can serve (calls beyond `--capacity` in flight are
+throttled), with and without the call governor, plus a full outage to
+show the circuit breaker failing fast. Reports goodput (answers within the
+client deadline per second of offered traffic), status codes and Bedrock
+calls made.
+
+Usage (from backend/):
+    python bench/overload.py [--rate 80] [--seconds 5] [--capacity 8] [--latency 0.2] [--deadline 2]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import httpx
+
+import main
+from harness import percentile
+from model_router import ModelRouter, Route
+from nova_client import AsyncNovaClient
+from nova_governor import NovaGovernor
+from stubs import StubBedrockClient
+
+
+async def run(label: str, governed: bool, args, outage: bool = False) -> dict:
+    stub = StubBedrockClient(latency=args.latency, capacity=args.capacity,
+                             throttle=(lambda m: True) if outage else None)
+    governor = NovaGovernor(max_limit=32, max_queue_wait=args.deadline) if governed else None
+    main.nova = AsyncNovaClient(stub, main.MODEL_ID, max_concurrency=32, timeout=args.deadline,
+                                governor=governor)
+    statuses, latencies = Counter(), []
+    good = 0
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def one(i: int) -> None:
+            nonlocal good
+            t0 = time.perf_counter()
+            resp = await client.post("/api/plan/quick-tips", params={"destination": f"City {i}"})
+            elapsed = time.perf_counter() - t0
+            statuses[resp.status_code] += 1
+            if resp.status_code == 200:
+                latencies.append(elapsed)
+                good += elapsed <= args.deadline
+
+        started = time.perf_counter()
+        tasks, i = [], 0
+        while time.perf_counter() - started < args.seconds:   # Poisson arrivals
+            tasks.append(asyncio.create_task(one(i)))
+            i += 1
+            await asyncio.sleep(random.expovariate(args.rate))
+        await asyncio.gather(*tasks)
+    main.nova.shutdown()
+    return {
+        "run": label,
+        "offered": i,
+        "statuses": dict(statuses),
+        "answered_in_deadline": good,
+        "goodput_rps": round(good / args.seconds, 1),
+        "ok_p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "ok_p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "bedrock_calls": stub.calls,
+        "throttled_calls": stub.throttled,
+        "governor": governor.stats() if governor else None,
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rate", type=float, default=80.0, help="offered requests per second")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--capacity", type=int, default=8, help="stub Bedrock concurrency quota")
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--deadline", type=float, default=2.0, help="client deadline / Nova timeout")
+    args = parser.parse_args()
+
+    main.limiter.enabled = False
+    main.CACHE_TTLS = {}
+    # One model only, so the governor (not router fail-over) is what's measured
+    main.router = ModelRouter(main.router.profiles, {}, Route("lite", 30.0), adaptive=False)
+    print(json.dumps({"capacity_rps": round(args.capacity / args.latency, 1), "offered_rps": args.rate}))
+    for label, governed, outage in (("ungoverned", False, False), ("governed", True, False),
+                                    ("outage_ungoverned", False, True), ("outage_governed", True, True)):
+        random.seed(0)
+        print(json.dumps(asyncio.run(run(label, governed, args, outage))))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,65 @@
+"""
+Cold-cache /api/destination-photos latency against a stub MediaWiki API where
+every round-trip takes --latency seconds. The lookups now overlap, so a cold
+request should cost about two round-trips (article list → imageinfo) rather
+than the sum of all four.
+
+Usage (from backend/):
+    python bench/photos.py [--latency 0.3] [--destinations 20] [--concurrency 10]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import httpx
+
+import main
+from stubs import stub_mediawiki
+
+
+async def run(latency: float, destinations: int, concurrency: int) -> dict:
+    handler = stub_mediawiki(latency)
+    main._wiki_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    transport = httpx.ASGITransport(app=main.app)
+    slots = asyncio.Semaphore(concurrency)
+    timings = []
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def cold(i):
+            async with slots:
+                t0 = time.perf_counter()
+                r = await client.get("/api/destination-photos", params={"destination": f"Town {i}"})
+                timings.append(time.perf_counter() - t0)
+                return len(r.json()["photos"])
+
+        counts = await asyncio.gather(*(cold(i) for i in range(destinations)))
+
+    await main._wiki_client.aclose()
+    return {
+        "stub_round_trip_s": latency,
+        "cold_p50_s": round(statistics.median(timings), 3),
+        "cold_max_s": round(max(timings), 3),
+        "sequential_estimate_s": round(4 * latency, 3),
+        "photos_per_destination": min(counts),
+        "upstream_requests": handler.counts["requests"],
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--destinations", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.latency, args.destinations, args.concurrency))))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,116 @@
+"""
+Trip-variant benchmark: the same trip at budget / moderate / luxury (and at
+three destinations, and as budget estimates) planned as serial
+/api/plan/full or /api/plan/budget round-trips vs one /api/plan/variants
+batch. Reports wall time, time to the first variant, rate-limit charges
+and prompt tokens read from Bedrock's cache.
+
+Usage (from backend/):
+    python bench/plan_variants.py [--days 4] [--latency 0.3] [--token-rate 1500] [--concurrency 6]
+        [--nova-concurrency 8]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import httpx
+
+import main
+from nova_client import AsyncNovaClient
+from stubs import StubBedrockClient, itinerary_reply
+
+LEVELS = [{"budget": "budget"}, {"budget": "moderate"}, {"budget": "luxury"}]
+CITIES = [{"destination": "Lisbon"}, {"destination": "Porto"}, {"destination": "Seville"}]
+BUDGET_LEVELS = [{"budget_level": "budget"}, {"budget_level": "moderate"}, {"budget_level": "luxury"}]
+
+
+def scenarios(days: int) -> list:
+    trip = {"destination": "Lisbon", "origin": "London", "start_date": "2026-06-01",
+            "end_date": f"2026-06-{days:02d}", "budget": "moderate", "travelers": 2,
+            "interests": ["food", "history"]}
+    budget = {"destination": "Lisbon", "duration_days": days, "travelers": 2, "budget_level": "moderate"}
+    return [("budget_levels", "itinerary", "/api/plan/full", trip, LEVELS),
+            ("destinations", "itinerary", "/api/plan/full", trip, CITIES),
+            ("budget_estimates", "budget", "/api/plan/budget", budget, BUDGET_LEVELS)]
+
+
+def parse_sse(text: str) -> list:
+    events = []
+    for block in text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines() if ": " in line)
+        if "event" in lines:
+            events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+async def run(mode: str, scenario: tuple, args) -> dict:
+    name, kind, path, base, variants = scenario
+    stub = StubBedrockClient(latency=args.latency, token_rate=args.token_rate, reply=itinerary_reply,
+                             simulate_generation=True)
+    main.nova = AsyncNovaClient(stub, main.MODEL_ID, max_concurrency=args.nova_concurrency)
+    first = None
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        started = time.perf_counter()
+        if mode == "serial":
+            ok = 0
+            for overrides in variants:
+                resp = await client.post(path, json={**base, **overrides})
+                ok += resp.status_code == 200
+                first = first or time.perf_counter() - started
+            summary = None
+        else:
+            async with client.stream("POST", "/api/plan/variants",
+                                     json={"kind": kind, "base": base, "variants": variants}) as resp:
+                body = ""
+                async for chunk in resp.aiter_text():
+                    if first is None and "event: variant" in chunk:
+                        first = time.perf_counter() - started
+                    body += chunk
+            events = parse_sse(body)
+            ok = sum(1 for e, data in events if e == "variant" and data.get("success"))
+            summary = next((data for e, data in events if e == "comparison"), None)
+        elapsed = time.perf_counter() - started
+    main.nova.shutdown()
+    usage = list(main.nova.usage.values())
+    return {
+        "scenario": name,
+        "mode": mode,
+        "variants": len(variants),
+        "succeeded": ok,
+        "elapsed_s": round(elapsed, 2),
+        "first_variant_s": round(first or 0, 2),
+        "rate_limit_requests": 1 if mode == "batch" else len(variants),
+        "bedrock_calls": stub.calls,
+        "cache_read_tokens": sum(u["cache_read_tokens"] for u in usage),
+        "input_tokens": sum(u["input_tokens"] for u in usage),
+        "cheapest": summary and summary["cheapest"],
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--days", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.3, help="stub Bedrock time to first token")
+    parser.add_argument("--token-rate", type=float, default=1500.0, help="stub Bedrock output tokens/s")
+    parser.add_argument("--concurrency", type=int, default=6, help="VARIANT_CONCURRENCY")
+    parser.add_argument("--nova-concurrency", type=int, default=main.NOVA_MAX_CONCURRENCY,
+                        help="Bedrock calls in flight per process (NOVA_MAX_CONCURRENCY)")
+    args = parser.parse_args()
+
+    main.limiter.enabled = False
+    main.CACHE_TTLS = {}
+    main.VARIANT_CONCURRENCY = args.concurrency
+    for scenario in scenarios(args.days):
+        for mode in ("serial", "batch"):
+            print(json.dumps(asyncio.run(run(mode, scenario, args))))
+
+
+if __name__ == "__main__":
+    main_cli()
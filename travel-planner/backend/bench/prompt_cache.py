@@ -0,0 +1,98 @@
+"""
+Prompt-cache benchmark: packing / budget / quick-tips for many destinations
+plus one fan-out itinerary, with Bedrock prompt-cache points on vs off,
+against a stub that emulates Nova's prompt cache and charges prefill time
+for uncached input. Reports cache read/write tokens and mean latency.
+
+Usage (from backend/):
+    python bench/prompt_cache.py [--destinations 10] [--prefill-rate 1500] [--days 7]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import httpx
+
+import main
+from nova_client import AsyncNovaClient
+from stubs import StubBedrockClient, planning_reply, prompt_text, sample_itinerary
+
+CITIES = ["Lisbon", "Porto", "Madrid", "Seville", "Rome", "Florence", "Vienna", "Prague",
+          "Krakow", "Berlin", "Paris", "Lyon", "Athens", "Istanbul", "Dublin", "Edinburgh"]
+
+
+def reply(body: dict) -> str:
+    system, message = prompt_text(body, "system"), prompt_text(body)
+    if "travel planner" not in system:
+        return planning_reply(body)
+    full = sample_itinerary(int(re.search(r"(\d+)[- ]day", message).group(1)))
+    if "an outline only" in system:
+        return json.dumps({"trip_summary": full["trip_summary"],
+                           "days": [{k: d[k] for k in ("day", "date", "title", "theme")}
+                                    for d in full["daily_itinerary"]]})
+    if message.rstrip().endswith("budget breakdown."):
+        return json.dumps({k: full[k] for k in ("practical_info", "budget_breakdown")})
+    return json.dumps(full["daily_itinerary"][0])
+
+
+async def run(enabled: bool, destinations: int, prefill_rate: float, days: int) -> dict:
+    main.PROMPT_CACHE = enabled
+    stub = StubBedrockClient(latency=0.05, reply=reply, prefill_rate=prefill_rate)
+    main.nova = AsyncNovaClient(stub, main.MODEL_ID, max_concurrency=16)   # no response cache
+    timings = {"packing": [], "budget": [], "tips": []}
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def timed(kind, coro):
+            t0 = time.perf_counter()
+            (await coro).raise_for_status()
+            timings[kind].append(time.perf_counter() - t0)
+
+        for city in CITIES[:destinations]:
+            await timed("packing", client.post("/api/plan/packing-list", json={
+                "destination": city, "start_date": "2026-06-01", "end_date": "2026-06-05"}))
+            await timed("budget", client.post("/api/plan/budget", json={
+                "destination": city, "duration_days": 5, "travelers": 2, "budget_level": "moderate"}))
+            await timed("tips", client.post("/api/plan/quick-tips",
+                                            params={"destination": city, "category": "food"}))
+        t0 = time.perf_counter()
+        (await client.post("/api/plan/full", json={
+            "destination": "Lisbon", "origin": "London", "start_date": "2026-06-01",
+            "end_date": f"2026-06-{days:02d}", "budget": "moderate", "travelers": 2,
+            "planning_mode": "fanout"})).raise_for_status()
+        fanout_s = time.perf_counter() - t0
+    main.nova.shutdown()
+
+    usage = {}   # summed over the routed models
+    for totals in main.nova.usage.values():
+        for k, v in totals.items():
+            usage[k] = usage.get(k, 0) + v
+    return {
+        "prompt_cache": enabled,
+        **{f"{k}_mean_ms": round(sum(v) / len(v) * 1000, 1) for k, v in timings.items()},
+        "fanout_itinerary_s": round(fanout_s, 3),
+        "usage": usage,
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--destinations", type=int, default=10)
+    parser.add_argument("--prefill-rate", type=float, default=1500.0)
+    parser.add_argument("--days", type=int, default=7)
+    args = parser.parse_args()
+
+    main.limiter.enabled = False
+    for enabled in (False, True):
+        print(json.dumps(asyncio.run(run(enabled, min(args.destinations, len(CITIES)),
+                                         args.prefill_rate, args.days))))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,108 @@
+"""
+Rate-limit benchmark: one caller's quick-tips traffic spread round-robin
+over several simulated uvicorn workers (one RateLimiter each), with
+per-process memory buckets vs a shared SQLite file (and a Redis-protocol
+server with --redis), then a heavy itinerary user next to a light tips user
+under request counting vs token costs, then the 429s main.app returns.
+
+Usage (from backend/):
+    python bench/rate_limits.py [--workers 4] [--seconds 3] [--rate 40] [--redis redis://localhost:6379/0]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import httpx
+
+import main
+from nova_client import AsyncNovaClient
+from rate_limit import MemoryBackend, RateLimiter, SQLiteBackend, backend_from_url
+from stubs import StubBedrockClient
+
+PER_MIN, BURST = 6000, 1200   # small limits so a few seconds show the effect
+
+
+async def offered(limiters: list, key: str, cost: float, rate: float, seconds: float) -> dict:
+    """Send `rate` requests/s for `seconds`, request i going to worker i % len(limiters)."""
+    admitted, i = 0, 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        admitted += not await limiters[i % len(limiters)].admit(key, cost)
+        i += 1
+        await asyncio.sleep(1 / rate)
+    return {"offered": i, "admitted": admitted, "tokens_admitted": admitted * cost}
+
+
+async def across_workers(label: str, backends: list, args) -> dict:
+    limiters = [RateLimiter(b, PER_MIN, BURST) for b in backends]
+    result = await offered(limiters, "user:alice", main.REQUEST_COSTS["tips"], args.rate, args.seconds)
+    allowed = BURST + PER_MIN / 60 * args.seconds
+    return {"run": label, "workers": len(backends), **result,
+            "tokens_allowed": round(allowed), "over_admission": round(result["tokens_admitted"] / allowed, 2)}
+
+
+async def fairness(label: str, per_request: bool, args) -> dict:
+    """Heavy user: 14-day itineraries; light user: quick tips — same offered rate."""
+    if per_request:   # the old limit style: N requests a minute whatever they cost
+        limiter, costs = RateLimiter(MemoryBackend(), 60, 5), {"heavy": 1, "light": 1}
+    else:
+        limiter = RateLimiter(MemoryBackend(), PER_MIN * 4, BURST * 10)
+        costs = {"heavy": main.itinerary_cost(14), "light": main.REQUEST_COSTS["tips"]}
+    heavy, light = await asyncio.gather(
+        offered([limiter], "user:heavy", costs["heavy"], args.rate / 4, args.seconds),
+        offered([limiter], "user:light", costs["light"], args.rate / 4, args.seconds))
+    est = {"heavy": main.itinerary_cost(14), "light": main.REQUEST_COSTS["tips"]}
+    return {"run": label,
+            "heavy_admitted": heavy["admitted"], "heavy_output_tokens": heavy["admitted"] * est["heavy"],
+            "light_admitted": light["admitted"], "light_output_tokens": light["admitted"] * est["light"]}
+
+
+async def through_app(args) -> dict:
+    main.limiter = RateLimiter(MemoryBackend(), PER_MIN, BURST)
+    main.nova = AsyncNovaClient(StubBedrockClient(latency=0.01), main.MODEL_ID, max_concurrency=16)
+    statuses, retry_after = Counter(), set()
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for i in range(20):
+            resp = await client.post("/api/plan/quick-tips", params={"destination": f"City {i}"})
+            statuses[resp.status_code] += 1
+            if resp.status_code == 429:
+                retry_after.add(resp.headers["Retry-After"])
+        health = (await client.get("/health")).json()
+    main.nova.shutdown()
+    return {"run": "main_app", "statuses": dict(statuses), "retry_after_s": sorted(retry_after),
+            "health_rate_limit": health["rate_limit"]}
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--rate", type=float, default=40.0, help="offered requests per second")
+    parser.add_argument("--redis", default="", help="redis:// URL of a server to include")
+    args = parser.parse_args()
+
+    main.CACHE_TTLS = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        runs = [("memory_per_worker", lambda: [MemoryBackend() for _ in range(args.workers)]),
+                ("sqlite_shared", lambda: [SQLiteBackend(os.path.join(tmp, "rl.db"))
+                                           for _ in range(args.workers)])]
+        if args.redis:
+            runs.append(("redis_shared", lambda: [backend_from_url(args.redis) for _ in range(args.workers)]))
+        for label, backends in runs:
+            print(json.dumps(asyncio.run(across_workers(label, backends(), args))))
+    for label, per_request in (("per_request_limit", True), ("token_cost_limit", False)):
+        print(json.dumps(asyncio.run(fairness(label, per_request, args))))
+    print(json.dumps(asyncio.run(through_app(args))))
+
+
+if __name__ == "__main__":
+    main_cli()
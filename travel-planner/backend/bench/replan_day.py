@@ -0,0 +1,97 @@
+"""
+Day-replanning benchmark: changing one or two days of a saved itinerary by
+regenerating the whole trip (/api/plan/full, then re-saving it) vs
+POST /api/itineraries/{id}/days, which plans only those days and updates the
+stored itinerary in place. Reports latency, Bedrock calls, output tokens
+generated and DynamoDB calls, plus the 409 a concurrent edit gets.
+
+Usage (from backend/):
+    python bench/replan_day.py [--days 7] [--latency 0.3] [--token-rate 1500]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import httpx
+
+import main
+from nova_client import AsyncNovaClient
+from stubs import StubBedrockClient, StubDynamoResource, itinerary_reply, sample_itinerary
+from trip_store import TripStore
+
+
+def trip_form(days: int) -> dict:
+    return {"destination": "Lisbon", "origin": "London", "start_date": "2026-06-01",
+            "end_date": f"2026-06-{days:02d}", "budget": "moderate", "travelers": 2,
+            "interests": ["food", "history"], "planning_mode": "single"}
+
+
+async def run(mode: str, replan: list, args) -> dict:
+    stub = StubBedrockClient(latency=args.latency, token_rate=args.token_rate, reply=itinerary_reply,
+                             simulate_generation=True)
+    main.nova = AsyncNovaClient(stub, main.MODEL_ID, max_concurrency=main.NOVA_MAX_CONCURRENCY)
+    ddb = StubDynamoResource(latency=args.ddb_latency)
+    main.trip_store = TripStore(ddb, main.DYNAMODB_TABLE)
+    main.app.dependency_overrides[main.get_current_user] = lambda: {"sub": "bench-user"}
+    form = trip_form(args.days)
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        saved = (await client.post("/api/itineraries", json={
+            "destination": "Lisbon", "dates": "Jun 1 - Jun 7", "travelers": 2, "budget": "moderate",
+            "title": "Lisbon", "itinerary": sample_itinerary(args.days), "tripForm": form})).json()["data"]
+        calls_before = dict(ddb.calls)
+        started = time.perf_counter()
+        if mode == "full_regenerate":
+            plan = (await client.post("/api/plan/full", json=form)).json()
+            await client.delete(f"/api/itineraries/{saved['id']}")
+            resp = await client.post("/api/itineraries", json={
+                "destination": "Lisbon", "dates": "Jun 1 - Jun 7", "travelers": 2, "budget": "moderate",
+                "title": "Lisbon", "itinerary": plan["data"], "tripForm": form})
+        else:
+            resp = await client.post(f"/api/itineraries/{saved['id']}/days", json={
+                "destination": "Lisbon", "date": "", "days": replan, "preferences": "more time outdoors"})
+        elapsed = time.perf_counter() - started
+        ddb_calls = sum(ddb.calls.values()) - sum(calls_before.values())
+        conflict = None
+        if mode == "replan_days":   # a second edit based on the pre-edit item must not overwrite the first
+            item = dict(ddb.items[("bench-user", saved["id"])])
+            await main.trip_store.update_itinerary(item, sample_itinerary(args.days))
+            conflict = await main.trip_store.update_itinerary(item, sample_itinerary(args.days))
+    main.app.dependency_overrides.clear()
+    main.nova.shutdown()
+    main.trip_store.shutdown()
+    return {
+        "mode": mode,
+        "days_changed": args.days if mode == "full_regenerate" else len(replan),
+        "status": resp.status_code,
+        "latency_s": round(elapsed, 2),
+        "bedrock_calls": stub.calls,
+        "output_tokens": stub.output_tokens,
+        "dynamodb_calls": ddb_calls,
+        "stale_update_applied": conflict,
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--days", type=int, default=7, help="trip length")
+    parser.add_argument("--latency", type=float, default=0.3, help="stub Bedrock time to first token")
+    parser.add_argument("--token-rate", type=float, default=1500.0, help="stub Bedrock output tokens/s")
+    parser.add_argument("--ddb-latency", type=float, default=0.01)
+    args = parser.parse_args()
+
+    main.limiter.enabled = False
+    main.CACHE_TTLS = {}
+    print(json.dumps(asyncio.run(run("full_regenerate", [], args))))
+    for replan in ([3], [2, 5]):
+        print(json.dumps(asyncio.run(run("replan_days", replan, args))))
+
+
+if __name__ == "__main__":
+    main_cli()
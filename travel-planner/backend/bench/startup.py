@@ -0,0 +1,79 @@
+"""
+Cold-start benchmark: module import time, and wall time from spawning a
+uvicorn process to the first 200 from /health (liveness) and /ready.
+Runs in local mode (Cognito unset) so readiness needs no network.
+
+Usage (from backend/):
+    python bench/startup.py [--runs 5]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import httpx
+
+from harness import free_port
+
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+IMPORT_PROBE = ("import sys, time; t = time.perf_counter(); import main; "
+                "print(round((time.perf_counter() - t) * 1000, 1), 'boto3' in sys.modules)")
+
+
+def import_once() -> tuple:
+    out = subprocess.run([sys.executable, "-c", IMPORT_PROBE], cwd=BACKEND,
+                         capture_output=True, text=True, check=True).stdout.split()
+    return float(out[0]), out[1] == "True"
+
+
+def wait_for(url: str, t0: float, timeout: float = 30.0) -> float:
+    while time.perf_counter() - t0 < timeout:
+        try:
+            if httpx.get(url, timeout=1).status_code == 200:
+                return round((time.perf_counter() - t0) * 1000, 1)
+        except httpx.TransportError:
+            pass
+        time.sleep(0.005)
+    return float("nan")
+
+
+def boot_once() -> tuple:
+    port = free_port()
+    t0 = time.perf_counter()
+    env = dict(os.environ, COGNITO_USER_POOL_ID="")
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+                             "--log-level", "warning"], cwd=BACKEND, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        live = wait_for(f"http://127.0.0.1:{port}/health", t0)
+        ready = wait_for(f"http://127.0.0.1:{port}/ready", t0)
+    finally:
+        proc.terminate()
+        proc.wait()
+    return live, ready
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    imports = [import_once() for _ in range(args.runs)]
+    boots = [boot_once() for _ in range(args.runs)]
+    print(json.dumps({
+        "runs": args.runs,
+        "import_ms_median": statistics.median(ms for ms, _ in imports),
+        "boto3_loaded_at_import": any(loaded for _, loaded in imports),
+        "spawn_to_live_ms_median": statistics.median(live for live, _ in boots),
+        "spawn_to_ready_ms_median": statistics.median(ready for _, ready in boots),
+    }))
+
+
+if __name__ == "__main__":
+    main_cli()
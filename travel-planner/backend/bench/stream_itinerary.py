@@ -0,0 +1,72 @@
+"""
+Time-to-first-content benchmark: blocking /api/plan/full vs SSE
+/api/plan/full/stream against a stub Bedrock that streams at a fixed token rate.
+
+Usage (from backend/):
+    python bench/stream_itinerary.py [--days 5] [--token-rate 80] [--latency 0.5]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import httpx
+
+import main
+from nova_client import AsyncNovaClient
+from harness import serve
+from stubs import StubBedrockClient, sample_itinerary
+
+
+def trip(days: int) -> dict:
+    return {"destination": "Lisbon", "origin": "London", "start_date": "2026-06-01",
+            "end_date": f"2026-06-{days:02d}", "budget": "moderate", "travelers": 2,
+            "planning_mode": "single"}
+
+
+async def run(base_url: str, days: int, token_rate: float, latency: float) -> dict:
+    text = json.dumps(sample_itinerary(days), indent=2)
+    # Blocking path: the whole generation happens before invoke_model returns
+    stub = StubBedrockClient(latency=latency, reply=text, token_rate=token_rate,
+                             simulate_generation=True)
+    main.nova = AsyncNovaClient(stub, main.MODEL_ID)
+    report = {"days": days, "output_tokens": len(text) // 4, "token_rate": token_rate}
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=None) as client:
+        t0 = time.perf_counter()
+        (await client.post("/api/plan/full", json=trip(days))).raise_for_status()
+        report["blocking_total_s"] = round(time.perf_counter() - t0, 3)
+
+        firsts = {}
+        t0 = time.perf_counter()
+        async with client.stream("POST", "/api/plan/full/stream", json=trip(days)) as resp:
+            async for line in resp.aiter_lines():
+                if line.startswith("event: "):
+                    firsts.setdefault(line[7:], round(time.perf_counter() - t0, 3))
+        report["stream_first_trip_summary_s"] = firsts.get("trip_summary")
+        report["stream_first_day_s"] = firsts.get("day")
+        report["stream_done_s"] = firsts.get("done")
+
+    main.nova.shutdown()
+    return report
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--days", type=int, default=5)
+    parser.add_argument("--token-rate", type=float, default=80.0)
+    parser.add_argument("--latency", type=float, default=0.5)
+    args = parser.parse_args()
+
+    main.limiter.enabled = False
+    with serve(main.app) as base_url:
+        print(json.dumps(asyncio.run(run(base_url, args.days, args.token_rate, args.latency))))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,432 @@
+"""
+Local stand-ins for AWS services used by the benchmarks — no credentials,
+no network, no Bedrock bill.
+"""
+
+import io
+import json
+import re
+import threading
+import time
+
+
+def sample_itinerary(days: int = 5, destination: str = "Lisbon") -> dict:
+    """A realistic-sized itinerary in the /api/plan/full schema."""
+    activity = {
+        "time": "9:00 AM", "name": "Alfama walking tour",
+        "description": "Wander the oldest district's tiled lanes and viewpoints with a local guide.",
+        "duration": "2 hours", "cost_estimate": "$20-30",
+        "tips": "Start early to beat the tram crowds.", "category": "culture",
+    }
+    meal = {"name": "Time Out Market", "description": "Food hall with local favourites", "price_range": "$$"}
+    return {
+        "trip_summary": {
+            "title": f"{days} Days in {destination}", "destination": destination, "duration": days,
+            "best_time_to_visit": "Spring", "overall_theme": "Culture and food",
+            "highlights": ["Belém", "Sintra", "Fado night"],
+        },
+        "daily_itinerary": [
+            {
+                "day": d, "date": f"2026-06-{d:02d}", "title": f"Day {d} highlights", "theme": "Culture",
+                "activities": [dict(activity, time=t) for t in ("9:00 AM", "12:00 PM", "3:00 PM", "7:00 PM")],
+                "meals": {"breakfast": meal, "lunch": meal, "dinner": meal},
+                "accommodation": {"name": "Baixa House", "type": "Apartment", "price_range": "$120/night"},
+                "transportation": "Metro and tram 28", "daily_budget_estimate": "$90-140 per person",
+            }
+            for d in range(1, days + 1)
+        ],
+        "practical_info": {k: "..." for k in ("getting_there", "local_transportation", "currency_tips",
+                                               "safety_tips", "local_customs", "emergency_contacts")},
+        "budget_breakdown": {k: "$500" for k in ("accommodation_total", "food_total", "activities_total",
+                                                  "transportation_total", "grand_total_per_person")},
+    }
+
+
+def sample_packing_list(destination: str = "Lisbon") -> dict:
+    """A realistic-sized /api/plan/packing-list response."""
+    categories = {
+        ("Clothing", "👕"): ["Light jacket", "T-shirts", "Linen trousers", "Walking shoes", "Sandals", "Sweater"],
+        ("Toiletries", "🧴"): ["Sunscreen SPF 50", "Toothbrush", "Travel shampoo", "Deodorant", "Lip balm"],
+        ("Electronics", "🔌"): ["Phone charger", "EU plug adapter", "Power bank", "Headphones"],
+        ("Documents", "📄"): ["Passport", "Travel insurance", "Booking confirmations", "Driving licence"],
+        ("Health", "💊"): ["Painkillers", "Plasters", "Prescription medication", "Hand sanitiser"],
+        ("Day Bag", "🎒"): ["Reusable water bottle", "Sunglasses", "Compact umbrella", "Snacks"],
+    }
+    return {
+        "weather_advisory": f"{destination} in June is warm and dry by day, breezy in the evenings.",
+        "categories": [
+            {"name": name, "icon": icon, "items": [
+                {"item": item, "quantity": "1", "essential": i < 2, "notes": "Pack in your carry-on"}
+                for i, item in enumerate(items)]}
+            for (name, icon), items in categories.items()
+        ],
+        "tips": ["Roll clothes to save space", "Leave room for souvenirs", "Wear your bulkiest shoes"],
+        "carry_on_essentials": ["Passport", "Medication", "Phone charger", "A change of clothes"],
+    }
+
+
+def sample_budget_estimate(destination: str = "Lisbon") -> dict:
+    """A realistic-sized /api/plan/budget response."""
+    bands = {"accommodation": (60, 110, 220), "food": (30, 55, 100), "transportation": (8, 15, 35),
+             "activities": (15, 35, 80), "miscellaneous": (5, 12, 30)}
+    return {
+        "summary": f"A moderate week in {destination} costs about €230 a day per person.",
+        "daily_breakdown": {k: {"low": lo, "average": avg, "high": hi,
+                                "notes": "Per person per day, shoulder-season prices"}
+                            for k, (lo, avg, hi) in bands.items()},
+        "total_per_person": {"low": 830, "recommended": 1590, "comfortable": 3270},
+        "total_for_group": {"low": 1660, "recommended": 3180, "comfortable": 6540},
+        "money_saving_tips": ["Buy a Viva Viagem card", "Eat the prato do dia at lunch",
+                              "Visit museums on free Sunday mornings"],
+        "splurge_recommendations": ["Sunset sail on the Tagus", "Tasting menu at a Michelin restaurant"],
+        "currency": "Euro (EUR); cards are accepted almost everywhere.",
+    }
+
+
+def prompt_text(body: dict, part: str = "messages") -> str:
+    """All text of a Nova request body's system prompt or messages, cache points dropped."""
+    blocks = body.get("system", []) if part == "system" else [
+        b for m in body.get("messages", []) for b in m["content"]]
+    return "\n\n".join(b["text"] for b in blocks if "text" in b)
+
+
+def planning_reply(body: dict) -> str:
+    """Valid packing / budget / quick-tips output, picked by the request's system prompt."""
+    system = prompt_text(body, "system")
+    if "packing expert" in system:
+        return json.dumps({"weather_advisory": "Mild, some rain", "categories": [
+            {"name": "Clothing", "icon": "👕", "items": [
+                {"item": "Light jacket", "quantity": "1", "essential": True, "notes": ""}]}],
+            "tips": ["Roll clothes"], "carry_on_essentials": ["Passport"]})
+    if "budget expert" in system:
+        band = {"low": 40, "average": 80, "high": 150, "notes": ""}
+        return json.dumps({"summary": "Moderate", "daily_breakdown": {"food": band, "accommodation": band},
+                           "total_per_person": {"low": 500, "recommended": 900, "comfortable": 1500},
+                           "currency": "EUR"})
+    return json.dumps({"tips": [{"title": "Go early", "description": "Beat the crowds.", "icon": "⏰"}]})
+
+
+def itinerary_reply(body: dict) -> str:
+    """Model text for any Nova request the backend makes: full or streamed
+    itineraries, fan-out outline / day / extras calls, and planning_reply's
+    endpoints (chat gets the quick-tips JSON — any text will do)."""
+    system, message = prompt_text(body, "system"), prompt_text(body)
+    if "travel planner" not in system:
+        return planning_reply(body)
+    full = sample_itinerary(int(re.search(r"(\d+)[- ]day", message).group(1)))
+    if "an outline only" in system:
+        return json.dumps({"trip_summary": full["trip_summary"],
+                           "days": [{k: d[k] for k in ("day", "date", "title", "theme")}
+                                    for d in full["daily_itinerary"]]})
+    if message.rstrip().endswith("budget breakdown."):
+        return json.dumps({k: full[k] for k in ("practical_info", "budget_breakdown")})
+    if "one day of a longer trip" in system:
+        return json.dumps(full["daily_itinerary"][0])
+    return json.dumps(full)
+
+
+class _StubEventStream:
+    """Iterable of Nova stream events that honours close() like botocore's EventStream."""
+
+    def __init__(self, text: str, token_delay: float, chars_per_token: int = 4, usage: dict = None):
+        self.text = text
+        self.usage = usage or {}
+        self.token_delay = token_delay
+        self.chars_per_token = chars_per_token
+        self.closed = False
+        self.tokens_sent = 0
+
+    def _event(self, payload: dict) -> dict:
+        return {"chunk": {"bytes": json.dumps(payload).encode()}}
+
+    def __iter__(self):
+        yield self._event({"messageStart": {"role": "assistant"}})
+        step = self.chars_per_token
+        for i in range(0, len(self.text), step):
+            if self.closed:
+                return
+            time.sleep(self.token_delay)
+            self.tokens_sent += 1
+            yield self._event({"contentBlockDelta": {"delta": {"text": self.text[i:i + step]},
+                                                     "contentBlockIndex": 0}})
+        yield self._event({"contentBlockStop": {"contentBlockIndex": 0}})
+        yield self._event({"messageStop": {"stopReason": "end_turn"}})
+        yield self._event({"metadata": {"usage": dict(self.usage, outputTokens=self.tokens_sent)}})
+
+    def close(self):
+        self.closed = True
+
+
+class StubBedrockClient:
+    """Duck-typed bedrock-runtime client that sleeps instead of generating.
+
+    `latency` is the simulated time per invoke_model call (and time to first
+    token when streaming); `token_rate` is streamed tokens per second; `reply`
+    is either a string or a callable(body_dict) -> str producing the model text.
+    With `simulate_generation`, invoke_model also spends tokens/token_rate
+    seconds generating and truncates the text at the request's maxTokens,
+    like the real model does.
+
+    Prompt caching is emulated: the prompt prefix up to each cachePoint is
+    remembered, and usage reports cacheRead/cacheWriteInputTokenCount like
+    Nova. With `prefill_rate` (input tokens/s), uncached input adds latency
+    before the first token.
+
+    `models` maps a modelId to {"latency", "token_rate"} overrides, and
+    `throttle(modelId) -> bool` makes a call fail with ThrottlingException.
+    With `capacity`, invoke_model calls beyond that many in flight are
+    throttled too, like a Bedrock concurrency quota.
+    """
+
+    def __init__(self, latency: float = 0.5, reply=planning_reply, token_rate: float = 200.0,
+                 simulate_generation: bool = False, prefill_rate: float = 0.0,
+                 models=None, throttle=None, capacity=None):
+        self.latency = latency
+        self.token_rate = token_rate
+        self.models = models or {}
+        self.throttle = throttle
+        self.capacity = capacity
+        self.calls_by_model = {}
+        self.throttled = 0
+        self.simulate_generation = simulate_generation
+        self.prefill_rate = prefill_rate
+        self.reply = reply
+        self._prompt_cache = set()
+        self.streams = []
+        self.calls = 0
+        self.output_tokens = 0   # generated by invoke_model, whether or not anyone waited for it
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def _text(self, body: dict) -> str:
+        return self.reply(body) if callable(self.reply) else self.reply
+
+    def _admit(self, model_id: str, occupy: bool = False) -> tuple:
+        """Count the call, maybe throttle it; returns the model's (latency, token_rate).
+
+        With `occupy`, an admitted call holds a capacity slot until the
+        caller decrements `_in_flight`.
+        """
+        with self._lock:
+            self.calls += 1
+            self.calls_by_model[model_id] = self.calls_by_model.get(model_id, 0) + 1
+            over = self.capacity is not None and occupy and self._in_flight >= self.capacity
+            if occupy and not over:
+                self._in_flight += 1
+                self.max_in_flight = max(self.max_in_flight, self._in_flight)
+        if over or (self.throttle and self.throttle(model_id)):
+            from botocore.exceptions import ClientError
+            with self._lock:
+                self.throttled += 1
+                if occupy and not over:
+                    self._in_flight -= 1
+            raise ClientError({"Error": {"Code": "ThrottlingException", "Message": "Too many requests"}},
+                              "InvokeModel")
+        profile = self.models.get(model_id, {})
+        return profile.get("latency", self.latency), profile.get("token_rate", self.token_rate)
+
+    def _prompt_usage(self, req: dict) -> dict:
+        blocks = list(req.get("system", [])) + [b for m in req.get("messages", []) for b in m["content"]]
+        total = read = written = 0
+        prefix = []
+        with self._lock:
+            for block in blocks:
+                if "cachePoint" in block:
+                    key = "\x00".join(prefix)
+                    if key in self._prompt_cache:
+                        read, written = total, 0
+                    else:
+                        self._prompt_cache.add(key)
+                        written = total - read
+                else:
+                    prefix.append(block.get("text", ""))
+                    total += len(block.get("text", "")) // 4
+        return {"inputTokens": total - read - written, "cacheReadInputTokenCount": read,
+                "cacheWriteInputTokenCount": written}
+
+    def _prefill_delay(self, usage: dict) -> float:
+        if not self.prefill_rate:
+            return 0.0
+        return (usage["inputTokens"] + usage["cacheWriteInputTokenCount"]) / self.prefill_rate
+
+    def invoke_model(self, modelId, body, contentType=None, accept=None):
+        latency, token_rate = self._admit(modelId, occupy=True)
+        try:
+            req = json.loads(body)
+            text = self._text(req)
+            usage = self._prompt_usage(req)
+            stop_reason = "end_turn"
+            delay = latency + self._prefill_delay(usage)
+            if self.simulate_generation:
+                max_chars = req.get("inferenceConfig", {}).get("maxTokens", 2048) * 4
+                if len(text) > max_chars:
+                    text, stop_reason = text[:max_chars], "max_tokens"
+                delay += len(text) / 4 / token_rate
+            time.sleep(delay)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+        with self._lock:
+            self.output_tokens += len(text) // 4
+        result = {
+            "output": {"message": {"role": "assistant", "content": [{"text": text}]}},
+            "stopReason": stop_reason,
+            "usage": dict(usage, outputTokens=len(text) // 4),
+        }
+        return {"body": io.BytesIO(json.dumps(result).encode())}
+
+    def invoke_model_with_response_stream(self, modelId, body, contentType=None, accept=None):
+        latency, token_rate = self._admit(modelId)
+        req = json.loads(body)
+        text = self._text(req)
+        usage = self._prompt_usage(req)
+        if self.simulate_generation:
+            text = text[:req.get("inferenceConfig", {}).get("maxTokens", 2048) * 4]
+        time.sleep(latency + self._prefill_delay(usage))
+        stream = _StubEventStream(text, 1.0 / token_rate, usage=usage)
+        self.streams.append(stream)
+        return {"body": stream}
+
+
+def stub_mediawiki(latency: float = 0.3):
+    """Async httpx.MockTransport handler answering the Wikipedia/Commons queries
+    used by /api/destination-photos after `latency` seconds each."""
+    import asyncio
+    import httpx
+
+    counts = {"requests": 0}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        counts["requests"] += 1
+        await asyncio.sleep(latency)
+        q = request.url.params
+        if q.get("prop") == "pageimages":
+            pages = {"1": {"pageid": 1, "pageimage": "Skyline.jpg",
+                           "thumbnail": {"source": "https://img.example/skyline.jpg"}}}
+        elif q.get("prop") == "images":
+            pages = {"1": {"pageid": 1, "images": [{"title": f"File:Street {i}.jpg"} for i in range(10)]}}
+        else:   # imageinfo — either title batch or Commons search
+            prefix = "cm" if q.get("generator") else "wp"
+            pages = {str(i): {"pageid": i, "title": f"File:{prefix} photo {i}.jpg",
+                              "imageinfo": [{"thumburl": f"https://img.example/{prefix}{i}.jpg"}]}
+                     for i in range(2, 8)}
+        return httpx.Response(200, json={"query": {"pages": pages}})
+
+    handler.counts = counts
+    return handler
+
+
+class _StubTable:
+    def __init__(self, resource, name: str):
+        self._res = resource
+        self.name = name
+
+    def query(self, KeyConditionExpression, Limit=None, ExclusiveStartKey=None,
+              ScanIndexForward=True, ProjectionExpression=None, ExpressionAttributeNames=None):
+        self._res._call()
+        user_id = KeyConditionExpression.get_expression()["values"][1]
+        items = sorted((i for (u, _), i in self._res.items.items() if u == user_id),
+                       key=lambda i: i["id"], reverse=not ScanIndexForward)
+        if ExclusiveStartKey:
+            ids = [i["id"] for i in items]
+            items = items[ids.index(ExclusiveStartKey["id"]) + 1:]
+        page = items[:Limit] if Limit else items
+        if ProjectionExpression:
+            names = [ExpressionAttributeNames.get(n.strip(), n.strip())
+                     for n in ProjectionExpression.split(",")]
+            page = [{n: i[n] for n in names if n in i} for i in page]
+        resp = {"Items": [dict(i) for i in page]}
+        if Limit and len(items) > Limit:
+            resp["LastEvaluatedKey"] = {"userId": user_id, "id": page[-1]["id"]}
+        return resp
+
+    def get_item(self, Key):
+        self._res._call()
+        item = self._res.items.get((Key["userId"], Key["id"]))
+        return {"Item": dict(item)} if item else {}
+
+    def put_item(self, Item):
+        self._res._call()
+        self._res.items[(Item["userId"], Item["id"])] = dict(Item)
+
+    def delete_item(self, Key):
+        self._res._call()
+        self._res.items.pop((Key["userId"], Key["id"]), None)
+
+    def update_item(self, Key, UpdateExpression, ConditionExpression=None,
+                    ExpressionAttributeNames=None, ExpressionAttributeValues=None):
+        """Whole-attribute SET / REMOVE, conditioned on `#a = :v` or attribute_exists(#a)."""
+        self._res._call()
+        names, values = ExpressionAttributeNames or {}, ExpressionAttributeValues or {}
+        with self._res._lock:
+            item = self._res.items.get((Key["userId"], Key["id"]))
+            if ConditionExpression:
+                exists = re.fullmatch(r"attribute_exists\((#\w+)\)", ConditionExpression)
+                if exists:
+                    holds = item is not None and names[exists.group(1)] in item
+                else:
+                    name, value = (p.strip() for p in ConditionExpression.split("="))
+                    holds = item is not None and item.get(names[name]) == values[value]
+                if not holds:
+                    from botocore.exceptions import ClientError
+                    raise ClientError({"Error": {"Code": "ConditionalCheckFailedException",
+                                                 "Message": "The conditional request failed"}}, "UpdateItem")
+            for action, args in re.findall(r"(SET|REMOVE) (.+?)(?= SET | REMOVE |$)", UpdateExpression):
+                for part in args.split(","):
+                    if action == "SET":
+                        name, value = (p.strip() for p in part.split("="))
+                        item[names[name]] = values[value]
+                    else:
+                        item.pop(names[part.strip()], None)
+        return {}
+
+
+class StubDynamoResource:
+    """In-memory stand-in for a boto3 DynamoDB resource (single table, userId/id
+    keys). Every call sleeps `latency`; batch calls leave a random
+    `unprocessed_rate` share of their requests unprocessed, like a throttled table."""
+
+    def __init__(self, latency: float = 0.01, unprocessed_rate: float = 0.0, seed: int = 0):
+        import random
+        self.latency = latency
+        self.unprocessed_rate = unprocessed_rate
+        self.items: dict = {}   # (userId, id) -> item
+        self.calls = {"single": 0, "batch": 0}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _call(self, kind: str = "single") -> None:
+        with self._lock:
+            self.calls[kind] += 1
+        time.sleep(self.latency)
+
+    def _split(self, requests: list):
+        with self._lock:
+            unprocessed = [r for r in requests if self._rng.random() < self.unprocessed_rate]
+        return [r for r in requests if r not in unprocessed], unprocessed
+
+    def Table(self, name: str) -> _StubTable:
+        return _StubTable(self, name)
+
+    def batch_write_item(self, RequestItems):
+        self._call("batch")
+        (table, requests), = RequestItems.items()
+        done, unprocessed = self._split(requests)
+        for r in done:
+            if "PutRequest" in r:
+                item = r["PutRequest"]["Item"]
+                self.items[(item["userId"], item["id"])] = dict(item)
+            else:
+                key = r["DeleteRequest"]["Key"]
+                self.items.pop((key["userId"], key["id"]), None)
+        return {"UnprocessedItems": {table: unprocessed} if unprocessed else {}}
+
+    def batch_get_item(self, RequestItems):
+        self._call("batch")
+        (table, spec), = RequestItems.items()
+        done, unprocessed = self._split(spec["Keys"])
+        found = [dict(self.items[(k["userId"], k["id"])]) for k in done
+                 if (k["userId"], k["id"]) in self.items]
+        return {"Responses": {table: found},
+                "UnprocessedKeys": {table: {"Keys": unprocessed}} if unprocessed else {}}
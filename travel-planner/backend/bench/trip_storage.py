@@ -0,0 +1,76 @@
+"""
+Saved-trip storage benchmark: legacy JSON-string attributes vs the compressed
+binary format, on representative itineraries. Reports stored bytes, the
+DynamoDB capacity units one write / strongly consistent read would consume,
+and encode/decode time.
+
+Usage (from backend/):
+    python bench/trip_storage.py [--days 3,7,14] [--iterations 200]
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from stubs import sample_itinerary
+from trip_codec import decode_trip_fields, encode_trip_fields
+
+TRIP_FORM = {"destination": "Lisbon", "origin": "London", "start_date": "2026-06-01",
+             "end_date": "2026-06-14", "budget": "moderate", "travelers": 2,
+             "interests": ["food", "history"], "special_requirements": ""}
+
+
+def item_size(fields: dict) -> int:
+    """Approximate DynamoDB item size: attribute name + value bytes."""
+    size = 0
+    for name, value in fields.items():
+        size += len(name) + (len(value) if isinstance(value, bytes) else len(value.encode()))
+    return size
+
+
+def timed(fn, iterations: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - t0) / iterations * 1e6
+
+
+def run(days: int, iterations: int) -> dict:
+    # Model output varies per day; make the sample a little less repetitive than the stub's
+    itinerary = sample_itinerary(days)
+    for d in itinerary["daily_itinerary"]:
+        for i, a in enumerate(d["activities"]):
+            a["name"] = f"{a['name']} #{d['day']}.{i}"
+    legacy = {"itinerary_json": json.dumps(itinerary), "tripForm_json": json.dumps(TRIP_FORM)}
+    packed = encode_trip_fields(itinerary, TRIP_FORM)
+    legacy_size, packed_size = item_size(legacy), item_size(packed)
+    return {
+        "days": days,
+        "legacy_bytes": legacy_size,
+        "compressed_bytes": packed_size,
+        "ratio": round(legacy_size / packed_size, 2),
+        "legacy_wcu": math.ceil(legacy_size / 1024), "compressed_wcu": math.ceil(packed_size / 1024),
+        "legacy_rcu": math.ceil(legacy_size / 4096), "compressed_rcu": math.ceil(packed_size / 4096),
+        "legacy_encode_us": round(timed(lambda: (json.dumps(itinerary), json.dumps(TRIP_FORM)), iterations), 1),
+        "compressed_encode_us": round(timed(lambda: encode_trip_fields(itinerary, TRIP_FORM), iterations), 1),
+        "legacy_decode_us": round(timed(lambda: decode_trip_fields(dict(legacy)), iterations), 1),
+        "compressed_decode_us": round(timed(lambda: decode_trip_fields(dict(packed)), iterations), 1),
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--days", default="3,7,14")
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+    for days in (int(d) for d in args.days.split(",")):
+        print(json.dumps(run(days, args.iterations)))
+
+
+if __name__ == "__main__":
+    main_cli()
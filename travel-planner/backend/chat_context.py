@@ -0,0 +1,99 @@
+"""
+Chat context budgeting
+Keeps /api/chat prompts bounded: recent turns are sent verbatim up to a
+token budget, older turns are folded into a short rolling summary, and the
+trip context is compacted into a digest (title, day titles, key places,
+budget) instead of the raw itinerary JSON.
+"""
+
+import json
+import re
+from typing import List, Tuple
+
+CHARS_PER_TOKEN = 4   # rough estimate for English text / JSON
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _clip(text: str, max_chars: int) -> str:
+    text = re.sub(r"\s+", " ", str(text)).strip()
+    return text if len(text) <= max_chars else text[:max_chars - 1].rstrip() + "…"
+
+
+def _fit(lines: List[str], max_tokens: int) -> str:
+    """Join lines, dropping from the end once the budget is spent."""
+    kept, used = [], 0
+    for line in lines:
+        cost = estimate_tokens(line) + 1
+        if used + cost > max_tokens:
+            kept.append("…")
+            break
+        kept.append(line)
+        used += cost
+    return "\n".join(kept)
+
+
+def trip_digest(ctx: dict, max_tokens: int = 400) -> str:
+    """Dense text summary of a trip context (an itinerary or a trip form)."""
+    summary = ctx.get("trip_summary") if isinstance(ctx.get("trip_summary"), dict) else {}
+    days = ctx.get("daily_itinerary") if isinstance(ctx.get("daily_itinerary"), list) else []
+    if not summary and not days:
+        # Unknown shape: compact JSON with long values clipped
+        flat = {k: _clip(v if isinstance(v, str) else json.dumps(v), 120) for k, v in ctx.items()}
+        return _fit([f"{k}: {v}" for k, v in flat.items()], max_tokens)
+
+    head = summary.get("title") or ctx.get("title") or "Trip"
+    dest = summary.get("destination") or ctx.get("destination")
+    lines = [f"{head} — {dest}, {summary.get('duration') or len(days)} days" if dest else head]
+    if summary.get("highlights"):
+        lines.append("Highlights: " + ", ".join(_clip(h, 40) for h in summary["highlights"][:5]))
+    budget = ctx.get("budget_breakdown") or {}
+    if isinstance(budget, dict) and budget.get("grand_total_per_person"):
+        lines.append(f"Budget: {budget['grand_total_per_person']} per person")
+    for d in days:
+        if not isinstance(d, dict):
+            continue
+        places = [a.get("name") for a in d.get("activities") or [] if isinstance(a, dict) and a.get("name")]
+        stay = (d.get("accommodation") or {}).get("name") if isinstance(d.get("accommodation"), dict) else None
+        line = f"Day {d.get('day')}"
+        if d.get("date"):
+            line += f" ({d['date']})"
+        line += f": {_clip(d.get('title', ''), 60)}"
+        if places:
+            line += " — " + ", ".join(_clip(p, 40) for p in places[:4])
+        if stay:
+            line += f"; stay: {_clip(stay, 40)}"
+        lines.append(line)
+    return _fit(lines, max_tokens)
+
+
+def summarize_turns(messages: list, max_tokens: int = 300) -> str:
+    """Extractive rolling summary of older turns: each one's first sentence, newest kept."""
+    lines = []
+    for m in messages:
+        text = m["content"][0]["text"]
+        first = re.split(r"(?<=[.!?])\s", text.strip(), maxsplit=1)[0]
+        lines.append(f"{'User' if m['role'] == 'user' else 'You'}: {_clip(first, 160)}")
+    kept = _fit(list(reversed(lines)), max_tokens).split("\n")
+    return "\n".join(reversed(kept))
+
+
+def build_window(messages: list, history_tokens: int = 1500,
+                 summary_tokens: int = 300) -> Tuple[list, str]:
+    """Split alternating Nova messages into (recent window, summary of the rest).
+
+    The window is the longest suffix that fits `history_tokens`, starts with
+    a user turn, and always includes the latest message.
+    """
+    used, start = 0, len(messages)
+    for i in range(len(messages) - 1, -1, -1):
+        used += estimate_tokens(messages[i]["content"][0]["text"])
+        if used > history_tokens and i < len(messages) - 1:
+            break
+        start = i
+    while start < len(messages) - 1 and messages[start]["role"] != "user":
+        start += 1
+    older = messages[:start]
+    return messages[start:], summarize_turns(older, summary_tokens) if older else ""
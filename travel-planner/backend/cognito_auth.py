@@ -0,0 +1,119 @@
+"""
+Cognito JWKS manager + verified-claims cache
+Keeps ready-to-use signing keys indexed by `kid`, fetched asynchronously at
+startup and refreshed in the background (and on an unknown kid, rate
+limited), so verifying a token is a dict lookup plus one RS256 check — or
+just a cache hit for a token we've already verified.
+"""
+
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import httpx
+from jose import jwk
+
+
+class JWKSManager:
+    def __init__(self, jwks_url: str, refresh_interval: float = 3600, min_refresh_interval: float = 60,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.jwks_url = jwks_url
+        self.transport = transport   # for local stand-ins
+        self.refresh_interval = refresh_interval
+        self.min_refresh_interval = min_refresh_interval   # floor between fetches (unknown-kid storms)
+        self.keys: dict = {}   # kid -> jose Key
+        self.fetches = 0
+        self._last_fetch = 0.0
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    async def refresh(self, force: bool = False) -> bool:
+        """Re-fetch the key set; returns False if skipped by the rate limit."""
+        async with self._lock:
+            now = time.monotonic()
+            if not force and now - self._last_fetch < self.min_refresh_interval:
+                return False
+            self._last_fetch = now
+            try:
+                async with httpx.AsyncClient(timeout=5, transport=self.transport) as client:
+                    resp = await client.get(self.jwks_url)
+                    resp.raise_for_status()
+            except Exception:
+                if not self.keys:
+                    self._last_fetch = 0.0   # nothing cached yet — let the next request retry
+                raise
+            self.keys = {
+                k["kid"]: jwk.construct(k, k.get("alg", "RS256"))
+                for k in resp.json()["keys"]
+            }
+            self.fetches += 1
+            return True
+
+    async def get_key(self, kid: str):
+        """Signing key for `kid`, refreshing once (rate limited) if it's unknown."""
+        key = self.keys.get(kid)
+        if key is None:
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"⚠  JWKS refresh failed: {e}")
+            key = self.keys.get(kid)
+        return key
+
+    async def _refresh_loop(self) -> None:
+        try:
+            await self.refresh(force=True)
+        except Exception as e:
+            print(f"⚠  JWKS initial fetch failed (will retry on demand): {e}")
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh(force=True)
+            except Exception as e:
+                print(f"⚠  JWKS background refresh failed: {e}")
+
+    async def start(self) -> None:
+        """Fetch keys and keep them fresh in the background; doesn't block startup."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+class ClaimsCache:
+    """Verified claims keyed by token hash, kept until the token's `exp`."""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()   # sha256(token) -> (exp, claims)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[dict]:
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.time():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, token: str, claims: dict) -> None:
+        exp = claims.get("exp")
+        if not exp:
+            return
+        self._entries[self._key(token)] = (float(exp), claims)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
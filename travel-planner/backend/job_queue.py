@@ -0,0 +1,379 @@
+"""
+Background job queue
+Submit now, fetch later: a bounded pool of workers takes jobs by priority
+(then age), identical jobs still pending share one run, and results are kept
+for a TTL to be polled or awaited. Backends: in-process memory, or a SQLite
+file that survives restarts and is shared by every worker on the host (a
+job whose worker died is picked up again once its lease runs out). SQLite
+calls run on a single worker thread, never on the event loop.
+"""
+
+import asyncio
+import heapq
+import itertools
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from nova_governor import OverloadedError
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+FINISHED = (DONE, FAILED)
+
+
+@dataclass
+class Job:
+    id: str
+    key: str          # identical work shares a key; used to de-duplicate pending jobs
+    payload: dict
+    priority: int = 1   # higher runs first
+    status: str = QUEUED
+    submitted: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    result: Optional[dict] = None
+    error: Optional[dict] = None
+
+    def view(self) -> dict:
+        """The job as API clients see it."""
+        body = {"job_id": self.id, "status": self.status,
+                "submitted_at": round(self.submitted, 3),
+                "wait_s": round((self.started or time.time()) - self.submitted, 3)}
+        if self.finished:
+            body["run_s"] = round(self.finished - self.started, 3)
+        if self.status == DONE:
+            body["result"] = self.result
+        elif self.status == FAILED:
+            body["error"] = self.error
+        return body
+
+
+class MemoryJobBackend:
+    """Jobs in this process only — lost on restart."""
+
+    def __init__(self):
+        self._jobs: Dict[str, Job] = {}
+        self._heap: list = []   # (-priority, submitted, seq, job id)
+        self._pending: Dict[str, str] = {}   # key -> id of its queued/running job
+        self._seq = itertools.count()
+
+    async def submit(self, job: Job) -> Tuple[Job, bool]:
+        existing = self._pending.get(job.key)
+        if existing:
+            existing = self._jobs[existing]
+            if existing.status == QUEUED and job.priority > existing.priority:
+                existing.priority = job.priority   # the old heap entry is skipped once this one runs
+                self._push(existing)
+            return existing, True
+        self._jobs[job.id] = job
+        self._pending[job.key] = job.id
+        self._push(job)
+        return job, False
+
+    def _push(self, job: Job) -> None:
+        heapq.heappush(self._heap, (-job.priority, job.submitted, next(self._seq), job.id))
+
+    async def pending(self, key: str) -> Optional[Job]:
+        job_id = self._pending.get(key)
+        return self._jobs[job_id] if job_id else None
+
+    async def claim(self, now: float, lease: float) -> Optional[Job]:
+        while self._heap:
+            job = self._jobs.get(heapq.heappop(self._heap)[3])
+            if job is not None and job.status == QUEUED:
+                job.status, job.started = RUNNING, now
+                return job
+        return None
+
+    async def requeue(self, job: Job) -> None:
+        job.status, job.started = QUEUED, None
+        self._push(job)
+
+    async def finish(self, job: Job) -> None:
+        if self._pending.get(job.key) == job.id:
+            del self._pending[job.key]
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    async def purge(self, before: float) -> int:
+        expired = [j.id for j in self._jobs.values() if j.finished and j.finished < before]
+        for job_id in expired:
+            del self._jobs[job_id]
+        return len(expired)
+
+    async def depth(self) -> dict:
+        counts = {QUEUED: 0, RUNNING: 0}
+        for job_id in self._pending.values():
+            counts[self._jobs[job_id].status] += 1
+        return counts
+
+
+class SQLiteJobBackend:
+    """Jobs in a SQLite file: kept across restarts, shared by the host's workers.
+
+    Claims take a lease (longer than the job timeout); a running job whose
+    lease has expired — its worker crashed or restarted — is claimed again.
+    Every call runs on one worker thread so the event loop never waits on
+    the file.
+    """
+
+    _COLUMNS = ("id", "key", "payload", "priority", "status", "submitted", "started", "finished",
+                "result", "error")
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=2)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, key TEXT, payload TEXT, priority INTEGER,"
+            " status TEXT, submitted REAL, started REAL, finished REAL, result TEXT, error TEXT,"
+            " lease_until REAL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, priority DESC, submitted)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_key ON jobs (key, status)")
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="job-queue")
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _job(self, row) -> Optional[Job]:
+        if row is None:
+            return None
+        job = Job(**dict(zip(self._COLUMNS, row)))
+        for name in ("payload", "result", "error"):
+            value = getattr(job, name)
+            setattr(job, name, json.loads(value) if value else None)
+        return job
+
+    def _select(self, where: str, args: tuple, order: str = "") -> Optional[Job]:
+        return self._job(self._db.execute(
+            f"SELECT {', '.join(self._COLUMNS)} FROM jobs WHERE {where} {order} LIMIT 1", args).fetchone())
+
+    def _pending(self, key: str) -> Optional[Job]:
+        return self._select("key = ? AND status IN (?, ?)", (key, QUEUED, RUNNING))
+
+    async def submit(self, job: Job) -> Tuple[Job, bool]:
+        return await self._run(self._submit, job)
+
+    def _submit(self, job: Job) -> Tuple[Job, bool]:
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                existing = self._pending(job.key)
+                if existing is None:
+                    self._db.execute(
+                        "INSERT INTO jobs (id, key, payload, priority, status, submitted) VALUES (?, ?, ?, ?, ?, ?)",
+                        (job.id, job.key, json.dumps(job.payload), job.priority, QUEUED, job.submitted))
+                elif existing.status == QUEUED and job.priority > existing.priority:
+                    existing.priority = job.priority
+                    self._db.execute("UPDATE jobs SET priority = ? WHERE id = ?", (job.priority, existing.id))
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return (existing, True) if existing else (job, False)
+
+    async def pending(self, key: str) -> Optional[Job]:
+        return await self._run(self._locked, self._pending, key)
+
+    async def claim(self, now: float, lease: float) -> Optional[Job]:
+        return await self._run(self._claim, now, lease)
+
+    def _claim(self, now: float, lease: float) -> Optional[Job]:
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                job = self._select("status = ? OR (status = ? AND lease_until < ?)", (QUEUED, RUNNING, now),
+                                   "ORDER BY priority DESC, submitted")
+                if job is not None:
+                    job.status, job.started = RUNNING, now
+                    self._db.execute("UPDATE jobs SET status = ?, started = ?, lease_until = ? WHERE id = ?",
+                                     (RUNNING, now, now + lease, job.id))
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return job
+
+    async def requeue(self, job: Job) -> None:
+        job.status, job.started = QUEUED, None
+        await self._run(self._execute, "UPDATE jobs SET status = ?, started = NULL, lease_until = NULL WHERE id = ?",
+                        (QUEUED, job.id))
+
+    async def finish(self, job: Job) -> None:
+        await self._run(self._execute,
+                        "UPDATE jobs SET status = ?, finished = ?, result = ?, error = ? WHERE id = ?",
+                        (job.status, job.finished, json.dumps(job.result) if job.result is not None else None,
+                         json.dumps(job.error) if job.error is not None else None, job.id))
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return await self._run(self._locked, self._select, "id = ?", (job_id,))
+
+    async def purge(self, before: float) -> int:
+        return (await self._run(self._execute, "DELETE FROM jobs WHERE finished < ?", (before,))).rowcount
+
+    async def depth(self) -> dict:
+        rows = await self._run(self._locked, self._rows, "SELECT status, COUNT(*) FROM jobs WHERE status IN (?, ?)"
+                               " GROUP BY status", (QUEUED, RUNNING))
+        return dict({QUEUED: 0, RUNNING: 0}, **dict(rows))
+
+    def _execute(self, sql: str, args: tuple) -> sqlite3.Cursor:
+        with self._lock:
+            return self._db.execute(sql, args)
+
+    def _rows(self, sql: str, args: tuple) -> list:
+        return self._db.execute(sql, args).fetchall()
+
+    def _locked(self, fn, *args):
+        with self._lock:
+            return fn(*args)
+
+
+class JobQueue:
+    """Bounded worker pool over a job backend.
+
+    `handler(payload)` produces a job's result; an exception fails the job
+    with `error_info(exc)` as its error. `observer`, if set, is told
+    (seconds queued, seconds running, final status) for every job.
+    """
+
+    LEASE_GRACE = 60.0   # a claim outlives the job timeout by this much, so a slow job isn't run twice
+
+    def __init__(self, backend, handler: Callable[[dict], Awaitable[dict]], workers: int = 2,
+                 max_queued: int = 100, result_ttl: float = 3600, job_timeout: float = 300,
+                 poll_interval: float = 0.5,
+                 error_info: Callable[[Exception], dict] = lambda e: {"status": 500, "detail": str(e)},
+                 observer: Optional[Callable[[float, float, str], None]] = None):
+        self.backend = backend
+        self.handler = handler
+        self.workers = workers
+        self.max_queued = max_queued
+        self.result_ttl = result_ttl
+        self.job_timeout = job_timeout
+        self.lease = job_timeout + self.LEASE_GRACE
+        self.poll_interval = poll_interval   # also how soon jobs submitted by other processes are seen
+        self.error_info = error_info
+        self.observer = observer
+        self.counters = {"submitted": 0, "deduplicated": 0, "rejected": 0, "done": 0, "failed": 0}
+        self.depth = {QUEUED: 0, RUNNING: 0}   # as of the last submit or worker poll
+        self.wait_s = 0.0   # EWMA of time spent queued
+        self.run_s = 0.0    # EWMA of run time
+        self._tasks: list = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._finished: Dict[str, asyncio.Event] = {}
+        self._last_purge = 0.0
+
+    def start(self) -> None:
+        """Start the workers on the running loop (no-op if they're running)."""
+        if any(not t.done() for t in self._tasks):
+            return
+        self._wakeup, self._finished = asyncio.Event(), {}
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def pending(self, key: str) -> Optional[Job]:
+        return await self.backend.pending(key)
+
+    async def submit(self, payload: dict, key: str, priority: int = 1) -> Tuple[Job, bool]:
+        """Queue a job, or return the pending one with the same key; (job, deduplicated).
+
+        Joining a queued job at a higher priority raises its priority. Raises
+        OverloadedError once `max_queued` jobs are waiting.
+        """
+        self.start()
+        self.depth = await self.backend.depth()
+        if self.depth[QUEUED] >= self.max_queued and await self.backend.pending(key) is None:
+            self.counters["rejected"] += 1
+            drain = self.depth[QUEUED] / max(1, self.workers) * (self.run_s or 1.0)
+            raise OverloadedError("Itinerary queue is full — try again shortly", retry_after=drain)
+        job, deduplicated = await self.backend.submit(Job(uuid.uuid4().hex, key, payload, priority))
+        self.counters["deduplicated" if deduplicated else "submitted"] += 1
+        if not deduplicated:
+            self.depth[QUEUED] += 1
+            self._wakeup.set()
+        return job, deduplicated
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return await self.backend.get(job_id)
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[Job]:
+        """The job once finished, or as it stands after `timeout` seconds (None if unknown)."""
+        deadline = time.monotonic() + timeout
+        while True:
+            job = await self.backend.get(job_id)
+            left = deadline - time.monotonic()
+            if job is None or job.status in FINISHED:
+                self._release(job_id)   # finished elsewhere, or expired, while no local run popped it
+                return job
+            if left <= 0:
+                return job
+            event = self._finished.setdefault(job_id, asyncio.Event())
+            try:   # re-read at least every poll_interval — another process may run it
+                await asyncio.wait_for(event.wait(), min(left, self.poll_interval))
+            except asyncio.TimeoutError:
+                pass
+
+    def _release(self, job_id: str) -> None:
+        event = self._finished.pop(job_id, None)
+        if event is not None:
+            event.set()
+
+    async def _sweep(self, now: float) -> None:
+        """Drop expired results, and wake-up events for jobs no longer pending
+        (their waiters gave up before the job finished in another process)."""
+        await self.backend.purge(now - self.result_ttl)
+        for job_id in list(self._finished):
+            job = await self.backend.get(job_id)
+            if job is None or job.status in FINISHED:
+                self._release(job_id)
+
+    async def _worker(self) -> None:
+        while True:
+            self._wakeup.clear()
+            now = time.time()
+            if now - self._last_purge > 60:
+                self._last_purge = now
+                await self._sweep(now)
+            job = await self.backend.claim(now, self.lease)
+            self.depth = await self.backend.depth()
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job)
+
+    async def _run(self, job: Job) -> None:
+        try:
+            job.result = await asyncio.wait_for(self.handler(job.payload), self.job_timeout)
+            job.status = DONE
+        except asyncio.CancelledError:
+            await asyncio.shield(self.backend.requeue(job))   # shutting down — leave it for the next worker
+            raise
+        except Exception as e:
+            job.status, job.error = FAILED, self.error_info(e)
+        job.finished = time.time()
+        await self.backend.finish(job)
+        waited, ran = job.started - job.submitted, job.finished - job.started
+        self.counters[job.status] += 1
+        self.wait_s = waited if not self.wait_s else self.wait_s + 0.2 * (waited - self.wait_s)
+        self.run_s = ran if not self.run_s else self.run_s + 0.2 * (ran - self.run_s)
+        if self.observer:
+            self.observer(waited, ran, job.status)
+        self._release(job.id)
+
+    def stats(self) -> dict:
+        return dict(self.counters, **self.depth, workers=self.workers,
+                    wait_ms=round(self.wait_s * 1000, 1), run_ms=round(self.run_s * 1000, 1),
+                    backend=type(self.backend).__name__)
@@ -0,0 +1,88 @@
+"""
+Incremental JSON section parser
+Feeds on Nova's token stream and hands back each top-level section of the
+response object (and each element of selected arrays) as soon as its closing
+brace arrives — no need to wait for the whole document.
+"""
+
+import json
+from typing import Iterable, List, Tuple
+
+
+class JSONSectionParser:
+    """Emit ("section", key, value) for completed top-level values and
+    ("item", key, value) for completed elements of arrays named in `item_keys`.
+
+    Arrays listed in `item_keys` are not re-emitted as a whole section.
+    Text before the root `{` (e.g. a chatty preamble) is ignored.
+    """
+
+    def __init__(self, item_keys: Iterable[str] = ()):
+        self.item_keys = set(item_keys)
+        self.buf = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = -1
+        self._key = None           # last string literal seen directly in the root object
+        self._value_key = None     # key of the top-level value being parsed
+        self._value_start = -1
+        self._item_start = -1
+        self.done = False
+
+    def feed(self, text: str) -> List[Tuple[str, str, object]]:
+        self.buf += text
+        events = []
+        buf = self.buf
+        for i in range(self._pos, len(buf)):
+            if self.done:
+                break
+            ch = buf[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._key = json.loads(buf[self._string_start:i + 1])
+                continue
+
+            if ch == '"':
+                if self._depth >= 1:
+                    self._in_string = True
+                    self._string_start = i
+            elif ch in "{[":
+                if self._depth == 0 and ch != "{":
+                    continue
+                self._depth += 1
+                if self._depth == 2:
+                    self._value_key = self._key
+                    self._value_start = i
+                elif self._depth == 3 and self._value_key in self.item_keys:
+                    self._item_start = i
+            elif ch in "}]" and self._depth > 0:
+                if self._depth == 3 and self._item_start >= 0:
+                    events.append(self._emit("item", self._value_key, self._item_start, i))
+                    self._item_start = -1
+                elif self._depth == 2 and self._value_key not in self.item_keys:
+                    events.append(self._emit("section", self._value_key, self._value_start, i))
+                self._depth -= 1
+                if self._depth == 0:
+                    self.done = True
+        self._pos = len(buf)
+        return [e for e in events if e is not None]
+
+    def _emit(self, kind: str, key, start: int, end: int):
+        try:
+            return (kind, key, json.loads(self.buf[start:end + 1]))
+        except ValueError:
+            return None   # malformed fragment — the final full parse will report it
+
+    def document(self) -> str:
+        """The root JSON object text seen so far."""
+        start = self.buf.find("{")
+        end = self.buf.rfind("}") + 1
+        return self.buf[start:end] if start >= 0 and end > start else ""
@@ -0,0 +1,125 @@
+"""
+Content-addressed cache for Nova responses
+In-memory LRU in front of an optional SQLite file so repeat packing / budget /
+tips prompts skip Bedrock entirely and survive restarts.
+"""
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+
+def _normalize(value):
+    """Collapse whitespace in prompt text so cosmetic differences share a key."""
+    if isinstance(value, str):
+        return " ".join(value.split())
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def make_key(model_id: str, body: dict) -> str:
+    """Hash of model id + system prompt + messages + inference config."""
+    canonical = json.dumps(
+        {"model": model_id, "body": _normalize(body)},
+        sort_keys=True, separators=(",", ":"), ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class ResponseCache:
+    """LRU (max_entries) + optional SQLite tier, both with per-entry expiry.
+
+    The LRU lives on the event loop; SQLite calls run on one worker thread.
+    Expired disk rows are deleted every PURGE_EVERY writes.
+    """
+
+    PURGE_EVERY = 500
+
+    def __init__(self, max_entries: int = 512, db_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self._mem: OrderedDict = OrderedDict()   # key -> (expires_at, value)
+        self._counters: dict = {}
+        self._writes = 0
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS nova_cache "
+                "(key TEXT PRIMARY KEY, expires_at REAL, value TEXT)"
+            )
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="llm-cache")
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _count(self, tag: str, field: str) -> None:
+        c = self._counters.setdefault(tag, {"hits": 0, "disk_hits": 0, "misses": 0})
+        c[field] += 1
+
+    async def get(self, key: str, tag: str = "default") -> Optional[dict]:
+        now = time.time()
+        entry = self._mem.get(key)
+        if entry and entry[0] > now:
+            self._mem.move_to_end(key)
+            self._count(tag, "hits")
+            return entry[1]
+        if entry:
+            del self._mem[key]
+        if self._db is not None:
+            row = await self._run(self._read, key)
+            if row and row[0] > now:
+                value = json.loads(row[1])
+                self._put_mem(key, row[0], value)
+                self._count(tag, "disk_hits")
+                return value
+        self._count(tag, "misses")
+        return None
+
+    def _read(self, key: str) -> Optional[tuple]:
+        return self._db.execute("SELECT expires_at, value FROM nova_cache WHERE key = ?", (key,)).fetchone()
+
+    def _put_mem(self, key: str, expires_at: float, value: dict) -> None:
+        self._mem[key] = (expires_at, value)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_entries:
+            self._mem.popitem(last=False)
+
+    async def set(self, key: str, value: dict, ttl: float) -> None:
+        expires_at = time.time() + ttl
+        self._put_mem(key, expires_at, value)
+        if self._db is not None:
+            self._writes += 1
+            await self._run(self._write, key, expires_at, json.dumps(value),
+                            self._writes % self.PURGE_EVERY == 0)
+
+    def _write(self, key: str, expires_at: float, raw: str, purge: bool) -> None:
+        self._db.execute("INSERT OR REPLACE INTO nova_cache (key, expires_at, value) VALUES (?, ?, ?)",
+                         (key, expires_at, raw))
+        if purge:
+            self._purge(time.time())
+
+    async def purge_expired(self) -> int:
+        """Drop expired rows from the disk tier; returns how many were removed."""
+        if self._db is None:
+            return 0
+        return await self._run(self._purge, time.time())
+
+    def _purge(self, now: float) -> int:
+        return self._db.execute("DELETE FROM nova_cache WHERE expires_at <= ?", (now,)).rowcount
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._mem),
+            "max_entries": self.max_entries,
+            "persistent": self._db is not None,
+            "by_endpoint": {tag: dict(c) for tag, c in self._counters.items()},
+        }
@@ -3,30 +3,65 @@ AI Travel Planner - Backend API
 Uses Amazon Nova (via Amazon Bedrock) for intelligent travel planning
 """
 
-from fastapi import FastAPI, HTTPException, Depends, Header, Request
+from fastapi import FastAPI, HTTPException, Depends, Header, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse, JSONResponse
-from pydantic import BaseModel
+from fastapi.responses import StreamingResponse, JSONResponse, PlainTextResponse
+from pydantic import BaseModel, Field, ValidationError, model_validator
 from typing import Optional, List
-import boto3
+import asyncio
+import base64
+import hashlib
 import json
+import math
 import os
+import re
+import time
 import uuid
-from datetime import datetime
+from collections import Counter
+from contextvars import ContextVar
+from datetime import datetime, timedelta
 from decimal import Decimal
-from functools import lru_cache
+from contextlib import aclosing
 import httpx
-import urllib.request
 from dotenv import load_dotenv
 from jose import jwt, JWTError
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
+from nova_client import AsyncNovaClient, NovaTimeoutError, build_body, output_text, user_turn, token_usage
+from llm_cache import ResponseCache
+from json_stream import JSONSectionParser
+from photo_cache import PhotoCache, normalize_destination
+from cognito_auth import JWKSManager, ClaimsCache
+from trip_codec import encode_trip_fields, decode_trip_fields
+from trip_store import TripStore, UnprocessedItemsError
+from aws_clients import LazyClient, client_factory, resource_factory
+from chat_context import build_window, estimate_tokens, trip_digest
+from model_router import ModelProfile, ModelRouter, Route, is_throttle
+from nova_governor import AdmissionError, CircuitOpenError, NovaGovernor, OverloadedError, error_code
+from rate_limit import CostTooHighError, RateLimiter, backend_from_url
+from telemetry import MetricsMiddleware, Registry, Tracer
+from job_queue import DONE, FINISHED, JobQueue, MemoryJobBackend, SQLiteJobBackend
+from model_output import (
+    Itinerary, DayPlan, PackingList, BudgetEstimate, QuickTips,
+    ModelOutputError, OutputStats, extract_json, broken_sections, validate, is_usable, expand_wire,
+)
+from wire_format import (
+    BUDGET_WIRE, DAY_WIRE, ITINERARY_WIRE, MINIFIED, PACKING_WIRE, expand_day,
+)
 
+_IMPORT_STARTED = time.perf_counter()
 load_dotenv()  # Load .env file before boto3 client is created
 
 # ─── Rate Limiter ─────────────────────────────────────────────────────────────
-limiter = Limiter(key_func=get_remote_address)
+# Token buckets charged in estimated output tokens, one per caller (Cognito
+# sub, else IP) plus an optional global one. RATE_LIMIT_URL picks where they
+# live: empty = this process, sqlite:///path = every worker on the host,
+# redis://host:6379/0 = every host.
+limiter = RateLimiter(
+    backend_from_url(os.getenv("RATE_LIMIT_URL")),
+    user_per_min=float(os.getenv("RATE_LIMIT_USER_TOKENS_PER_MIN", "20000")),
+    user_burst=float(os.getenv("RATE_LIMIT_USER_BURST", "24000")),
+    global_per_min=float(os.getenv("RATE_LIMIT_GLOBAL_TOKENS_PER_MIN", "0")),
+    global_burst=float(os.getenv("RATE_LIMIT_GLOBAL_BURST", "0")),
+)
 
 app = FastAPI(
     title="Trip Chronicles API",
@@ -34,9 +69,6 @@ app = FastAPI(
     version="1.0.0"
 )
 
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000", "http://localhost:5173"],
@@ -45,16 +77,151 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Amazon Bedrock client — explicitly reads credentials from .env
-bedrock_client = boto3.client(
-    service_name="bedrock-runtime",
-    region_name=os.getenv("AWS_DEFAULT_REGION", "us-east-1"),
-    aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-    aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-    aws_session_token=os.getenv("AWS_SESSION_TOKEN"),  # for temporary/SSO creds only
+# ─── Telemetry ────────────────────────────────────────────────────────────────
+# Prometheus metrics on /metrics (per worker — scrape each one), and with
+# TRACE_LOG one JSON log line per tracing span (TRACE_SAMPLE_RATE of requests).
+metrics = Registry()
+tracer = Tracer(enabled=os.getenv("TRACE_LOG", "false").lower() in ("1", "true", "yes"),
+                sample_rate=float(os.getenv("TRACE_SAMPLE_RATE", "1")))
+REQUEST_LATENCY = metrics.histogram(
+    "http_request_duration_seconds", "Request latency by route template", ("method", "route", "status"))
+BEDROCK_LATENCY = metrics.histogram(
+    "bedrock_request_duration_seconds", "Bedrock call latency (to the last token for streams)", ("model",))
+BEDROCK_TTFT = metrics.histogram(
+    "bedrock_time_to_first_token_seconds", "Streaming time to first token, queueing included", ("model",))
+BEDROCK_ERRORS = metrics.counter(
+    "bedrock_errors_total", "Failed Bedrock calls by model and error", ("model", "error"))
+NOVA_ADMISSION_REJECTED = metrics.counter(
+    "nova_admission_rejected_total", "Calls the governor refused locally, never sent to Bedrock",
+    ("model", "reason"))
+OUTBOUND_LATENCY = metrics.histogram(
+    "outbound_request_duration_seconds", "Wikipedia / DynamoDB call latency", ("service", "operation", "outcome"))
+JWT_VERIFY_LATENCY = metrics.histogram(
+    "jwt_verify_duration_seconds", "Cognito token verification on a claims-cache miss", ("result",))
+CHAT_TTFT = metrics.histogram("chat_time_to_first_token_seconds", "/api/chat/stream request to first token sent")
+metrics.counter("chat_streams_total", "Streamed chat replies by outcome", ("outcome",),
+                fn=lambda: {(k, ): chat_stream_stats[k] for k in ("completed", "cancelled", "failed")})
+metrics.counter("chat_tokens_saved_total", "Estimated output tokens not generated for disconnected chat clients",
+                fn=lambda: {(): chat_stream_stats["tokens_saved_est"]})
+JOB_WAIT = metrics.histogram("job_queue_wait_seconds", "Time itinerary jobs spent queued")
+JOB_RUN = metrics.histogram("job_run_duration_seconds", "Itinerary job run time", ("status",))
+metrics.gauge("job_queue_depth", "Itinerary jobs queued / running", ("status",),
+              fn=lambda: {(k, ): v for k, v in itinerary_jobs.depth.items()})
+metrics.counter("bedrock_tokens_total", "Bedrock tokens by model and kind", ("model", "kind"), fn=lambda: {
+    (m, k.removesuffix("_tokens")): v for m, totals in nova.usage.items() for k, v in totals.items() if k != "calls"})
+metrics.counter("bedrock_calls_total", "Completed Bedrock calls by model", ("model",),
+                fn=lambda: {(m, ): totals["calls"] for m, totals in nova.usage.items()})
+metrics.gauge("bedrock_in_flight", "Bedrock calls on the wire", fn=lambda: {(): nova.in_flight})
+metrics.counter("rate_limit_decisions_total", "Rate-limit decisions", ("decision",),
+                fn=lambda: {(d, ): limiter.counters[d] for d in ("admitted", "rejected", "too_large")})
+
+
+def _cache_lookups() -> dict:
+    lookups = {(f"nova_{tag}", result): n
+               for tag, c in response_cache.stats()["by_endpoint"].items() for result, n in c.items()}
+    photo = _photo_cache.stats()
+    lookups.update({("photo", k): photo[k] for k in ("fresh_hits", "stale_hits", "misses")})
+    lookups.update({("jwt_claims", "hits"): claims_cache.hits, ("jwt_claims", "misses"): claims_cache.misses})
+    return lookups
+
+
+metrics.counter("cache_lookups_total", "Cache lookups by cache and result", ("cache", "result"), fn=_cache_lookups)
+metrics.counter("model_output_total", "Structured model output by endpoint and outcome", ("endpoint", "outcome"),
+                fn=lambda: {(kind, o): report[o] for kind, report in output_stats.stats().items()
+                            for o in OutputStats.OUTCOMES})
+metrics.counter("model_output_sections_retried_total", "Output sections regenerated after failing validation",
+                ("endpoint",), fn=lambda: {(kind, ): report["sections_retried"]
+                                           for kind, report in output_stats.stats().items()})
+app.add_middleware(MetricsMiddleware, histogram=REQUEST_LATENCY, tracer=tracer)
+
+
+def observe_nova(model_id: str, elapsed: float, usage: dict) -> None:
+    """Nova client observer: feeds the router's speed estimates and the metrics."""
+    router.observe(model_id, elapsed, usage)
+    BEDROCK_LATENCY.observe(elapsed, model_id)
+    tracer.record("bedrock.invoke", elapsed, model=model_id, **token_usage(usage))
+
+
+def observe_dynamodb(operation: str, elapsed: float, ok: bool) -> None:
+    OUTBOUND_LATENCY.observe(elapsed, "dynamodb", operation, "ok" if ok else "error")
+    tracer.record(f"dynamodb.{operation}", elapsed, ok=ok)
+
+# Max simultaneous Bedrock calls per worker, and default per-call timeout (seconds)
+NOVA_MAX_CONCURRENCY = int(os.getenv("NOVA_MAX_CONCURRENCY", "8"))
+NOVA_TIMEOUT_SECONDS = float(os.getenv("NOVA_TIMEOUT_SECONDS", "90"))
+
+# Amazon Bedrock client — explicitly reads credentials from .env. Built on
+# first use / by the startup warm-up, not at import.
+bedrock_client = LazyClient("bedrock", client_factory(
+    "bedrock-runtime",
+    # One pooled connection per concurrent call (botocore defaults to 10)
+    max_pool_connections=NOVA_MAX_CONCURRENCY, read_timeout=NOVA_TIMEOUT_SECONDS,
+))
+
+# Model routing: every call names a task with a preferred Nova tier and a
+# per-call latency SLO (seconds). The router steps down a tier when the
+# observed speed says a max_tokens-long answer would miss the SLO, and fails
+# over to another model when one is throttled. NOVA_ROUTING=fixed pins each
+# task to its tier.
+NOVA_MODELS = {
+    "micro": os.getenv("NOVA_MODEL_MICRO", "amazon.nova-micro-v1:0"),
+    "lite": os.getenv("NOVA_MODEL_LITE", "amazon.nova-lite-v1:0"),
+    "pro": os.getenv("NOVA_MODEL_PRO", "amazon.nova-pro-v1:0"),
+}
+MODEL_ID = NOVA_MODELS["lite"]  # default for anything not routed
+PRO_MIN_DAYS = int(os.getenv("PRO_MIN_DAYS", "14"))   # itineraries this long are planned on Pro
+_DAY_SLO = float(os.getenv("SLO_ITINERARY_DAY", "25"))
+router = ModelRouter(
+    profiles={   # priors until real calls have been observed
+        "micro": ModelProfile(NOVA_MODELS["micro"], overhead_s=0.3, output_tps=210),
+        "lite": ModelProfile(NOVA_MODELS["lite"], overhead_s=0.4, output_tps=150),
+        "pro": ModelProfile(NOVA_MODELS["pro"], overhead_s=0.7, output_tps=90),
+    },
+    routes={
+        "tips": Route("micro", float(os.getenv("SLO_TIPS", "6"))),
+        "packing": Route("lite", float(os.getenv("SLO_PACKING", "20"))),
+        "budget": Route("lite", float(os.getenv("SLO_BUDGET", "15"))),
+        "chat": Route("lite", float(os.getenv("SLO_CHAT", "10"))),
+        "itinerary": Route("lite", float(os.getenv("SLO_ITINERARY", "60")), min_tier="lite"),
+        "itinerary_outline": Route("lite", _DAY_SLO, min_tier="lite"),
+        "itinerary_day": Route("lite", _DAY_SLO, min_tier="lite"),
+        "itinerary_extras": Route("lite", _DAY_SLO, min_tier="lite"),
+    },
+    default_route=Route("lite", 30.0),
+    adaptive=os.getenv("NOVA_ROUTING", "adaptive").lower() != "fixed",
+    throttle_cooldown=float(os.getenv("NOVA_THROTTLE_COOLDOWN", "15")),
+)
+
+# Bedrock call governor: per-model adaptive (AIMD) concurrency window under
+# NOVA_MAX_CONCURRENCY, jittered retries of throttling/timeouts, a circuit
+# breaker, and 429 + Retry-After when a call can't start within its deadline
+governor = NovaGovernor(
+    max_limit=NOVA_MAX_CONCURRENCY,
+    max_retries=int(os.getenv("NOVA_MAX_RETRIES", "2")),
+    backoff_base=float(os.getenv("NOVA_BACKOFF_BASE", "0.2")),
+    backoff_cap=float(os.getenv("NOVA_BACKOFF_CAP", "4")),
+    breaker_threshold=int(os.getenv("NOVA_BREAKER_THRESHOLD", "5")),
+    breaker_cooldown=float(os.getenv("NOVA_BREAKER_COOLDOWN", "20")),
+    max_queue_wait=float(os.getenv("NOVA_MAX_QUEUE_WAIT", "10")),
+) if os.getenv("NOVA_GOVERNOR", "true").lower() in ("1", "true", "yes") else None
+
+# Response cache for the repeatable endpoints (packing / budget / tips).
+# NOVA_CACHE_DB enables the on-disk tier; TTLs are seconds, 0 disables caching.
+CACHE_TTLS = {
+    "packing": float(os.getenv("CACHE_TTL_PACKING", "86400")),
+    "budget": float(os.getenv("CACHE_TTL_BUDGET", "21600")),
+    "tips": float(os.getenv("CACHE_TTL_TIPS", "86400")),
+}
+response_cache = ResponseCache(
+    max_entries=int(os.getenv("NOVA_CACHE_MAX_ENTRIES", "512")),
+    db_path=os.getenv("NOVA_CACHE_DB") or None,
 )
 
-MODEL_ID = "amazon.nova-lite-v1:0"  # Cost-effective; swap to amazon.nova-pro-v1:0 for richer output
+# Shared async Nova client — every endpoint goes through this so blocking
+# invoke_model calls never run on the event loop
+nova = AsyncNovaClient(bedrock_client, MODEL_ID,
+                       max_concurrency=NOVA_MAX_CONCURRENCY, timeout=NOVA_TIMEOUT_SECONDS,
+                       cache=response_cache, observer=observe_nova, governor=governor)
 
 
 # ─── AWS Cognito JWT Verification ─────────────────────────────────────────────
@@ -68,32 +235,34 @@ COGNITO_ISSUER = f"https://cognito-idp.{COGNITO_REGION}.amazonaws.com/{COGNITO_U
 # ─── DynamoDB for Persistent Saved Trips ──────────────────────────────────────
 
 DYNAMODB_TABLE = os.getenv("DYNAMODB_TABLE", "tripchronicles-trips")
-dynamodb_resource = boto3.resource(
-    "dynamodb",
-    region_name=os.getenv("AWS_DEFAULT_REGION", "us-east-1"),
-    aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-    aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-    aws_session_token=os.getenv("AWS_SESSION_TOKEN"),
+# Point at DynamoDB Local (e.g. http://localhost:8001) for offline development/tests
+DYNAMODB_ENDPOINT_URL = os.getenv("DYNAMODB_ENDPOINT_URL") or None
+dynamodb_resource = LazyClient("dynamodb", resource_factory(
+    "dynamodb", DYNAMODB_ENDPOINT_URL, max_pool_connections=16,
+))
+# Shared async store — all saved-trip handlers go through this
+trip_store = TripStore(dynamodb_resource, DYNAMODB_TABLE, observer=observe_dynamodb)
+
+
+# Signing keys are fetched at startup and refreshed in the background / on an
+# unknown kid; verified claims are reused until the token expires.
+jwks_manager = JWKSManager(
+    f"{COGNITO_ISSUER}/.well-known/jwks.json",
+    refresh_interval=float(os.getenv("JWKS_REFRESH_SECONDS", "3600")),
+    min_refresh_interval=float(os.getenv("JWKS_MIN_REFRESH_SECONDS", "60")),
 )
+claims_cache = ClaimsCache()
 
 
-@lru_cache()
-def _fetch_jwks() -> tuple:
-    """Fetch and cache Cognito JWKS (JSON Web Key Set)."""
-    url = f"{COGNITO_ISSUER}/.well-known/jwks.json"
-    with urllib.request.urlopen(url) as resp:
-        keys = json.loads(resp.read())["keys"]
-    return tuple(json.dumps(k) for k in keys)   # tuple for hashability
-
-
-def verify_cognito_token(token: str) -> dict:
+async def verify_cognito_token(token: str) -> dict:
     """Verify a Cognito JWT and return user claims."""
+    claims = claims_cache.get(token)
+    if claims is not None:
+        return claims
+    started, result = time.perf_counter(), "rejected"
     try:
-        jwks_raw = _fetch_jwks()
-        jwks = [json.loads(k) for k in jwks_raw]
         headers = jwt.get_unverified_headers(token)
-        kid = headers.get("kid")
-        key = next((k for k in jwks if k["kid"] == kid), None)
+        key = await jwks_manager.get_key(headers.get("kid"))
         if not key:
             raise HTTPException(status_code=401, detail="Unknown signing key")
         claims = jwt.decode(
@@ -101,9 +270,15 @@ def verify_cognito_token(token: str) -> dict:
             audience=COGNITO_APP_CLIENT_ID,
             issuer=COGNITO_ISSUER,
         )
-        return claims
+        result = "verified"
     except JWTError as e:
         raise HTTPException(status_code=401, detail=f"Token verification failed: {e}")
+    finally:
+        elapsed = time.perf_counter() - started
+        JWT_VERIFY_LATENCY.observe(elapsed, result)
+        tracer.record("jwt.verify", elapsed, result=result)
+    claims_cache.set(token, claims)
+    return claims
 
 
 async def get_current_user(authorization: str = Header(..., alias="Authorization")):
@@ -112,7 +287,7 @@ async def get_current_user(authorization: str = Header(..., alias="Authorization
         raise HTTPException(status_code=503, detail="Auth not configured on server")
     if not authorization.startswith("Bearer "):
         raise HTTPException(status_code=401, detail="Invalid authorization header")
-    return verify_cognito_token(authorization[7:])
+    return await verify_cognito_token(authorization[7:])
 
 
 async def get_optional_user(authorization: Optional[str] = Header(None, alias="Authorization")):
@@ -120,13 +295,59 @@ async def get_optional_user(authorization: Optional[str] = Header(None, alias="A
     if not COGNITO_USER_POOL_ID or not authorization or not authorization.startswith("Bearer "):
         return None
     try:
-        return verify_cognito_token(authorization[7:])
+        return await verify_cognito_token(authorization[7:])
     except Exception:
         return None
 
 
+# Estimated output tokens per request — what the rate-limit buckets are charged
+REQUEST_COSTS = {"tips": 300, "chat": 500, "budget": 900, "packing": 1200, "day": 700}
+
+
+def itinerary_cost(duration: int) -> int:
+    return 600 + 700 * duration   # summary / practical info + roughly 700 tokens a day
+
+
+async def rate_key(request: Request) -> str:
+    """Rate-limit identity: the Cognito user when signed in, else the client IP."""
+    user = await get_optional_user(request.headers.get("Authorization"))
+    if user:
+        return f"user:{user['sub']}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+async def admit(request: Request, cost: int) -> None:
+    """Charge `cost` to the caller's bucket; 429 with Retry-After if it can't pay yet,
+    413 if it costs more than the bucket holds."""
+    try:
+        wait = await limiter.admit(await rate_key(request), cost)
+    except CostTooHighError as e:
+        raise HTTPException(status_code=413, detail=f"{e} — split it into smaller requests")
+    if wait:
+        raise HTTPException(status_code=429, detail="Rate limit exceeded — try again shortly",
+                            headers={"Retry-After": str(math.ceil(wait))})
+
+
 # ─── Request / Response Models ────────────────────────────────────────────────
 
+# Longest trip that can be planned (or packed for) in one request — bounds the
+# fan-out to MAX_TRIP_DAYS day calls
+MAX_TRIP_DAYS = int(os.getenv("MAX_TRIP_DAYS", "30"))
+
+
+def check_trip_dates(start_date: str, end_date: str) -> None:
+    """Raise ValueError (a 422 from request validation) for unusable trip dates."""
+    try:
+        start, end = datetime.fromisoformat(start_date), datetime.fromisoformat(end_date)
+    except ValueError:
+        raise ValueError("start_date and end_date must be ISO dates, e.g. 2025-06-01")
+    days = (end - start).days + 1
+    if days < 1:
+        raise ValueError("end_date must not be before start_date")
+    if days > MAX_TRIP_DAYS:
+        raise ValueError(f"Trips can be at most {MAX_TRIP_DAYS} days")
+
+
 class TripRequest(BaseModel):
     destination: str
     origin: str
@@ -136,12 +357,22 @@ class TripRequest(BaseModel):
     travelers: int = 1
     interests: List[str] = []   # e.g. ["food", "history", "adventure"]
     special_requirements: Optional[str] = None
+    planning_mode: str = "auto"  # "single", "fanout", or "auto" (fan-out for long trips)
+    quality: str = "standard"    # "standard", or "high" to plan on Nova Pro
+
+    @model_validator(mode="after")
+    def _dates(self):
+        check_trip_dates(self.start_date, self.end_date)
+        return self
 
 
 class DayPlanRequest(BaseModel):
     destination: str
-    date: str
-    preferences: Optional[str] = None
+    date: str                            # the day to replan, unless `days` lists several
+    preferences: Optional[str] = None    # what to change, e.g. "more outdoors, fewer museums"
+    days: List[int] = []                 # day numbers to replan instead of `date`
+    itinerary: Optional[dict] = None     # the itinerary to patch (saved trips are read from DynamoDB)
+    trip_form: Optional[dict] = None     # the TripRequest it was planned from
 
 
 class PackingRequest(BaseModel):
@@ -150,6 +381,11 @@ class PackingRequest(BaseModel):
     end_date: str
     activities: List[str] = []
 
+    @model_validator(mode="after")
+    def _dates(self):
+        check_trip_dates(self.start_date, self.end_date)
+        return self
+
 
 class BudgetRequest(BaseModel):
     destination: str
@@ -170,58 +406,234 @@ class ChatRequest(BaseModel):
 
 # ─── Helper: Call Amazon Nova ─────────────────────────────────────────────────
 
-def call_nova(system_prompt: str, user_message: str, max_tokens: int = 2048) -> str:
-    """Invoke Amazon Nova Lite via Bedrock and return the text response."""
-    body = {
-        "messages": [
-            {"role": "user", "content": [{"text": user_message}]}
-        ],
-        "system": [{"text": system_prompt}],
-        "inferenceConfig": {
-            "maxTokens": max_tokens,
-            "temperature": 0.7,
-            "topP": 0.9,
-        }
-    }
+# Bedrock prompt caching: cache points after the static system prompt / schema
+# (and after shared leading parts of multi-part user messages)
+PROMPT_CACHE = os.getenv("NOVA_PROMPT_CACHE", "true").lower() in ("1", "true", "yes")
 
-    response = bedrock_client.invoke_model(
-        modelId=MODEL_ID,
-        body=json.dumps(body),
-        contentType="application/json",
-        accept="application/json"
-    )
 
-    result = json.loads(response["body"].read())
-    return result["output"]["message"]["content"][0]["text"]
-
-
-def call_nova_stream(system_prompt: str, user_message: str, max_tokens: int = 2048):
-    """Stream response from Amazon Nova via Bedrock."""
-    body = {
-        "messages": [
-            {"role": "user", "content": [{"text": user_message}]}
-        ],
-        "system": [{"text": system_prompt}],
-        "inferenceConfig": {
-            "maxTokens": max_tokens,
-            "temperature": 0.7,
-            "topP": 0.9,
-        }
-    }
+def message_parts(user_message) -> list:
+    return [user_message] if isinstance(user_message, str) else list(user_message)
 
-    response = bedrock_client.invoke_model_with_response_stream(
-        modelId=MODEL_ID,
-        body=json.dumps(body),
-        contentType="application/json",
-        accept="application/json"
-    )
 
-    for event in response["body"]:
-        chunk = json.loads(event["chunk"]["bytes"])
-        if chunk.get("type") == "content_block_delta":
-            delta = chunk.get("delta", {})
-            if delta.get("type") == "text_delta":
-                yield delta.get("text", "")
+# Models that answered the current request — reported as "model_used"
+_models_used: ContextVar[Optional[list]] = ContextVar("models_used", default=None)
+
+
+def track_models() -> list:
+    """Start collecting the models used by this request (and tasks it spawns)."""
+    used: list = []
+    _models_used.set(used)
+    return used
+
+
+def model_used(used: list) -> str:
+    return Counter(used).most_common(1)[0][0] if used else MODEL_ID
+
+
+def _note_model(model_id: str) -> None:
+    used = _models_used.get()
+    if used is not None:
+        used.append(model_id)
+
+
+def _prompt_tokens(system_prompt, user_message) -> int:
+    return sum(estimate_tokens(p) for p in [*message_parts(system_prompt), *message_parts(user_message)])
+
+
+def _note_rejected(model_id: str, e: AdmissionError) -> None:
+    # Our own admission control said no: not a Bedrock error, and failing over
+    # would only push the load onto another (pricier) model
+    NOVA_ADMISSION_REJECTED.inc(model_id, "circuit_open" if isinstance(e, CircuitOpenError) else "queue_full")
+
+
+async def _routed(task: str, input_tokens: int, max_tokens: int, tier: Optional[str], call):
+    """Run `call(model_id)` on the router's first choice, failing over while throttled."""
+    models = router.candidates(task, input_tokens, max_tokens, tier)
+    for i, model_id in enumerate(models):
+        try:
+            with tracer.span("nova.call", task=task, model=model_id):
+                result = await call(model_id)
+        except AdmissionError as e:
+            _note_rejected(model_id, e)
+            raise
+        except Exception as e:
+            BEDROCK_ERRORS.inc(model_id, error_code(e) or type(e).__name__)
+            if not is_throttle(e):
+                raise
+            router.throttled(model_id)
+            if i == len(models) - 1:
+                raise
+            continue
+        _note_model(model_id)
+        return result
+
+
+async def call_nova(system_prompt: str, user_message, max_tokens: int = 2048,
+                    timeout: Optional[float] = None, cache_as: Optional[str] = None,
+                    output_model=None, task: str = "default", tier: Optional[str] = None) -> str:
+    """Invoke Amazon Nova via Bedrock (off the event loop) and return the text response.
+
+    The model is picked by `router` for `task` (see the routes above);
+    `tier` overrides the task's preferred tier, e.g. "pro" for long trips.
+
+    Keep `system_prompt` static and put the request's variable fields in
+    `user_message` (a string, or parts ordered most-shared first) so the
+    prompt-cache prefix is reused across requests.
+
+    `cache_as` names a CACHE_TTLS entry; identical prompts are then served
+    from the response cache until that TTL expires, and identical prompts
+    arriving while one is still generating share that single Bedrock call.
+    With `output_model`, only responses that already validate are cached.
+    """
+    return await _routed(task, _prompt_tokens(system_prompt, user_message), max_tokens, tier,
+                         lambda model_id: nova.generate(
+        system_prompt, user_message, max_tokens=max_tokens, timeout=timeout,
+        cache_ttl=CACHE_TTLS.get(cache_as) if cache_as else None,
+        cache_tag=cache_as or "default", coalesce=cache_as is not None,
+        cache_if=(lambda text: is_usable(output_model, text)) if output_model else None,
+        prompt_cache=PROMPT_CACHE, model_id=model_id,
+    ))
+
+
+async def call_nova_stream(system_prompt: str, user_message, max_tokens: int = 2048,
+                           task: str = "default", tier: Optional[str] = None):
+    """Stream text deltas from Amazon Nova via Bedrock as they are generated."""
+    body = build_body([user_turn(user_message, cache=PROMPT_CACHE)],
+                      system_prompt, max_tokens=max_tokens, cache_system=PROMPT_CACHE)
+    async with aclosing(stream_body(task, body, _prompt_tokens(system_prompt, user_message),
+                                    max_tokens, tier)) as stream:
+        async for text in stream:
+            yield text
+
+
+async def stream_body(task: str, body: dict, prompt_tokens: int, max_tokens: int,
+                      tier: Optional[str] = None):
+    """Stream text deltas for a prebuilt request body on the models routed for `task`.
+
+    Fails over to the next routed model only if throttled before the first delta.
+    """
+    models = router.candidates(task, prompt_tokens, max_tokens, tier)
+    for i, model_id in enumerate(models):
+        started, t0 = False, time.perf_counter()
+        try:
+            async with aclosing(nova.stream(body, model_id=model_id)) as stream:
+                async for text in stream:
+                    if not started:
+                        started = True
+                        _note_model(model_id)
+                        BEDROCK_TTFT.observe(time.perf_counter() - t0, model_id)
+                        tracer.record("bedrock.first_token", time.perf_counter() - t0, model=model_id)
+                    yield text
+            return
+        except AdmissionError as e:
+            _note_rejected(model_id, e)
+            raise
+        except Exception as e:
+            BEDROCK_ERRORS.inc(model_id, error_code(e) or type(e).__name__)
+            if started or not is_throttle(e):
+                raise
+            router.throttled(model_id)
+            if i == len(models) - 1:
+                raise
+
+
+def overloaded(e: OverloadedError) -> HTTPException:
+    """429 with a Retry-After hint for a call the governor couldn't place."""
+    return HTTPException(status_code=429, detail=str(e),
+                         headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))})
+
+
+def sse_event(event: str, data) -> str:
+    """Format one Server-Sent Event frame."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+# ─── Helper: Structured Output (repair, validation, partial retry) ───────────
+# Responses are parsed tolerantly and validated against the model_output
+# models. Sections that are still missing or invalid are re-requested on
+# their own instead of regenerating the whole response.
+
+SECTION_RETRY_TOKENS = int(os.getenv("SECTION_RETRY_TOKENS", "1500"))
+output_stats = OutputStats()
+
+
+async def _retry_section(system_prompt: str, user_message, instruction: str) -> dict:
+    # The original prompt stays a cacheable prefix shared by every retry of it
+    text = await call_nova(system_prompt, [*message_parts(user_message), instruction],
+                           max_tokens=SECTION_RETRY_TOKENS)
+    return extract_json(text)[0]
+
+
+async def _complete_days(data: dict, start_date: str, duration: int,
+                         system_prompt: str, user_message) -> int:
+    """Re-request any day of `daily_itinerary` that is missing or invalid; returns retries made."""
+    good = {}
+    for d in data.get("daily_itinerary") or []:
+        try:
+            day = DayPlan.model_validate(d)
+        except ValidationError:
+            continue
+        good.setdefault(day.day, d)
+    start = datetime.fromisoformat(start_date)
+    missing = [n for n in range(1, duration + 1) if n not in good]
+
+    async def retry_day(n: int) -> None:
+        date = (start + timedelta(days=n - 1)).date().isoformat()
+        try:
+            day = await _retry_section(system_prompt, user_message,
+                f"Return ONLY the daily_itinerary entry for day {n} ({date}) as a single JSON "
+                f"object with the same structure.")
+            day = expand_day((day.get("daily_itinerary") or [day])[0])
+            day["day"], day["date"] = n, date
+            DayPlan.model_validate(day)
+            good[n] = day
+        except (ValueError, ValidationError):
+            pass
+
+    await asyncio.gather(*(retry_day(n) for n in missing))
+    data["daily_itinerary"] = [good[n] for n in sorted(good)]
+    return len(missing)
+
+
+async def complete_output(kind: str, model, text: str, system_prompt: str, user_message,
+                          fill_days: Optional[tuple] = None) -> dict:
+    """Parse/repair `text`, re-request broken sections, and return the validated object.
+
+    `fill_days` = (start_date, duration) checks daily_itinerary day by day.
+    Raises ModelOutputError if the result still doesn't validate.
+    """
+    try:
+        data, repaired = extract_json(text)
+    except ModelOutputError:
+        output_stats.record(kind, "failed")
+        raise
+    data = expand_wire(model, data)
+    retried = 0
+    if fill_days:
+        retried += await _complete_days(data, *fill_days, system_prompt, user_message)
+    bad = [key for key in broken_sections(model, data) if not (fill_days and key == "daily_itinerary")]
+    if bad:
+        retried += len(bad)
+        fixes = await asyncio.gather(*(
+            _retry_section(system_prompt, user_message,
+                           f'Return ONLY the "{key}" part of that JSON, as {{"{key}": ...}}, '
+                           f'with the same structure.')
+            for key in bad
+        ), return_exceptions=True)
+        for key, fix in zip(bad, fixes):
+            if isinstance(fix, dict):
+                data[key] = fix.get(key, fix)
+        data = expand_wire(model, data)
+    try:
+        result = validate(model, data)
+    except ValidationError as e:
+        output_stats.record(kind, "failed", retried)
+        raise ModelOutputError(f"AI response is missing {', '.join(broken_sections(model, data))}") from e
+    output_stats.record(kind, "section_retry" if retried else "repaired" if repaired else "clean", retried)
+    return result
 
 
 # ─── Endpoints ────────────────────────────────────────────────────────────────
@@ -233,168 +645,276 @@ def root():
 
 @app.get("/health")
 def health():
-    return {"status": "healthy", "model": MODEL_ID, "timestamp": datetime.utcnow().isoformat()}
+    """Liveness — answers as long as the event loop is running; touches no dependency."""
+    return {"status": "healthy", "model": MODEL_ID, "timestamp": datetime.utcnow().isoformat(),
+            "cache": response_cache.stats(), "photo_cache": _photo_cache.stats(),
+            "coalescing": nova.coalescing, "model_output": output_stats.stats(),
+            "chat_context": chat_context_stats, "chat_stream": chat_stream_stats,
+            "token_usage": nova.usage, "routing": router.stats(),
+            "governor": nova.governor.stats() if nova.governor else None,
+            "rate_limit": limiter.stats(), "jobs": itinerary_jobs.stats()}
+
+
+@app.get("/metrics")
+def prometheus_metrics():
+    """Prometheus scrape endpoint — this worker's latency histograms, token and cache counters."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/ready")
+def ready():
+    """Readiness — per-dependency state; 503 until every configured dependency is usable."""
+    deps = {"bedrock": bedrock_client.status()}
+    if COGNITO_USER_POOL_ID:
+        deps["dynamodb"] = dict(dynamodb_resource.status(), table=trip_store.table_state)
+        deps["jwks"] = {"state": "ready" if jwks_manager.keys else "pending",
+                        "keys": len(jwks_manager.keys), "fetches": jwks_manager.fetches}
+        ok = (deps["bedrock"]["state"] == LazyClient.READY
+              and deps["dynamodb"]["table"] == "active" and jwks_manager.keys)
+    else:
+        deps["dynamodb"] = deps["jwks"] = {"state": "disabled"}
+        ok = deps["bedrock"]["state"] == LazyClient.READY
+    body = {"status": "ready" if ok else "starting", "dependencies": deps,
+            "uptime_s": round(time.perf_counter() - _IMPORT_STARTED, 1)}
+    return JSONResponse(body, status_code=200 if ok else 503)
 
 
 # ─── Destination Photos (Wikipedia + Wikimedia Commons) ─────────────────────
-_photo_cache: dict = {}
+# Bounded, optionally disk-backed (shared across workers) photo cache. Empty or
+# deadline-truncated results use the short negative TTL; expired entries are
+# served stale for up to PHOTO_CACHE_STALE_TTL while a background refresh runs,
+# and a refresh that fails keeps them (retried after the negative TTL).
+PHOTO_CACHE_TTL = float(os.getenv("PHOTO_CACHE_TTL", str(7 * 86400)))
+PHOTO_CACHE_NEGATIVE_TTL = float(os.getenv("PHOTO_CACHE_NEGATIVE_TTL", "600"))
+_photo_cache = PhotoCache(
+    max_entries=int(os.getenv("PHOTO_CACHE_MAX_ENTRIES", "2000")),
+    max_bytes=int(os.getenv("PHOTO_CACHE_MAX_BYTES", "5000000")),
+    stale_ttl=float(os.getenv("PHOTO_CACHE_STALE_TTL", str(30 * 86400))),
+    db_path=os.getenv("PHOTO_CACHE_DB") or None,
+)
+_photo_refreshes: dict = {}   # cache key -> background refresh task
 _WIKI_UA = "TripChronicles/1.0 (https://github.com/Sumit231292/AWS_NOVA)"
+_WIKI_API = "https://en.wikipedia.org/w/api.php"
+_COMMONS_API = "https://commons.wikimedia.org/w/api.php"
 _SKIP = {"logo", "flag", "coat", "arms", "emblem", "icon", "symbol", "map", "seal",
          "diagram", "signature", "medal", "badge", "chart", "commons-logo", "location",
          "locator", "wikidata", "edit-clear", "ambox", "question_book", "padlock"}
 
-@app.get("/api/destination-photos")
-async def get_destination_photos(destination: str):
-    """Fetch real destination photos from Wikipedia / Wikimedia Commons — no API key needed."""
-    cache_key = destination.strip().lower()
-    if cache_key in _photo_cache:
-        return {"photos": _photo_cache[cache_key]}
+# Overall budget for a cold photo lookup; whatever has arrived by then is returned
+PHOTO_DEADLINE_SECONDS = float(os.getenv("PHOTO_DEADLINE_SECONDS", "6"))
 
-    photos: list = []
-    headers = {"User-Agent": _WIKI_UA}
+# Process-wide pooled client (HTTP/2 + keep-alive), opened at startup
+_wiki_client: Optional[httpx.AsyncClient] = None
 
-    async with httpx.AsyncClient(timeout=12, follow_redirects=True) as client:
-        # 1) Wikipedia main page image (hero shot)
-        try:
-            resp = await client.get(
-                "https://en.wikipedia.org/w/api.php",
-                params={"action": "query", "titles": destination, "prop": "pageimages",
-                        "pithumbsize": 900, "format": "json"},
-                headers=headers,
-            )
-            if resp.status_code == 200:
-                pages = resp.json().get("query", {}).get("pages", {})
-                for pg in pages.values():
-                    thumb = pg.get("thumbnail", {}).get("source")
-                    title = pg.get("pageimage", destination)
-                    if thumb:
-                        photos.append({"id": "wiki_hero", "src": thumb,
-                                       "alt": title.replace("_", " ").rsplit(".", 1)[0]})
-                        break
-        except Exception:
-            pass
 
-        # 2) Wikipedia page images — get real jpg photos from the article
-        try:
-            resp = await client.get(
-                "https://en.wikipedia.org/w/api.php",
-                params={"action": "query", "titles": destination, "prop": "images",
-                        "imlimit": 20, "format": "json"},
-                headers=headers,
-            )
-            if resp.status_code == 200:
-                pages = resp.json().get("query", {}).get("pages", {})
-                img_titles = []
-                for pg in pages.values():
-                    for img in pg.get("images", []):
-                        t = img["title"]
-                        tl = t.lower()
-                        if not tl.endswith((".jpg", ".jpeg")):
-                            continue
-                        if any(s in tl for s in _SKIP):
-                            continue
-                        img_titles.append(t)
-                # Resolve image titles to actual URLs (batch)
-                if img_titles:
-                    resp2 = await client.get(
-                        "https://en.wikipedia.org/w/api.php",
-                        params={"action": "query", "titles": "|".join(img_titles[:8]),
-                                "prop": "imageinfo", "iiprop": "url",
-                                "iiurlwidth": 900, "format": "json"},
-                        headers=headers,
-                    )
-                    if resp2.status_code == 200:
-                        img_pages = resp2.json().get("query", {}).get("pages", {})
-                        for ip in img_pages.values():
-                            if len(photos) >= 6:
-                                break
-                            ii = ip.get("imageinfo", [{}])[0]
-                            url = ii.get("thumburl") or ii.get("url", "")
-                            if not url:
-                                continue
-                            alt = (ip.get("title", "")
-                                   .replace("File:", "").replace("_", " ")
-                                   .rsplit(".", 1)[0][:80])
-                            if not any(p["src"] == url for p in photos):
-                                photos.append({"id": f"wp_{ip.get('pageid','')}", "src": url, "alt": alt})
-        except Exception:
-            pass
+def get_wiki_client() -> httpx.AsyncClient:
+    global _wiki_client
+    if _wiki_client is None or _wiki_client.is_closed:
+        _wiki_client = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(PHOTO_DEADLINE_SECONDS, connect=3),
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=60),
+            headers={"User-Agent": _WIKI_UA},
+            follow_redirects=True,
+        )
+    return _wiki_client
+
+
+def _file_alt(title: str) -> str:
+    return title.replace("File:", "").replace("_", " ").rsplit(".", 1)[0][:80]
+
+
+async def _wiki_hero_photo(client: httpx.AsyncClient, destination: str) -> list:
+    """Wikipedia main page image (hero shot)."""
+    resp = await client.get(_WIKI_API, params={
+        "action": "query", "titles": destination, "prop": "pageimages",
+        "pithumbsize": 900, "format": "json"})
+    if resp.status_code != 200:
+        return []
+    for pg in resp.json().get("query", {}).get("pages", {}).values():
+        thumb = pg.get("thumbnail", {}).get("source")
+        title = pg.get("pageimage", destination)
+        if thumb:
+            return [{"id": "wiki_hero", "src": thumb,
+                     "alt": title.replace("_", " ").rsplit(".", 1)[0]}]
+    return []
+
+
+async def _wiki_article_photos(client: httpx.AsyncClient, destination: str) -> list:
+    """Real jpg photos from the Wikipedia article (image list → imageinfo URLs)."""
+    resp = await client.get(_WIKI_API, params={
+        "action": "query", "titles": destination, "prop": "images",
+        "imlimit": 20, "format": "json"})
+    if resp.status_code != 200:
+        return []
+    img_titles = []
+    for pg in resp.json().get("query", {}).get("pages", {}).values():
+        for img in pg.get("images", []):
+            t = img["title"]
+            tl = t.lower()
+            if not tl.endswith((".jpg", ".jpeg")):
+                continue
+            if any(s in tl for s in _SKIP):
+                continue
+            img_titles.append(t)
+    if not img_titles:
+        return []
+    # Resolve image titles to actual URLs (batch)
+    resp = await client.get(_WIKI_API, params={
+        "action": "query", "titles": "|".join(img_titles[:8]),
+        "prop": "imageinfo", "iiprop": "url", "iiurlwidth": 900, "format": "json"})
+    if resp.status_code != 200:
+        return []
+    photos = []
+    for ip in resp.json().get("query", {}).get("pages", {}).values():
+        ii = ip.get("imageinfo", [{}])[0]
+        url = ii.get("thumburl") or ii.get("url", "")
+        if url:
+            photos.append({"id": f"wp_{ip.get('pageid','')}", "src": url,
+                           "alt": _file_alt(ip.get("title", ""))})
+    return photos
+
+
+async def _commons_photos(client: httpx.AsyncClient, destination: str) -> list:
+    """Wikimedia Commons search — used to top up when the article is light on photos."""
+    resp = await client.get(_COMMONS_API, params={
+        "action": "query", "generator": "search",
+        "gsrsearch": destination, "gsrnamespace": 6,
+        "gsrlimit": 10, "prop": "imageinfo",
+        "iiprop": "url", "iiurlwidth": 900, "format": "json"})
+    if resp.status_code != 200:
+        return []
+    photos = []
+    for page in resp.json().get("query", {}).get("pages", {}).values():
+        title = page.get("title", "").lower()
+        if any(s in title for s in _SKIP):
+            continue
+        if not title.endswith((".jpg", ".jpeg")):
+            continue
+        thumb = page.get("imageinfo", [{}])[0].get("thumburl", "")
+        if thumb:
+            photos.append({"id": f"cm_{page.get('pageid','')}", "src": thumb,
+                           "alt": _file_alt(page.get("title", ""))})
+    return photos
+
+
+async def _timed_photo_source(fetch, client: httpx.AsyncClient, destination: str) -> list:
+    operation = fetch.__name__.strip("_")
+    started, outcome = time.perf_counter(), "error"
+    try:
+        with tracer.span(f"wikipedia.{operation}"):
+            photos = await fetch(client, destination)
+        outcome = "ok"
+        return photos
+    except asyncio.CancelledError:
+        outcome = "deadline"
+        raise
+    finally:
+        OUTBOUND_LATENCY.observe(time.perf_counter() - started, "wikipedia", operation, outcome)
+
+
+async def _resolve_photos(destination: str) -> tuple:
+    """Run the hero, article and Commons lookups concurrently on the shared
+    client. Returns (photos, complete) — complete is False if the deadline hit."""
+    client = get_wiki_client()
+    sources = [asyncio.create_task(_timed_photo_source(fetch, client, destination))
+               for fetch in (_wiki_hero_photo, _wiki_article_photos, _commons_photos)]
+    done, pending = await asyncio.wait(sources, timeout=PHOTO_DEADLINE_SECONDS)
+    for task in pending:
+        task.cancel()
+
+    failed = False
+    results = []
+    for t in sources:
+        if t in done and not t.exception():
+            results.append(t.result())
+        else:
+            failed = True
+            results.append([])
+    hero, article, commons = results
 
-        # 3) Fallback: Wikimedia Commons search (if we still have fewer than 3 photos)
-        if len(photos) < 3:
-            try:
-                resp = await client.get(
-                    "https://commons.wikimedia.org/w/api.php",
-                    params={"action": "query", "generator": "search",
-                            "gsrsearch": destination, "gsrnamespace": 6,
-                            "gsrlimit": 10, "prop": "imageinfo",
-                            "iiprop": "url", "iiurlwidth": 900, "format": "json"},
-                    headers=headers,
-                )
-                if resp.status_code == 200:
-                    pages = resp.json().get("query", {}).get("pages", {})
-                    for page in pages.values():
-                        if len(photos) >= 6:
-                            break
-                        title = page.get("title", "").lower()
-                        if any(s in title for s in _SKIP):
-                            continue
-                        if not any(title.endswith(ext) for ext in (".jpg", ".jpeg")):
-                            continue
-                        ii = page.get("imageinfo", [{}])[0]
-                        thumb = ii.get("thumburl", "")
-                        if thumb and not any(p["src"] == thumb for p in photos):
-                            alt = (page.get("title", "")
-                                   .replace("File:", "").replace("_", " ")
-                                   .rsplit(".", 1)[0][:80])
-                            photos.append({"id": f"cm_{page.get('pageid','')}", "src": thumb, "alt": alt})
-            except Exception:
-                pass
-
-    _photo_cache[cache_key] = photos
-    return {"photos": photos}
+    photos: list = []
+    # Commons is only a fallback — used when the article gives fewer than 3
+    for batch in (hero, article, commons if len(hero) + len(article) < 3 else []):
+        for p in batch:
+            if len(photos) >= 6:
+                break
+            if not any(existing["src"] == p["src"] for existing in photos):
+                photos.append(p)
+    return photos, not failed
+
+
+async def _refresh_photos(cache_key: str, destination: str, stale: Optional[list] = None) -> list:
+    photos, complete = await _resolve_photos(destination)
+    if photos and complete:
+        await _photo_cache.set(cache_key, photos, PHOTO_CACHE_TTL)
+        return photos
+    if stale:   # failed refresh — keep the good photos and try again after the negative TTL
+        await _photo_cache.set(cache_key, stale, PHOTO_CACHE_NEGATIVE_TTL)
+        return stale
+    await _photo_cache.set(cache_key, photos, PHOTO_CACHE_NEGATIVE_TTL)
+    return photos
+
+
+def _schedule_photo_refresh(cache_key: str, destination: str, stale: list) -> None:
+    if cache_key in _photo_refreshes:
+        return
+    task = asyncio.create_task(_refresh_photos(cache_key, destination, stale))
+    _photo_refreshes[cache_key] = task
+    task.add_done_callback(lambda t: (_photo_refreshes.pop(cache_key, None),
+                                      t.cancelled() or t.exception()))
 
 
-@app.post("/api/plan/full")
-@limiter.limit("5/minute")
-async def generate_full_itinerary(req: TripRequest, request: Request):
-    """Generate a complete multi-day travel itinerary using Amazon Nova."""
-    interests_str = ", ".join(req.interests) if req.interests else "general sightseeing"
-    duration = (datetime.fromisoformat(req.end_date) - datetime.fromisoformat(req.start_date)).days + 1
+@app.get("/api/destination-photos")
+async def get_destination_photos(destination: str):
+    """Fetch real destination photos from Wikipedia / Wikimedia Commons — no API key needed.
+
+    The hero, article and Commons lookups run concurrently on the shared
+    client; after PHOTO_DEADLINE_SECONDS we return whatever has arrived.
+    """
+    cache_key = normalize_destination(destination)
+    photos, state = await _photo_cache.get(cache_key)
+    if state == PhotoCache.STALE:
+        _schedule_photo_refresh(cache_key, destination, photos)
+    if photos is not None:
+        return {"photos": photos}
+    return {"photos": await _refresh_photos(cache_key, destination)}
 
-    system_prompt = """You are an expert AI travel planner with deep knowledge of destinations worldwide.
+
+PLANNER_SYSTEM_PROMPT = """You are an expert AI travel planner with deep knowledge of destinations worldwide.
 You create detailed, realistic, and personalized travel itineraries. 
 Always respond with valid JSON matching the exact schema requested.
 Be specific with place names, timings, and practical advice."""
 
-    user_message = f"""Create a detailed {duration}-day travel itinerary for the following trip:
+# Static schema templates live in the system prompt (the cached prefix); the
+# trip's own details always come last, in the user message. Nova writes the
+# compact wire format (wire_format.py) unless COMPACT_OUTPUT=false; either way
+# responses are expanded to the verbose shape before anything else sees them.
+COMPACT_OUTPUT = os.getenv("COMPACT_OUTPUT", "true").lower() in ("1", "true", "yes")
 
-Destination: {req.destination}
-Origin: {req.origin}
-Travel Dates: {req.start_date} to {req.end_date} ({duration} days)
-Number of Travelers: {req.travelers}
-Budget Level: {req.budget}
-Interests: {interests_str}
-Special Requirements: {req.special_requirements or "None"}
 
-Return a JSON object with this exact structure:
-{{
-  "trip_summary": {{
+def output_schema(verbose: str, wire: str) -> str:
+    """The structure Nova is asked to return: the compact wire format, or the verbose schema."""
+    return f"{wire}\n\n{MINIFIED}" if COMPACT_OUTPUT else verbose
+
+
+ITINERARY_SCHEMA = """{
+  "trip_summary": {
     "title": "Creative trip title",
-    "destination": "{req.destination}",
-    "duration": {duration},
+    "destination": "Destination as given",
+    "duration": NUMBER_OF_DAYS,
     "best_time_to_visit": "...",
     "overall_theme": "...",
     "highlights": ["highlight1", "highlight2", "highlight3"]
-  }},
+  },
   "daily_itinerary": [
-    {{
+    {
       "day": 1,
-      "date": "{req.start_date}",
+      "date": "YYYY-MM-DD",
       "title": "Day title",
       "theme": "Day theme",
       "activities": [
-        {{
+        {
           "time": "9:00 AM",
           "name": "Activity name",
           "description": "Detailed description",
@@ -402,145 +922,838 @@ Return a JSON object with this exact structure:
           "cost_estimate": "$20-30",
           "tips": "Insider tip",
           "category": "sightseeing|food|adventure|culture|shopping|relaxation"
-        }}
+        }
       ],
-      "meals": {{
-        "breakfast": {{"name": "...", "description": "...", "price_range": "..."}},
-        "lunch": {{"name": "...", "description": "...", "price_range": "..."}},
-        "dinner": {{"name": "...", "description": "...", "price_range": "..."}}
-      }},
-      "accommodation": {{"name": "...", "type": "...", "price_range": "..."}},
+      "meals": {
+        "breakfast": {"name": "...", "description": "...", "price_range": "..."},
+        "lunch": {"name": "...", "description": "...", "price_range": "..."},
+        "dinner": {"name": "...", "description": "...", "price_range": "..."}
+      },
+      "accommodation": {"name": "...", "type": "...", "price_range": "..."},
       "transportation": "How to get around this day",
       "daily_budget_estimate": "$X-Y per person"
-    }}
+    }
   ],
-  "practical_info": {{
+  "practical_info": {
     "getting_there": "...",
     "local_transportation": "...",
     "currency_tips": "...",
     "safety_tips": "...",
     "local_customs": "...",
     "emergency_contacts": "..."
-  }},
-  "budget_breakdown": {{
+  },
+  "budget_breakdown": {
     "accommodation_total": "$...",
     "food_total": "$...",
     "activities_total": "$...",
     "transportation_total": "$...",
     "grand_total_per_person": "$..."
-  }}
-}}
+  }
+}"""
+
+ITINERARY_SYSTEM_PROMPT = PLANNER_SYSTEM_PROMPT + f"""
+
+Return a JSON object with this exact structure:
+{output_schema(ITINERARY_SCHEMA, ITINERARY_WIRE)}
+
+Include one daily_itinerary entry for every day of the trip, dated from the start date.
+Make it genuinely helpful and specific to the destination."""
+
+
+def build_itinerary_prompt(req: TripRequest, varying: tuple = ()) -> tuple:
+    """Return (system_prompt, user_message, duration) for a full-itinerary request.
+
+    `varying` names the fields that differ between variants of one trip: the
+    message is then split so the facts they share form a cacheable prefix.
+    """
+    duration = (datetime.fromisoformat(req.end_date) - datetime.fromisoformat(req.start_date)).days + 1
+    if varying:
+        lines = _fact_lines(req, duration)
+        shared = [line for fields, line in lines if not set(fields) & set(varying)]
+        differing = [line for fields, line in lines if set(fields) & set(varying)]
+        user_message = ["Create a detailed travel itinerary for the following trip:\n\n" + "\n".join(shared),
+                        "\n".join(differing) + f"\n\nGenerate all {duration} days."]
+        return ITINERARY_SYSTEM_PROMPT, user_message, duration
+    user_message = f"""Create a detailed {duration}-day travel itinerary for the following trip:
+
+{_trip_facts(req, duration)}
+
+Generate all {duration} days."""
+    return ITINERARY_SYSTEM_PROMPT, user_message, duration
+
 
-Generate all {duration} days. Make it genuinely helpful and specific to {req.destination}."""
+def itinerary_tier(req: TripRequest, duration: int) -> Optional[str]:
+    """Nova Pro when asked for or for very long trips; otherwise the route's default."""
+    return "pro" if req.quality == "high" or duration >= PRO_MIN_DAYS else None
 
+
+# ─── Fan-out Itinerary Planning (long trips) ─────────────────────────────────
+# Long trips don't fit one 4096-token response and take ages serially, so we
+# first ask for a compact outline, then generate every day (plus practical
+# info / budget) concurrently and merge into the normal /api/plan/full shape.
+
+FANOUT_MIN_DAYS = int(os.getenv("FANOUT_MIN_DAYS", "5"))        # "auto" fans out from this length
+FANOUT_CONCURRENCY = int(os.getenv("FANOUT_CONCURRENCY", "6"))  # parallel day calls per request
+
+DAY_SCHEMA = """{
+  "day": DAY_NUMBER,
+  "date": "YYYY-MM-DD",
+  "title": "Day title",
+  "theme": "Day theme",
+  "activities": [
+    {
+      "time": "9:00 AM",
+      "name": "Activity name",
+      "description": "Detailed description",
+      "duration": "2 hours",
+      "cost_estimate": "$20-30",
+      "tips": "Insider tip",
+      "category": "sightseeing|food|adventure|culture|shopping|relaxation"
+    }
+  ],
+  "meals": {
+    "breakfast": {"name": "...", "description": "...", "price_range": "..."},
+    "lunch": {"name": "...", "description": "...", "price_range": "..."},
+    "dinner": {"name": "...", "description": "...", "price_range": "..."}
+  },
+  "accommodation": {"name": "...", "type": "...", "price_range": "..."},
+  "transportation": "How to get around this day",
+  "daily_budget_estimate": "$X-Y per person"
+}"""
+
+SKELETON_SYSTEM_PROMPT = PLANNER_SYSTEM_PROMPT + """
+
+Return a compact JSON object — an outline only, no activities:
+{
+  "trip_summary": {
+    "title": "Creative trip title",
+    "destination": "Destination as given",
+    "duration": NUMBER_OF_DAYS,
+    "best_time_to_visit": "...",
+    "overall_theme": "...",
+    "highlights": ["highlight1", "highlight2", "highlight3"]
+  },
+  "days": [
+    {"day": 1, "date": "YYYY-MM-DD", "title": "Day title", "theme": "Day theme", "area": "Neighbourhood or area"}
+  ]
+}
+
+Outline every day of the trip, giving each day a distinct area or focus."""
+
+DAY_SYSTEM_PROMPT = PLANNER_SYSTEM_PROMPT + f"""
+
+You plan one day of a longer trip at a time. Return a JSON object with this exact structure:
+{output_schema(DAY_SCHEMA, DAY_WIRE)}
+
+Don't repeat places planned for other days. Make it genuinely helpful and specific to the destination."""
+
+EXTRAS_SYSTEM_PROMPT = PLANNER_SYSTEM_PROMPT + """
+
+Return a JSON object with this exact structure:
+{
+  "practical_info": {
+    "getting_there": "...",
+    "local_transportation": "...",
+    "currency_tips": "...",
+    "safety_tips": "...",
+    "local_customs": "...",
+    "emergency_contacts": "..."
+  },
+  "budget_breakdown": {
+    "accommodation_total": "$...",
+    "food_total": "$...",
+    "activities_total": "$...",
+    "transportation_total": "$...",
+    "grand_total_per_person": "$..."
+  }
+}"""
+
+
+def parse_json_object(text: str) -> dict:
+    """Extract the outermost JSON object from a model response (repairing it if needed)."""
+    return extract_json(text)[0]
+
+
+def use_fanout(req: TripRequest, duration: int) -> bool:
+    if req.planning_mode == "fanout":
+        return True
+    if req.planning_mode == "single":
+        return False
+    return duration >= FANOUT_MIN_DAYS
+
+
+def _fact_lines(req: TripRequest, duration: int) -> list:
+    """[(TripRequest fields, line)] in prompt order."""
+    interests_str = ", ".join(req.interests) if req.interests else "general sightseeing"
+    return [
+        (("destination",), f"Destination: {req.destination}"),
+        (("origin",), f"Origin: {req.origin}"),
+        (("start_date", "end_date"), f"Travel Dates: {req.start_date} to {req.end_date} ({duration} days)"),
+        (("travelers",), f"Number of Travelers: {req.travelers}"),
+        (("budget",), f"Budget Level: {req.budget}"),
+        (("interests",), f"Interests: {interests_str}"),
+        (("special_requirements",), f"Special Requirements: {req.special_requirements or 'None'}"),
+    ]
+
+
+def _trip_facts(req: TripRequest, duration: int) -> str:
+    return "\n".join(line for _, line in _fact_lines(req, duration))
+
+
+async def generate_day(trip_context: str, message: str, day_number: int, date: str,
+                       tier: Optional[str] = None) -> dict:
+    """One validated DayPlan dict from DAY_SYSTEM_PROMPT (one retry if it doesn't validate)."""
+    for attempt in range(2):
+        try:
+            day = expand_day(parse_json_object(await call_nova(DAY_SYSTEM_PROMPT, [trip_context, message],
+                                                               max_tokens=1500, task="itinerary_day",
+                                                               tier=tier)))
+            day["day"] = day_number
+            DayPlan.model_validate(day)
+            break
+        except (ValueError, ValidationError):
+            if attempt:
+                raise
+    day["day"], day["date"] = day_number, date
+    return day
+
+
+def _outline_text(outline: list) -> str:
+    return "\n".join(
+        f"Day {d.get('day')} ({d.get('date')}): {d.get('title')} — {d.get('area', '')}" for d in outline
+    )
+
+
+async def plan_itinerary_fanout(req: TripRequest) -> dict:
+    """Skeleton first, then every day + practical info/budget in bounded parallel."""
+    _, _, duration = build_itinerary_prompt(req)
+    facts = _trip_facts(req, duration)
+    start = datetime.fromisoformat(req.start_date)
+    tier = itinerary_tier(req, duration)
+
+    skeleton = parse_json_object(await call_nova(
+        SKELETON_SYSTEM_PROMPT, f"Outline a {duration}-day travel itinerary for the following trip:\n\n{facts}",
+        max_tokens=min(4096, 300 + 60 * duration), task="itinerary_outline", tier=tier))
+    summary = skeleton.get("trip_summary", {})
+    outline = skeleton.get("days", [])[:duration]
+    # Pad/repair the outline so every calendar day gets planned
+    by_day = {d.get("day"): d for d in outline if isinstance(d, dict)}
+    outline = []
+    for n in range(1, duration + 1):
+        d = dict(by_day.get(n, {"title": f"Day {n}", "theme": "", "area": req.destination}))
+        d["day"] = n
+        d["date"] = (start + timedelta(days=n - 1)).date().isoformat()
+        outline.append(d)
+    # Shared by every day call — sent before the day-specific part so it's cached once
+    trip_context = f"""Trip: "{summary.get('title', req.destination)}" ({duration} days)
+
+{facts}
+
+Full trip outline:
+{_outline_text(outline)}"""
+
+    slots = asyncio.Semaphore(FANOUT_CONCURRENCY)
+
+    async def plan_day(d: dict) -> dict:
+        message = (f"""Plan day {d['day']} ({d['date']}): "{d.get('title')}", theme "{d.get('theme')}", """
+                   f"""centred on {d.get('area')}.""")
+        async with slots:
+            return await generate_day(trip_context, message, d["day"], d["date"], tier)
+
+    async def plan_extras() -> dict:
+        async with slots:
+            return parse_json_object(await call_nova(
+                EXTRAS_SYSTEM_PROMPT, [trip_context, "Give the practical info and budget breakdown."],
+                max_tokens=1000, task="itinerary_extras", tier=tier))
+
+    *days, extras = await asyncio.gather(*(plan_day(d) for d in outline), plan_extras())
+    summary.setdefault("title", f"{duration} days in {req.destination}")
+    summary.setdefault("destination", req.destination)
+    summary["duration"] = duration
+    itinerary = {
+        "trip_summary": summary,
+        "daily_itinerary": days,
+        "practical_info": extras.get("practical_info", {}),
+        "budget_breakdown": extras.get("budget_breakdown", {}),
+    }
     try:
-        response_text = call_nova(system_prompt, user_message, max_tokens=4096)
-        # Extract JSON from response
-        start = response_text.find("{")
-        end = response_text.rfind("}") + 1
-        if start >= 0 and end > start:
-            itinerary = json.loads(response_text[start:end])
-        else:
-            raise ValueError("No valid JSON in response")
-        return {"success": True, "data": itinerary, "model_used": MODEL_ID}
-    except json.JSONDecodeError as e:
+        itinerary = validate(Itinerary, itinerary)
+    except ValidationError as e:
+        output_stats.record("itinerary_fanout", "failed")
+        raise ModelOutputError(f"AI response is missing {', '.join(broken_sections(Itinerary, itinerary))}") from e
+    output_stats.record("itinerary_fanout", "clean")
+    return itinerary
+
+
+@app.post("/api/plan/full")
+async def generate_full_itinerary(req: TripRequest, request: Request):
+    """Generate a complete multi-day travel itinerary using Amazon Nova."""
+    _, _, duration = build_itinerary_prompt(req)
+    await admit(request, itinerary_cost(duration))
+    return await plan_full_itinerary(req)
+
+
+async def plan_full_itinerary(req: TripRequest, varying: tuple = ()) -> dict:
+    """The /api/plan/full response for `req` (also what itinerary jobs produce)."""
+    system_prompt, user_message, duration = build_itinerary_prompt(req, varying)
+    used = track_models()
+
+    try:
+        if use_fanout(req, duration):
+            itinerary = await plan_itinerary_fanout(req)
+            return {"success": True, "data": itinerary, "model_used": model_used(used),
+                    "planning_mode": "fanout"}
+        response_text = await call_nova(system_prompt, user_message, max_tokens=4096, task="itinerary",
+                                        tier=itinerary_tier(req, duration))
+        itinerary = await complete_output("itinerary", Itinerary, response_text, system_prompt,
+                                          user_message, fill_days=(req.start_date, duration))
+        return {"success": True, "data": itinerary, "model_used": model_used(used), "planning_mode": "single"}
+    except ModelOutputError as e:
         raise HTTPException(status_code=500, detail=f"Failed to parse AI response: {str(e)}")
+    except NovaTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except OverloadedError as e:
+        raise overloaded(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/api/plan/packing-list")
-@limiter.limit("10/minute")
-async def generate_packing_list(req: PackingRequest, request: Request):
-    """Generate a smart packing list using Amazon Nova."""
-    duration = (datetime.fromisoformat(req.end_date) - datetime.fromisoformat(req.start_date)).days + 1
-    activities_str = ", ".join(req.activities) if req.activities else "general travel"
+@app.post("/api/plan/full/stream")
+async def stream_full_itinerary(req: TripRequest, request: Request):
+    """Stream the itinerary as Server-Sent Events while Nova generates it.
 
-    system_prompt = "You are a professional travel packing expert. Return only valid JSON."
+    Events: `trip_summary`, one `day` per completed daily_itinerary entry,
+    `section` for the remaining top-level blocks ({"key", "value"}), then
+    `done` with the full itinerary (same shape as /api/plan/full) or `error`.
+    """
+    system_prompt, user_message, duration = build_itinerary_prompt(req)
+    await admit(request, itinerary_cost(duration))
 
-    user_message = f"""Create a comprehensive packing list for:
-Destination: {req.destination}
-Duration: {duration} days ({req.start_date} to {req.end_date})
-Planned Activities: {activities_str}
+    async def events():
+        parser = JSONSectionParser(item_keys=["daily_itinerary"])
+        used = track_models()
+        try:
+            async with aclosing(call_nova_stream(system_prompt, user_message, max_tokens=4096,
+                                                 task="itinerary", tier=itinerary_tier(req, duration))) as stream:
+                async for text in stream:
+                    for kind, key, value in parser.feed(text):
+                        if kind == "item":
+                            yield sse_event("day", expand_day(value))
+                        elif key == "trip_summary":
+                            yield sse_event("trip_summary", value)
+                        else:
+                            yield sse_event("section", {"key": key, "value": value})
+        except NovaTimeoutError as e:
+            yield sse_event("error", {"status": 504, "detail": str(e)})
+            return
+        except OverloadedError as e:
+            yield sse_event("error", {"status": 429, "detail": str(e), "retry_after": math.ceil(e.retry_after)})
+            return
+        except Exception as e:
+            yield sse_event("error", {"status": 500, "detail": str(e)})
+            return
 
-Return JSON:
-{{
+        try:
+            # Truncated/garbled tail — repair it and re-request just the broken sections
+            itinerary = await complete_output("itinerary_stream", Itinerary, parser.document(),
+                                              system_prompt, user_message,
+                                              fill_days=(req.start_date, duration))
+        except NovaTimeoutError as e:
+            yield sse_event("error", {"status": 504, "detail": str(e)})
+            return
+        except OverloadedError as e:
+            yield sse_event("error", {"status": 429, "detail": str(e), "retry_after": math.ceil(e.retry_after)})
+            return
+        except ModelOutputError as e:
+            yield sse_event("error", {"status": 500, "detail": f"Failed to parse AI response: {e}"})
+            return
+        yield sse_event("done", {"success": True, "data": itinerary, "model_used": model_used(used)})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+# ─── Itinerary Jobs (submit now, poll / SSE later) ──────────────────────────
+# A bounded worker pool plans queued itineraries so no HTTP request has to
+# stay open for the whole generation. JOB_QUEUE_DB keeps jobs in a SQLite
+# file (across restarts, shared by the host's workers); otherwise in memory.
+JOB_PRIORITIES = {"low": 0, "normal": 1, "high": 2}
+JOB_KEEPALIVE_SECONDS = 15
+
+
+def _job_error(e: Exception) -> dict:
+    if isinstance(e, HTTPException):
+        error = {"status": e.status_code, "detail": e.detail}
+        if e.headers and "Retry-After" in e.headers:
+            error["retry_after"] = int(e.headers["Retry-After"])
+        return error
+    if isinstance(e, asyncio.TimeoutError):
+        return {"status": 504, "detail": "Itinerary job timed out"}
+    return {"status": 500, "detail": str(e)}
+
+
+def _observe_job(waited: float, ran: float, status: str) -> None:
+    JOB_WAIT.observe(waited)
+    JOB_RUN.observe(ran, status)
+    tracer.record("job.run", ran, waited_s=round(waited, 3), status=status)
+
+
+async def _run_itinerary_job(payload: dict) -> dict:
+    return await plan_full_itinerary(TripRequest(**payload))
+
+
+itinerary_jobs = JobQueue(
+    SQLiteJobBackend(os.getenv("JOB_QUEUE_DB")) if os.getenv("JOB_QUEUE_DB") else MemoryJobBackend(),
+    _run_itinerary_job,
+    workers=int(os.getenv("JOB_WORKERS", "2")),
+    max_queued=int(os.getenv("JOB_MAX_QUEUED", "100")),
+    result_ttl=float(os.getenv("JOB_RESULT_TTL", "3600")),
+    job_timeout=float(os.getenv("JOB_TIMEOUT_SECONDS", "300")),
+    error_info=_job_error,
+    observer=_observe_job,
+)
+
+
+def job_key(req: TripRequest) -> str:
+    """Identical trip requests share a key — and a pending job."""
+    return hashlib.sha256(json.dumps(req.model_dump(), sort_keys=True).encode()).hexdigest()
+
+
+@app.post("/api/plan/jobs", status_code=202)
+async def submit_itinerary_job(req: TripRequest, request: Request, priority: str = "normal"):
+    """Queue a full itinerary for background generation; returns a job id at once.
+
+    Poll GET /api/plan/jobs/{job_id} (optionally long-polling with `wait`) or
+    listen on /api/plan/jobs/{job_id}/events. An identical request still
+    queued or running gets the existing job. `priority` "low" yields to
+    normal work; "high" is honoured for signed-in users only.
+    """
+    if priority not in JOB_PRIORITIES:
+        raise HTTPException(status_code=400, detail=f"priority must be one of {', '.join(JOB_PRIORITIES)}")
+    _, _, duration = build_itinerary_prompt(req)
+    level = JOB_PRIORITIES[priority]
+    if level > JOB_PRIORITIES["normal"] and not await get_optional_user(request.headers.get("Authorization")):
+        level = JOB_PRIORITIES["normal"]
+    key = job_key(req)
+    if await itinerary_jobs.pending(key) is None:   # joining a pending job costs nothing upstream
+        await admit(request, itinerary_cost(duration))
+    try:
+        job, deduplicated = await itinerary_jobs.submit(req.model_dump(), key, level)
+    except OverloadedError as e:
+        raise overloaded(e)
+    return {"job_id": job.id, "status": job.status, "deduplicated": deduplicated,
+            "poll_url": f"/api/plan/jobs/{job.id}", "events_url": f"/api/plan/jobs/{job.id}/events"}
+
+
+@app.get("/api/plan/jobs/{job_id}")
+async def get_itinerary_job(job_id: str, wait: float = Query(0, ge=0, le=30)):
+    """Job status; once `done`, `result` is the /api/plan/full response, once
+    `failed`, `error` has its status and detail. With `wait`, holds the
+    request up to that many seconds for the job to finish."""
+    job = await itinerary_jobs.wait(job_id, wait) if wait else await itinerary_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found (or its result has expired)")
+    return job.view()
+
+
+@app.get("/api/plan/jobs/{job_id}/events")
+async def itinerary_job_events(job_id: str):
+    """Server-Sent Events for one job: `status` now, then `done` with the
+    /api/plan/full response or `error` — with keep-alive comments meanwhile."""
+    job = await itinerary_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found (or its result has expired)")
+
+    async def events():
+        current = job
+        yield sse_event("status", {"job_id": job_id, "status": current.status})
+        while current.status not in FINISHED:
+            current = await itinerary_jobs.wait(job_id, JOB_KEEPALIVE_SECONDS)
+            if current is None:
+                yield sse_event("error", {"status": 404, "detail": "Job expired"})
+                return
+            if current.status not in FINISHED:
+                yield ": keep-alive\n\n"
+        if current.status == DONE:
+            yield sse_event("done", current.result)
+        else:
+            yield sse_event("error", current.error)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+PACKING_SCHEMA = """{
   "weather_advisory": "Expected weather and what to prepare for",
   "categories": [
-    {{
+    {
       "name": "Category name",
       "icon": "emoji",
       "items": [
-        {{"item": "Item name", "quantity": "X", "essential": true/false, "notes": "..."}}
+        {"item": "Item name", "quantity": "X", "essential": true, "notes": "..."}
       ]
-    }}
+    }
   ],
   "tips": ["tip1", "tip2"],
   "carry_on_essentials": ["item1", "item2"]
-}}"""
+}"""
 
-    try:
-        response_text = call_nova(system_prompt, user_message, max_tokens=2048)
-        start = response_text.find("{")
-        end = response_text.rfind("}") + 1
-        data = json.loads(response_text[start:end])
-        return {"success": True, "data": data}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+PACKING_SYSTEM_PROMPT = f"""You are a professional travel packing expert. Return only valid JSON.
 
+Return JSON:
+{output_schema(PACKING_SCHEMA, PACKING_WIRE)}"""
 
-@app.post("/api/plan/budget")
-@limiter.limit("10/minute")
-async def estimate_budget(req: BudgetRequest, request: Request):
-    """Generate a detailed budget estimate using Amazon Nova."""
-    system_prompt = "You are a travel budget expert. Return only valid JSON."
 
-    user_message = f"""Create a detailed budget breakdown for:
+@app.post("/api/plan/packing-list")
+async def generate_packing_list(req: PackingRequest, request: Request):
+    """Generate a smart packing list using Amazon Nova."""
+    await admit(request, REQUEST_COSTS["packing"])
+    duration = (datetime.fromisoformat(req.end_date) - datetime.fromisoformat(req.start_date)).days + 1
+    activities_str = ", ".join(req.activities) if req.activities else "general travel"
+
+    user_message = f"""Create a comprehensive packing list for:
 Destination: {req.destination}
-Duration: {req.duration_days} days
-Travelers: {req.travelers}
-Budget Level: {req.budget_level}
+Duration: {duration} days ({req.start_date} to {req.end_date})
+Planned Activities: {activities_str}"""
 
-Return JSON:
-{{
+    used = track_models()
+    try:
+        response_text = await call_nova(PACKING_SYSTEM_PROMPT, user_message, max_tokens=2048,
+                                        cache_as="packing", output_model=PackingList, task="packing")
+        data = await complete_output("packing", PackingList, response_text, PACKING_SYSTEM_PROMPT,
+                                     user_message)
+        return {"success": True, "data": data, "model_used": model_used(used)}
+    except ModelOutputError as e:
+        raise HTTPException(status_code=500, detail=f"Failed to parse AI response: {str(e)}")
+    except NovaTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except OverloadedError as e:
+        raise overloaded(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+BUDGET_SCHEMA = """{
   "summary": "Brief budget overview",
-  "daily_breakdown": {{
-    "accommodation": {{"low": X, "average": Y, "high": Z, "notes": "..."}},
-    "food": {{"low": X, "average": Y, "high": Z, "notes": "..."}},
-    "transportation": {{"low": X, "average": Y, "high": Z, "notes": "..."}},
-    "activities": {{"low": X, "average": Y, "high": Z, "notes": "..."}},
-    "miscellaneous": {{"low": X, "average": Y, "high": Z, "notes": "..."}}
-  }},
-  "total_per_person": {{"low": X, "recommended": Y, "comfortable": Z}},
-  "total_for_group": {{"low": X, "recommended": Y, "comfortable": Z}},
+  "daily_breakdown": {
+    "accommodation": {"low": X, "average": Y, "high": Z, "notes": "..."},
+    "food": {"low": X, "average": Y, "high": Z, "notes": "..."},
+    "transportation": {"low": X, "average": Y, "high": Z, "notes": "..."},
+    "activities": {"low": X, "average": Y, "high": Z, "notes": "..."},
+    "miscellaneous": {"low": X, "average": Y, "high": Z, "notes": "..."}
+  },
+  "total_per_person": {"low": X, "recommended": Y, "comfortable": Z},
+  "total_for_group": {"low": X, "recommended": Y, "comfortable": Z},
   "money_saving_tips": ["tip1", "tip2", "tip3"],
   "splurge_recommendations": ["experience1", "experience2"],
   "currency": "Local currency and exchange tips"
-}}"""
+}"""
+
+BUDGET_SYSTEM_PROMPT = f"""You are a travel budget expert. Return only valid JSON.
 
+Return JSON:
+{output_schema(BUDGET_SCHEMA, BUDGET_WIRE)}"""
+
+
+@app.post("/api/plan/budget")
+async def estimate_budget(req: BudgetRequest, request: Request):
+    """Generate a detailed budget estimate using Amazon Nova."""
+    await admit(request, REQUEST_COSTS["budget"])
+    return await plan_budget(req)
+
+
+def build_budget_prompt(req: BudgetRequest, varying: tuple = ()):
+    """The budget user message; split into shared / varying facts like build_itinerary_prompt."""
+    lines = [("destination", f"Destination: {req.destination}"),
+             ("duration_days", f"Duration: {req.duration_days} days"),
+             ("travelers", f"Travelers: {req.travelers}"),
+             ("budget_level", f"Budget Level: {req.budget_level}")]
+    shared = [line for field, line in lines if field not in varying]
+    differing = [line for field, line in lines if field in varying]
+    if not differing:
+        return "Create a detailed budget breakdown for:\n" + "\n".join(shared)
+    return ["Create a detailed budget breakdown for:\n" + "\n".join(shared), "\n".join(differing)]
+
+
+async def plan_budget(req: BudgetRequest, varying: tuple = ()) -> dict:
+    """The /api/plan/budget response for `req`."""
+    user_message = build_budget_prompt(req, varying)
+    used = track_models()
     try:
-        response_text = call_nova(system_prompt, user_message, max_tokens=1500)
-        start = response_text.find("{")
-        end = response_text.rfind("}") + 1
-        data = json.loads(response_text[start:end])
-        return {"success": True, "data": data}
+        response_text = await call_nova(BUDGET_SYSTEM_PROMPT, user_message, max_tokens=1500,
+                                        cache_as="budget", output_model=BudgetEstimate, task="budget")
+        data = await complete_output("budget", BudgetEstimate, response_text, BUDGET_SYSTEM_PROMPT,
+                                     user_message)
+        return {"success": True, "data": data, "model_used": model_used(used)}
+    except ModelOutputError as e:
+        raise HTTPException(status_code=500, detail=f"Failed to parse AI response: {str(e)}")
+    except NovaTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except OverloadedError as e:
+        raise overloaded(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/api/chat")
-@limiter.limit("15/minute")
-async def chat_with_travel_ai(req: ChatRequest, request: Request):
-    """Multi-turn chat with the AI travel assistant using Amazon Nova."""
-    system_prompt = """You are Nova, an expert AI travel assistant powered by Amazon Nova.
+# ─── Trip Variants (one trip at several budgets / destinations) ─────────────
+# A base request plus per-variant field overrides, planned concurrently under
+# one batch budget of Nova calls in flight (a fanned-out itinerary holds
+# several) and charged to the rate limiter as one request. The fields
+# the variants share lead their prompts, so later variants reuse the cached
+# prefix; results stream back as each variant finishes.
+VARIANTS_MAX = int(os.getenv("VARIANTS_MAX", "6"))
+VARIANT_CONCURRENCY = int(os.getenv("VARIANT_CONCURRENCY", "6"))   # Nova calls in flight per batch
+VARIANT_KINDS = {"itinerary": (TripRequest, plan_full_itinerary), "budget": (BudgetRequest, plan_budget)}
+
+
+def variant_calls(kind: str, req) -> int:
+    """Nova calls one variant can have in flight at once."""
+    if kind == "itinerary":
+        duration = build_itinerary_prompt(req)[2]
+        if use_fanout(req, duration):
+            return min(duration + 1, FANOUT_CONCURRENCY)   # every day plus the extras call
+    return 1
+
+
+class VariantsRequest(BaseModel):
+    kind: str = "itinerary"   # "itinerary" (TripRequest fields) or "budget" (BudgetRequest fields)
+    base: dict
+    variants: List[dict]      # field overrides per variant, e.g. {"budget": "luxury"}
+
+
+_NUMBER = re.compile(r"\d[\d,]*(?:\.\d+)?")
+
+
+def _amount(value) -> Optional[float]:
+    """A number out of 900, "$1,200" or "€800-1,000" (the first figure)."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _NUMBER.search(str(value or ""))
+    return float(match.group().replace(",", "")) if match else None
+
+
+def compare_variants(kind: str, labels: list, results: list) -> dict:
+    """Compact side-by-side of the variants that succeeded, cheapest first."""
+    rows = []
+    for label, result in zip(labels, results):
+        if not result or result.get("status", 200) != 200:
+            rows.append({"label": label, "ok": False})
+            continue
+        data = result["data"]
+        if kind == "itinerary":
+            days = data.get("daily_itinerary", [])
+            total = data.get("budget_breakdown", {}).get("grand_total_per_person", "")
+            rows.append({"label": label, "ok": True, "title": data.get("trip_summary", {}).get("title", ""),
+                         "days": len(days), "activities": sum(len(d.get("activities", [])) for d in days),
+                         "total_per_person": total, "per_person_estimate": _amount(total)})
+        else:
+            totals = data.get("total_per_person", {})
+            rows.append({"label": label, "ok": True, "currency": data.get("currency", ""),
+                         "low": _amount(totals.get("low")), "per_person_estimate":
+                         _amount(totals.get("recommended", totals.get("average"))),
+                         "comfortable": _amount(totals.get("comfortable"))})
+    priced = sorted((r for r in rows if r.get("per_person_estimate") is not None),
+                    key=lambda r: r["per_person_estimate"])
+    return {"kind": kind, "variants": rows,
+            "cheapest": priced[0]["label"] if priced else None,
+            "priciest": priced[-1]["label"] if priced else None}
+
+
+@app.post("/api/plan/variants")
+async def plan_variants(body: VariantsRequest, request: Request):
+    """Plan several variants of one trip concurrently, as Server-Sent Events.
+
+    `base` is a TripRequest (kind "itinerary") or BudgetRequest (kind
+    "budget"); each entry of `variants` overrides some of its fields. Events:
+    one `variant` per variant as it finishes ({"index", "label", "overrides"}
+    plus the /api/plan/full or /api/plan/budget response, or "status" and
+    "detail" if it failed), then `comparison` and `done`.
+    """
+    if body.kind not in VARIANT_KINDS:
+        raise HTTPException(status_code=400, detail=f"kind must be one of {', '.join(VARIANT_KINDS)}")
+    if not 1 <= len(body.variants) <= VARIANTS_MAX:
+        raise HTTPException(status_code=400, detail=f"Between 1 and {VARIANTS_MAX} variants per request")
+    model, plan = VARIANT_KINDS[body.kind]
+    unknown = sorted({field for overrides in body.variants for field in overrides} - set(model.model_fields))
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown {body.kind} field(s) in variants: {', '.join(unknown)}")
+    try:
+        reqs = [model(**{**body.base, **overrides}) for overrides in body.variants]
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+    varying = tuple(sorted({field for overrides in body.variants for field in overrides}))
+    labels = [" · ".join(str(v) for v in overrides.values()) or f"Variant {i + 1}"
+              for i, overrides in enumerate(body.variants)]
+    if body.kind == "itinerary":
+        cost = sum(itinerary_cost(build_itinerary_prompt(r)[2]) for r in reqs)
+    else:
+        cost = REQUEST_COSTS["budget"] * len(reqs)
+    # Capped at what a full bucket holds: any batch that passed validation can run
+    await admit(request, min(cost, limiter.max_cost))
+
+    # A variant waits until its calls fit in the batch budget (one alone always fits)
+    weights = [min(variant_calls(body.kind, r), VARIANT_CONCURRENCY) for r in reqs]
+    budget = {"free": VARIANT_CONCURRENCY}
+    changed = asyncio.Condition()
+
+    async def run(i: int) -> tuple:
+        async with changed:
+            await changed.wait_for(lambda: budget["free"] >= weights[i])
+            budget["free"] -= weights[i]
+        try:
+            started = time.perf_counter()
+            try:
+                result = await plan(reqs[i], varying)
+            except Exception as e:
+                result = _job_error(e)
+            return i, {**result, "elapsed_s": round(time.perf_counter() - started, 2)}
+        finally:
+            async with changed:
+                budget["free"] += weights[i]
+                changed.notify_all()
+
+    async def events():
+        started = time.perf_counter()
+        tasks = [asyncio.create_task(run(i)) for i in range(len(reqs))]
+        results = [None] * len(reqs)
+        try:
+            for finished in asyncio.as_completed(tasks):
+                i, result = await finished
+                results[i] = result
+                yield sse_event("variant", {"index": i, "label": labels[i],
+                                            "overrides": body.variants[i], **result})
+        finally:   # client went away: stop planning variants nobody will see
+            for task in tasks:
+                task.cancel()
+        yield sse_event("comparison", compare_variants(body.kind, labels, results))
+        yield sse_event("done", {"variants": len(reqs),
+                                 "succeeded": sum(r.get("status", 200) == 200 for r in results),
+                                 "elapsed_s": round(time.perf_counter() - started, 2)})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+# ─── Day Replanning (patch one day instead of regenerating the trip) ────────
+# Only the chosen days are generated, with the kept days as a one-line-each
+# context so nothing is repeated; budget_breakdown then moves by what the
+# new days cost more or less than the ones they replace.
+
+def _cost(value) -> float:
+    """Midpoint of "$20-30", "€15" or "Free" (0 when there's no figure)."""
+    figures = [float(n.replace(",", "")) for n in _NUMBER.findall(str(value or ""))[:2]]
+    return sum(figures) / len(figures) if figures else 0.0
+
+
+def _day_costs(day: dict) -> dict:
+    meals = day.get("meals") or {}
+    return {
+        "activities_total": sum(_cost(a.get("cost_estimate")) for a in day.get("activities") or []),
+        "food_total": sum(_cost(m.get("price_range")) for m in meals.values() if isinstance(m, dict)),
+        "accommodation_total": _cost((day.get("accommodation") or {}).get("price_range")),
+    }
+
+
+def _shift_amounts(text: str, delta: float) -> str:
+    """Add `delta` to the (up to two) figures of "$1,200-1,500"-style text, keeping its format."""
+    return _NUMBER.sub(lambda m: f"{max(0.0, float(m.group().replace(',', '')) + delta):,.0f}", text, count=2)
+
+
+def rebudget(breakdown: dict, old_days: list, new_days: list) -> dict:
+    """`breakdown` adjusted by the per-category cost change from `old_days` to `new_days`."""
+    breakdown = dict(breakdown or {})
+    shifted = 0.0
+    for key in ("activities_total", "food_total", "accommodation_total"):
+        delta = (sum(_day_costs(d)[key] for d in new_days) - sum(_day_costs(d)[key] for d in old_days))
+        if round(delta) and _amount(breakdown.get(key)) is not None:
+            breakdown[key] = _shift_amounts(str(breakdown[key]), delta)
+            shifted += delta
+    if round(shifted) and _amount(breakdown.get("grand_total_per_person")) is not None:
+        breakdown["grand_total_per_person"] = _shift_amounts(str(breakdown["grand_total_per_person"]), shifted)
+    return breakdown
+
+
+def _day_line(day: dict) -> str:
+    names = "; ".join(a.get("name", "") for a in (day.get("activities") or [])[:6])
+    return f"Day {day.get('day')} ({day.get('date')}): {day.get('title', '')} — {names}"
+
+
+async def replan_days(req: DayPlanRequest, itinerary: dict, trip_form: dict) -> dict:
+    """Response with `itinerary` patched: the chosen days replanned, budget_breakdown recomputed."""
+    days = itinerary.get("daily_itinerary") or []
+    by_day = {d.get("day"): d for d in days if isinstance(d, dict)}
+    chosen = sorted(set(req.days)) if req.days else [n for n, d in by_day.items() if d.get("date") == req.date]
+    if not chosen:
+        raise HTTPException(status_code=400, detail=f"No day dated {req.date} in this itinerary")
+    unknown = [str(n) for n in chosen if n not in by_day]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"No day {', '.join(unknown)} in this itinerary")
+    try:
+        trip = TripRequest(**trip_form)
+        facts, tier = _trip_facts(trip, len(days)), itinerary_tier(trip, len(days))
+    except (TypeError, ValidationError):
+        facts, tier = f"Destination: {req.destination}", None
+    title = (itinerary.get("trip_summary") or {}).get("title", req.destination)
+    kept = "\n".join(f"Day {n} ({d.get('date')}): to be replanned" if n in chosen else _day_line(d)
+                     for n, d in sorted(by_day.items()))
+    # Shared by every replanned day — sent first so it's cached once
+    trip_context = f"""Trip: "{title}" ({len(days)} days)
+
+{facts}
+
+The rest of the trip — don't repeat these places:
+{kept}"""
+    wishes = f" The traveler wants: {req.preferences}" if req.preferences else ""
+
+    used = track_models()
+    try:
+        new_days = await asyncio.gather(*(
+            generate_day(trip_context, f'Plan day {n} ({by_day[n].get("date")}) again, replacing '
+                                       f'"{by_day[n].get("title", "")}".{wishes}', n, by_day[n].get("date"), tier)
+            for n in chosen))
+    except (ModelOutputError, ValidationError) as e:
+        raise HTTPException(status_code=500, detail=f"Failed to parse AI response: {str(e)}")
+    except NovaTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except OverloadedError as e:
+        raise overloaded(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    replaced = dict(zip(chosen, new_days))
+    patched = {
+        **itinerary,
+        "daily_itinerary": [replaced.get(d.get("day"), d) if isinstance(d, dict) else d for d in days],
+        "budget_breakdown": rebudget(itinerary.get("budget_breakdown"), [by_day[n] for n in chosen], new_days),
+    }
+    return {"success": True, "data": patched, "replanned_days": chosen, "model_used": model_used(used)}
+
+
+@app.post("/api/plan/day")
+async def replan_itinerary_days(req: DayPlanRequest, request: Request):
+    """Replan the day on `date` (or the listed `days`) of `itinerary`; returns it patched.
+
+    For saved trips use POST /api/itineraries/{trip_id}/days, which also
+    writes the change back.
+    """
+    if not req.itinerary:
+        raise HTTPException(status_code=400, detail="itinerary is required")
+    await admit(request, REQUEST_COSTS["day"] * max(1, len(set(req.days))))
+    return await replan_days(req, req.itinerary, req.trip_form or {})
+
+
+# Chat prompt budget (estimated tokens): verbatim recent turns, summary of
+# older turns, and the trip-context digest
+CHAT_HISTORY_TOKENS = int(os.getenv("CHAT_HISTORY_TOKENS", "1500"))
+CHAT_SUMMARY_TOKENS = int(os.getenv("CHAT_SUMMARY_TOKENS", "300"))
+CHAT_CONTEXT_TOKENS = int(os.getenv("CHAT_CONTEXT_TOKENS", "400"))
+chat_context_stats = {"requests": 0, "unbounded_tokens_est": 0, "prompt_tokens_est": 0}
+CHAT_MAX_TOKENS = 1024
+CHAT_SYSTEM_PROMPT = """You are Nova, an expert AI travel assistant powered by Amazon Nova.
 You help travelers plan amazing trips with personalized, detailed advice.
 You're friendly, knowledgeable, enthusiastic about travel, and always practical.
 When asked about specific places, give concrete recommendations with names, not generic advice.
 Keep responses conversational but informative."""
 
-    if req.trip_context:
-        system_prompt += f"\n\nCurrent trip context: {json.dumps(req.trip_context)}"
 
+def build_chat_body(req: ChatRequest):
+    """Request body for a chat turn, its estimated prompt tokens and the context report."""
     # Build conversation for Nova
     # Rules: first message must be "user", roles must alternate, no empty content
     raw = [m for m in req.messages if m.content and m.content.strip()]
@@ -561,45 +1774,164 @@ Keep responses conversational but informative."""
     if not nova_messages:
         raise HTTPException(status_code=400, detail="No user message found in conversation")
 
-    body = {
-        "messages": nova_messages,
-        "system": [{"text": system_prompt}],
-        "inferenceConfig": {
-            "maxTokens": 1024,
-            "temperature": 0.8,
-            "topP": 0.9,
-        }
-    }
+    # Bound the prompt: recent turns verbatim, older ones summarized, trip as a digest
+    full_tokens = estimate_tokens(CHAT_SYSTEM_PROMPT) + sum(
+        estimate_tokens(m["content"][0]["text"]) for m in nova_messages)
+    # System parts go most-stable first; each is followed by a prompt-cache point
+    system_parts = [CHAT_SYSTEM_PROMPT]
+    if req.trip_context:
+        full_tokens += estimate_tokens(json.dumps(req.trip_context))
+        system_parts.append(f"Current trip context:\n{trip_digest(req.trip_context, CHAT_CONTEXT_TOKENS)}")
+    window, summary = build_window(nova_messages, CHAT_HISTORY_TOKENS, CHAT_SUMMARY_TOKENS)
+    if summary:
+        system_parts.append(f"Earlier in this conversation:\n{summary}")
+    sent_tokens = sum(estimate_tokens(p) for p in system_parts) + sum(
+        estimate_tokens(m["content"][0]["text"]) for m in window)
+    context = {"prompt_tokens_est": sent_tokens, "unbounded_tokens_est": full_tokens,
+               "turns_sent": len(window), "turns_summarized": len(nova_messages) - len(window)}
+    chat_context_stats["requests"] += 1
+    chat_context_stats["unbounded_tokens_est"] += full_tokens
+    chat_context_stats["prompt_tokens_est"] += sent_tokens
+
+    body = build_body(window, system_parts, max_tokens=CHAT_MAX_TOKENS, temperature=0.8,
+                      cache_system=PROMPT_CACHE)
+    return body, sent_tokens, context
 
+
+@app.post("/api/chat")
+async def chat_with_travel_ai(req: ChatRequest, request: Request):
+    """Multi-turn chat with the AI travel assistant using Amazon Nova."""
+    await admit(request, REQUEST_COSTS["chat"])
+    body, sent_tokens, context = build_chat_body(req)
+
+    used = track_models()
     try:
-        response = bedrock_client.invoke_model(
-            modelId=MODEL_ID,
-            body=json.dumps(body),
-            contentType="application/json",
-            accept="application/json"
-        )
-        result = json.loads(response["body"].read())
-        reply = result["output"]["message"]["content"][0]["text"]
-        return {"success": True, "reply": reply, "model": MODEL_ID}
+        result = await _routed("chat", sent_tokens, CHAT_MAX_TOKENS, None,
+                               lambda model_id: nova.invoke(body, model_id=model_id))
+        return {"success": True, "reply": output_text(result), "model": model_used(used),
+                "context": context, "usage": token_usage(result.get("usage", {}))}
+    except NovaTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except OverloadedError as e:
+        raise overloaded(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# Streamed chat: a disconnected client aborts the Bedrock stream. Tokens saved
+# are estimated against the average completed reply (CHAT_MAX_TOKENS until one
+# has completed).
+chat_stream_stats = {"streams": 0, "completed": 0, "cancelled": 0, "failed": 0,
+                     "output_tokens_est": 0, "tokens_saved_est": 0}
+
+
+def _reply_tokens_expected() -> int:
+    done = chat_stream_stats["completed"]
+    return round(chat_stream_stats["output_tokens_est"] / done) if done else CHAT_MAX_TOKENS
+
+
+async def _until_disconnected(request: Request) -> None:
+    while (await request.receive())["type"] != "http.disconnect":
+        pass
+
+
+@app.post("/api/chat/stream")
+async def stream_chat(req: ChatRequest, request: Request):
+    """Stream the chat reply as Server-Sent Events while Nova generates it.
+
+    Events: `token` per text delta ({"text"}), then `done` ({"success",
+    "reply", "model", "context", "ttft_ms", "output_tokens_est"}) or `error`.
+    If the client goes away the Bedrock stream is closed at once.
+    """
+    await admit(request, REQUEST_COSTS["chat"])
+    body, sent_tokens, context = build_chat_body(req)
+    started = time.perf_counter()
+
+    async def events():
+        chat_stream_stats["streams"] += 1
+        used = track_models()
+        parts, ttft, delta, outcome = [], None, None, "cancelled"
+        stream = stream_body("chat", body, sent_tokens, CHAT_MAX_TOKENS)
+        gone = asyncio.create_task(_until_disconnected(request))
+        try:
+            while True:
+                delta = asyncio.ensure_future(anext(stream))
+                await asyncio.wait((delta, gone), return_when=asyncio.FIRST_COMPLETED)
+                if not delta.done():   # client left
+                    return
+                try:
+                    text = delta.result()
+                except StopAsyncIteration:
+                    outcome = "completed"
+                    break
+                if ttft is None:
+                    ttft = time.perf_counter() - started
+                    CHAT_TTFT.observe(ttft)
+                parts.append(text)
+                yield sse_event("token", {"text": text})
+        except NovaTimeoutError as e:
+            outcome = "failed"
+            yield sse_event("error", {"status": 504, "detail": str(e)})
+            return
+        except OverloadedError as e:
+            outcome = "failed"
+            yield sse_event("error", {"status": 429, "detail": str(e), "retry_after": math.ceil(e.retry_after)})
+            return
+        except Exception as e:
+            outcome = "failed"
+            yield sse_event("error", {"status": 500, "detail": str(e)})
+            return
+        finally:
+            # Also reached when the server cancels the response on disconnect
+            gone.cancel()
+            if delta is not None and not delta.done():
+                delta.cancel()   # raises inside nova.stream, which aborts the Bedrock stream
+            if outcome == "failed":
+                chat_stream_stats["failed"] += 1
+            elif outcome == "cancelled":
+                generated = estimate_tokens("".join(parts))
+                saved = max(0, _reply_tokens_expected() - generated)
+                chat_stream_stats["cancelled"] += 1
+                chat_stream_stats["tokens_saved_est"] += saved
+                tracer.record("chat.cancelled", time.perf_counter() - started,
+                              output_tokens_est=generated, tokens_saved_est=saved)
+            if delta is not None:
+                await asyncio.wait((delta,))
+            await stream.aclose()
+
+        reply = "".join(parts)
+        output_tokens = estimate_tokens(reply)
+        chat_stream_stats["completed"] += 1
+        chat_stream_stats["output_tokens_est"] += output_tokens
+        yield sse_event("done", {"success": True, "reply": reply, "model": model_used(used), "context": context,
+                                 "ttft_ms": round(ttft * 1000) if ttft is not None else None,
+                                 "output_tokens_est": output_tokens})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+TIPS_SYSTEM_PROMPT = """You are a travel expert. Be concise and practical. Return valid JSON only.
+Return JSON: {"tips": [{"title": "...", "description": "...", "icon": "emoji"}]}"""
+
+
 @app.post("/api/plan/quick-tips")
-@limiter.limit("15/minute")
 async def get_quick_tips(destination: str, category: str = "general", request: Request = None):
     """Get quick travel tips for a destination."""
-    system_prompt = "You are a travel expert. Be concise and practical. Return valid JSON only."
-
-    user_message = f"""Give me 5 essential {category} tips for visiting {destination}.
-Return JSON: {{"tips": [{{"title": "...", "description": "...", "icon": "emoji"}}]}}"""
+    await admit(request, REQUEST_COSTS["tips"])
+    user_message = f"Give me 5 essential {category} tips for visiting {destination}."
 
+    used = track_models()
     try:
-        response_text = call_nova(system_prompt, user_message, max_tokens=800)
-        start = response_text.find("{")
-        end = response_text.rfind("}") + 1
-        data = json.loads(response_text[start:end])
-        return {"success": True, "data": data}
+        response_text = await call_nova(TIPS_SYSTEM_PROMPT, user_message, max_tokens=800, cache_as="tips",
+                                        output_model=QuickTips, task="tips")
+        data = await complete_output("tips", QuickTips, response_text, TIPS_SYSTEM_PROMPT, user_message)
+        return {"success": True, "data": data, "model_used": model_used(used)}
+    except ModelOutputError as e:
+        raise HTTPException(status_code=500, detail=f"Failed to parse AI response: {str(e)}")
+    except NovaTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except OverloadedError as e:
+        raise overloaded(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -614,103 +1946,275 @@ class SaveItineraryRequest(BaseModel):
     title: str = ""
     itinerary: dict
     tripForm: dict
+    # Client-chosen id (a UUID) makes re-sending a bulk import idempotent
+    id: Optional[str] = Field(None, max_length=64, pattern=r"^[A-Za-z0-9-]+$")
 
 
 @app.on_event("startup")
 async def startup_event():
-    """Auto-create DynamoDB table for saved trips if Cognito is configured."""
+    """Open shared clients; verify the DynamoDB table in the background if Cognito is configured.
+
+    Nothing here waits on the network: AWS clients are built in parallel on
+    worker threads and readiness is reported by /ready as each finishes.
+    """
+    get_wiki_client()
+    _start_background(_warm_client(bedrock_client))
     if not COGNITO_USER_POOL_ID:
         print("ℹ  COGNITO_USER_POOL_ID not set — auth endpoints disabled (local mode)")
-        return
-    print(f"✓ Cognito configured: pool={COGNITO_USER_POOL_ID}")
+    else:
+        print(f"✓ Cognito configured: pool={COGNITO_USER_POOL_ID}")
+        _start_background(_warm_client(dynamodb_resource))
+        await jwks_manager.start()
+        _start_background(_prepare_trip_table())
+    itinerary_jobs.start()
+    print(f"✓ Startup complete in {(time.perf_counter() - _IMPORT_STARTED) * 1000:.0f} ms since import")
+
+
+_background_tasks: set = set()
+
+
+def _start_background(coro) -> None:
+    """Run a startup task, holding a reference until it finishes and reporting a crash."""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_done)
+
+
+def _background_done(task: asyncio.Task) -> None:
+    _background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        print(f"⚠  Background task {task.get_coro().__qualname__} failed: {task.exception()!r}")
+
+
+async def _warm_client(client) -> None:
+    await asyncio.get_running_loop().run_in_executor(None, client.warm)
+
+
+async def _prepare_trip_table():
+    delay = 1.0
+    while await trip_store.ensure_table() != "active":
+        await asyncio.sleep(delay)   # stay unready, retry with backoff
+        delay = min(delay * 2, 60.0)
+    print(f"✓ DynamoDB table ready: {DYNAMODB_TABLE}")
+    if os.getenv("MIGRATE_SAVED_TRIPS", "").lower() in ("1", "true", "yes"):
+        await _run_trip_migration()
+
+
+async def _run_trip_migration():
     try:
-        ddb_client = boto3.client(
-            "dynamodb",
-            region_name=os.getenv("AWS_DEFAULT_REGION", "us-east-1"),
-            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-            aws_session_token=os.getenv("AWS_SESSION_TOKEN"),
-        )
-        tables = ddb_client.list_tables()["TableNames"]
-        if DYNAMODB_TABLE not in tables:
-            ddb_client.create_table(
-                TableName=DYNAMODB_TABLE,
-                KeySchema=[
-                    {"AttributeName": "userId", "KeyType": "HASH"},
-                    {"AttributeName": "id", "KeyType": "RANGE"},
-                ],
-                AttributeDefinitions=[
-                    {"AttributeName": "userId", "AttributeType": "S"},
-                    {"AttributeName": "id", "AttributeType": "S"},
-                ],
-                BillingMode="PAY_PER_REQUEST",
-            )
-            print(f"✓ Created DynamoDB table: {DYNAMODB_TABLE}")
-        else:
-            print(f"✓ DynamoDB table exists: {DYNAMODB_TABLE}")
+        count = await trip_store.migrate_legacy()
+        print(f"✓ Migrated {count} saved trips to compressed storage")
     except Exception as e:
-        print(f"⚠  DynamoDB auto-setup: {e}")
+        print(f"⚠  Saved-trip migration: {e}")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    tasks = list(_background_tasks)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await itinerary_jobs.stop()
+    nova.shutdown()
+    trip_store.shutdown()
+    await jwks_manager.stop()
+    if _wiki_client is not None:
+        await _wiki_client.aclose()
+
+
+# Summary attributes returned by the list endpoint — the full itinerary /
+# tripForm blobs are only read by GET /api/itineraries/{trip_id}
+TRIP_SUMMARY_FIELDS = ("id", "title", "destination", "dates", "savedAt", "travelers", "budget", "highlights")
+SAVED_TRIPS_PAGE_SIZE = int(os.getenv("SAVED_TRIPS_PAGE_SIZE", "20"))
+SAVED_TRIPS_MAX_PAGE_SIZE = 100
+
+
+def _encode_cursor(last_key: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(last_key).encode()).decode()
+
+
+def _decode_cursor(cursor: str, user_id: str) -> dict:
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(key, dict) or key.get("userId") != user_id or not isinstance(key.get("id"), str):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"userId": user_id, "id": key["id"]}
+
+
+def _trip_from_item(item: dict) -> dict:
+    """DynamoDB item → API shape (decode stored payloads, Decimal → int)."""
+    decode_trip_fields(item)
+    # Convert Decimal → int for JSON serialization
+    if isinstance(item.get("travelers"), Decimal):
+        item["travelers"] = int(item["travelers"])
+    return item
 
 
 @app.get("/api/itineraries")
-async def list_saved_trips(user: dict = Depends(get_current_user)):
-    """List all saved itineraries for the authenticated user."""
-    from boto3.dynamodb.conditions import Key as DDBKey
-    table = dynamodb_resource.Table(DYNAMODB_TABLE)
-    resp = table.query(
-        KeyConditionExpression=DDBKey("userId").eq(user["sub"]),
-        ScanIndexForward=False,
-    )
-    items = []
-    for item in resp.get("Items", []):
-        item["itinerary"] = json.loads(item.pop("itinerary_json", "{}"))
-        item["tripForm"] = json.loads(item.pop("tripForm_json", "{}"))
-        # Convert Decimal → int for JSON serialization
-        if isinstance(item.get("travelers"), Decimal):
-            item["travelers"] = int(item["travelers"])
-        items.append(item)
-    return {"success": True, "data": items}
+async def list_saved_trips(
+    user: dict = Depends(get_current_user),
+    limit: int = Query(SAVED_TRIPS_PAGE_SIZE, ge=1, le=SAVED_TRIPS_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+):
+    """List saved itineraries (summary fields only), one page at a time.
+
+    Pass the returned `next_cursor` back as `cursor` to get the next page;
+    it is null on the last page. Use GET /api/itineraries/{id} for the full trip.
+    """
+    start_key = _decode_cursor(cursor, user["sub"]) if cursor else None
+    page, last_key = await trip_store.query_page(user["sub"], limit, start_key, TRIP_SUMMARY_FIELDS)
+    items = [_trip_from_item(item) for item in page]
+    return {
+        "success": True,
+        "data": items,
+        "next_cursor": _encode_cursor(last_key) if last_key else None,
+    }
 
 
-@app.post("/api/itineraries")
-async def save_trip(body: SaveItineraryRequest, user: dict = Depends(get_current_user)):
-    """Save an itinerary to DynamoDB for the authenticated user."""
-    table = dynamodb_resource.Table(DYNAMODB_TABLE)
-    trip_id = str(uuid.uuid4())
-    item = {
-        "userId": user["sub"],
-        "id": trip_id,
+@app.get("/api/itineraries/{trip_id}")
+async def get_saved_trip(trip_id: str, user: dict = Depends(get_current_user)):
+    """Load one saved itinerary in full."""
+    item = await trip_store.get(user["sub"], trip_id)
+    if not item:
+        raise HTTPException(status_code=404, detail="Trip not found")
+    return {"success": True, "data": _trip_from_item(item)}
+
+
+@app.post("/api/itineraries/{trip_id}/days")
+async def replan_saved_trip_days(trip_id: str, req: DayPlanRequest, request: Request,
+                                 user: dict = Depends(get_current_user)):
+    """Replan days of a saved itinerary and update its stored itinerary in place.
+
+    The update only lands if the trip wasn't changed meanwhile (409 otherwise).
+    """
+    item = await trip_store.get(user["sub"], trip_id)
+    if not item:
+        raise HTTPException(status_code=404, detail="Trip not found")
+    await admit(request, REQUEST_COSTS["day"] * max(1, len(set(req.days))))
+    trip = _trip_from_item(dict(item))
+    result = await replan_days(req, trip.get("itinerary") or {}, trip.get("tripForm") or {})
+    if not await trip_store.update_itinerary(item, result["data"]):
+        raise HTTPException(status_code=409, detail="Trip changed while replanning — reload it and try again")
+    return result
+
+
+def _build_trip_item(user_id: str, body: SaveItineraryRequest) -> dict:
+    highlights = (body.itinerary.get("trip_summary") or {}).get("highlights")
+    return {
+        "userId": user_id,
+        "id": body.id or str(uuid.uuid4()),
         "savedAt": datetime.utcnow().isoformat(),
         "destination": body.destination,
         "dates": body.dates,
         "travelers": body.travelers,
         "budget": body.budget,
         "title": body.title,
-        "itinerary_json": json.dumps(body.itinerary),
-        "tripForm_json": json.dumps(body.tripForm),
-    }
-    table.put_item(Item=item)
-    return {
-        "success": True,
-        "data": {
-            "userId": user["sub"], "id": trip_id,
-            "savedAt": item["savedAt"],
-            "destination": body.destination, "dates": body.dates,
-            "travelers": body.travelers, "budget": body.budget,
-            "title": body.title,
-            "itinerary": body.itinerary, "tripForm": body.tripForm,
-        }
+        # Small preview so the list endpoint never has to read the full itinerary
+        "highlights": [str(h) for h in highlights[:3]] if isinstance(highlights, list) else [],
+        **encode_trip_fields(body.itinerary, body.tripForm),
     }
 
 
+def _saved_trip_response(item: dict, body: SaveItineraryRequest) -> dict:
+    data = {k: item[k] for k in ("userId", "id", "savedAt", *TRIP_SUMMARY_FIELDS[1:])}
+    data.update(itinerary=body.itinerary, tripForm=body.tripForm)
+    return data
+
+
+@app.post("/api/itineraries")
+async def save_trip(body: SaveItineraryRequest, user: dict = Depends(get_current_user)):
+    """Save an itinerary to DynamoDB for the authenticated user."""
+    item = _build_trip_item(user["sub"], body)
+    await trip_store.put(item)
+    return {"success": True, "data": _saved_trip_response(item, body)}
+
+
 @app.delete("/api/itineraries/{trip_id}")
 async def delete_saved_trip(trip_id: str, user: dict = Depends(get_current_user)):
     """Delete a saved itinerary from DynamoDB."""
-    table = dynamodb_resource.Table(DYNAMODB_TABLE)
-    table.delete_item(Key={"userId": user["sub"], "id": trip_id})
+    await trip_store.delete(user["sub"], trip_id)
     return {"success": True}
 
 
+# ─── Bulk Saved-Trip Operations (import / export / delete) ───────────────────
+
+BULK_MAX_TRIPS = int(os.getenv("BULK_MAX_TRIPS", "200"))
+
+
+class BulkSaveRequest(BaseModel):
+    trips: List[SaveItineraryRequest]
+
+
+class BulkSelectRequest(BaseModel):
+    ids: List[str] = []
+    all: bool = False   # every trip the user has saved (e.g. account deletion / full export)
+
+
+async def _selected_ids(body: BulkSelectRequest, user_id: str) -> list:
+    if body.all:
+        return [item["id"] for item in await trip_store.query_all(user_id, fields=("id",))]
+    if len(body.ids) > BULK_MAX_TRIPS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_TRIPS} trips per request")
+    return body.ids
+
+
+@app.post("/api/itineraries/batch")
+async def bulk_save_trips(body: BulkSaveRequest, user: dict = Depends(get_current_user)):
+    """Save many itineraries at once (BatchWriteItem, 25 per call, run concurrently).
+
+    If only some were written the response is 207 with `failed` listing the
+    rest ({"index", "id"}); re-send those with their `id` so the retry
+    overwrites instead of duplicating.
+    """
+    if len(body.trips) > BULK_MAX_TRIPS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_TRIPS} trips per request")
+    items = [_build_trip_item(user["sub"], trip) for trip in body.trips]
+    try:
+        failed = set(await trip_store.batch_put(items))
+    except UnprocessedItemsError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    saved = [_saved_trip_response(item, trip) for item, trip in zip(items, body.trips) if item["id"] not in failed]
+    if not failed:
+        return {"success": True, "data": saved}
+    return JSONResponse(status_code=207, content={
+        "success": False, "data": saved,
+        "failed": [{"index": i, "id": item["id"]} for i, item in enumerate(items) if item["id"] in failed]})
+
+
+@app.post("/api/itineraries/batch-delete")
+async def bulk_delete_trips(body: BulkSelectRequest, user: dict = Depends(get_current_user)):
+    """Delete the given trips (or all of them with `all: true`).
+
+    `deleted` counts trips that existed and are gone; 207 with `failed` ids
+    if some couldn't be deleted.
+    """
+    ids = list(dict.fromkeys(await _selected_ids(body, user["sub"])))
+    try:
+        if not body.all:   # only count (and delete) trips that actually exist
+            found = {item["id"] for item in await trip_store.batch_get(user["sub"], ids, fields=("id",))}
+            ids = [trip_id for trip_id in ids if trip_id in found]
+        failed = await trip_store.batch_delete(user["sub"], ids)
+    except UnprocessedItemsError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    if not failed:
+        return {"success": True, "deleted": len(ids)}
+    return JSONResponse(status_code=207, content={"success": False, "deleted": len(ids) - len(failed),
+                                                  "failed": failed})
+
+
+@app.post("/api/itineraries/export")
+async def export_trips(body: BulkSelectRequest, user: dict = Depends(get_current_user)):
+    """Return the given trips (or all of them) in full (BatchGetItem, 100 per call)."""
+    ids = await _selected_ids(body, user["sub"])
+    try:
+        items = await trip_store.batch_get(user["sub"], ids)
+    except UnprocessedItemsError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return {"success": True, "data": [_trip_from_item(item) for item in items]}
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
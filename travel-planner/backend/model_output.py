@@ -0,0 +1,378 @@
+"""
+Structured model output
+Typed models for what Nova returns on each planning endpoint, a tolerant
+JSON extractor that repairs the usual damage (prose around the object,
+trailing commas, stray or missing brackets, bare words, truncation), and
+counters for how often output needed repair, a section retry, or failed.
+"""
+
+import json
+from collections import Counter
+from typing import Dict, List, Optional, Tuple, Type, Union
+
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
+
+from wire_format import expand_budget, expand_day, expand_itinerary, expand_packing
+
+_decoder = json.JSONDecoder(strict=False)   # tolerate raw newlines/tabs inside strings
+_LITERALS = {"true": "true", "false": "false", "null": "null",
+             "True": "true", "False": "false", "None": "null"}
+MAX_CUT_ATTEMPTS = 64
+
+
+class ModelOutputError(ValueError):
+    """Model output could not be turned into a valid object, even after repair/retry."""
+
+
+# ─── Output models ────────────────────────────────────────────────────────────
+# Only what the frontend relies on is required; unknown keys are kept, and
+# numbers are accepted where the prompt shows strings ("quantity": 2).
+
+class _Output(BaseModel):
+    model_config = ConfigDict(extra="allow", coerce_numbers_to_str=True)
+
+
+class Activity(_Output):
+    name: str
+    time: str = ""
+    description: str = ""
+    duration: str = ""
+    cost_estimate: str = ""
+    tips: str = ""
+    category: str = ""
+
+
+class Place(_Output):
+    name: str = ""
+    description: str = ""
+    type: str = ""
+    price_range: str = ""
+
+
+class Meals(_Output):
+    breakfast: Optional[Place] = None
+    lunch: Optional[Place] = None
+    dinner: Optional[Place] = None
+
+
+class DayPlan(_Output):
+    day: int
+    date: str = ""
+    title: str = ""
+    theme: str = ""
+    activities: List[Activity] = Field(min_length=1)
+    meals: Optional[Meals] = None
+    accommodation: Optional[Place] = None
+    transportation: str = ""
+    daily_budget_estimate: str = ""
+
+
+class TripSummary(_Output):
+    title: str
+    destination: str = ""
+    duration: Optional[int] = None
+    best_time_to_visit: str = ""
+    overall_theme: str = ""
+    highlights: List[str] = []
+
+
+class PracticalInfo(_Output):
+    getting_there: str = ""
+    local_transportation: str = ""
+    currency_tips: str = ""
+    safety_tips: str = ""
+    local_customs: str = ""
+    emergency_contacts: str = ""
+
+
+class BudgetBreakdown(_Output):
+    accommodation_total: str = ""
+    food_total: str = ""
+    activities_total: str = ""
+    transportation_total: str = ""
+    grand_total_per_person: str = ""
+
+
+class Itinerary(_Output):
+    trip_summary: TripSummary
+    daily_itinerary: List[DayPlan] = Field(min_length=1)
+    practical_info: PracticalInfo
+    budget_breakdown: BudgetBreakdown
+
+
+class PackingItem(_Output):
+    item: str
+    quantity: str = ""
+    essential: bool = False
+    notes: str = ""
+
+
+class PackingCategory(_Output):
+    name: str
+    icon: str = ""
+    items: List[PackingItem] = Field(min_length=1)
+
+
+class PackingList(_Output):
+    weather_advisory: str = ""
+    categories: List[PackingCategory] = Field(min_length=1)
+    tips: List[str] = []
+    carry_on_essentials: List[str] = []
+
+
+Amount = Union[float, str, None]
+
+
+class CostRange(_Output):
+    low: Amount = None
+    average: Amount = None
+    high: Amount = None
+    notes: str = ""
+
+
+class BudgetEstimate(_Output):
+    summary: str = ""
+    daily_breakdown: Dict[str, CostRange] = Field(min_length=1)
+    total_per_person: Dict[str, Amount] = Field(min_length=1)
+    total_for_group: Dict[str, Amount] = {}
+    money_saving_tips: List[str] = []
+    splurge_recommendations: List[str] = []
+    currency: str = ""
+
+
+class Tip(_Output):
+    title: str
+    description: str = ""
+    icon: str = ""
+
+
+class QuickTips(_Output):
+    tips: List[Tip] = Field(min_length=1)
+
+
+# Compact wire format (see wire_format.py) → the public shapes above
+_WIRE_EXPANDERS = {Itinerary: expand_itinerary, DayPlan: expand_day,
+                   PackingList: expand_packing, BudgetEstimate: expand_budget}
+
+
+def expand_wire(model: Type[BaseModel], data):
+    """`data` in `model`'s public shape, whether Nova wrote the wire or the verbose format."""
+    expand = _WIRE_EXPANDERS.get(model)
+    return expand(data) if expand and isinstance(data, dict) else data
+
+
+# ─── Tolerant extraction ──────────────────────────────────────────────────────
+
+def _drop_trailing_comma(out: list) -> None:
+    while out and out[-1] in " \t\r\n":
+        out.pop()
+    if out and out[-1] == ",":
+        out.pop()
+
+
+def _last_significant(out: list) -> str:
+    for piece in reversed(out):   # single characters, or whole quoted words / literals
+        if piece.strip():
+            return piece.strip()[-1]
+    return ""
+
+
+def _next_significant(text: str, i: int) -> str:
+    while i < len(text) and text[i] in " \t\r\n":
+        i += 1
+    return text[i] if i < len(text) else ""
+
+
+def _comma_if_missing(out: list) -> None:
+    """Insert the comma the model left out when a value directly follows another."""
+    last = _last_significant(out)
+    if last and (last in '"}]' or last.isalnum()):
+        out.append(",")
+
+
+def _close(out: list, stack: list) -> str:
+    text = "".join(out).rstrip()
+    if text.endswith(","):
+        text = text[:-1]
+    return text + "".join(reversed(stack))
+
+
+def repair_json(text: str, start: int) -> dict:
+    """Best-effort parse of the object starting at `text[start]`.
+
+    One pass that drops trailing commas and stray closers, closes brackets
+    the model forgot, adds missing commas between values, quotes bare words
+    and values (`"low": X`, `$20-30`, unquoted keys), converts single-quoted
+    strings, fixes numbers like `.5` and maps Python literals. If the text
+    was cut off (or the closed object still doesn't parse), the open
+    string/containers are closed and, failing that, the dangling partial
+    value is cut back to the last complete element.
+    """
+    out: list = []
+    stack: list = []
+    cuts: list = []   # (len(out), stack) at each point where a value may be cut off
+    in_str = esc = False
+    i, n = start, len(text)
+    while i < n:
+        c = text[i]
+        if in_str:
+            if esc:
+                esc = False
+            elif c == "\\":
+                esc = True
+            elif c == '"':
+                in_str = False
+            out.append(c)
+        elif c == '"':
+            _comma_if_missing(out)
+            in_str = True
+            out.append(c)
+        elif c == "'":
+            _comma_if_missing(out)
+            j = i + 1
+            while j < n and (text[j] != "'" or text[j - 1] == "\\"):
+                j += 1
+            out.append(json.dumps(text[i + 1:j].replace("\\'", "'")))
+            i = j + 1
+            continue
+        elif c in "{[":
+            _comma_if_missing(out)
+            stack.append("}" if c == "{" else "]")
+            out.append(c)
+            cuts.append((len(out), tuple(stack)))
+        elif c in "}]":
+            if c not in stack or (len(stack) == 1 and _next_significant(text, i + 1) in (",", '"')):
+                i += 1   # stray closer
+                continue
+            while stack[-1] != c:   # a closer the model forgot
+                _drop_trailing_comma(out)
+                out.append(stack.pop())
+            _drop_trailing_comma(out)
+            out.append(stack.pop())
+            if not stack:
+                try:
+                    return json.loads("".join(out), strict=False)
+                except ValueError:
+                    break   # complete but still invalid — same fallback as a cut-off response
+        elif c == ",":
+            if _last_significant(out) not in ",[{":
+                cuts.append((len(out), tuple(stack)))
+                out.append(c)
+        elif c.isdigit() or c in "-.":
+            _comma_if_missing(out)
+            j = i
+            while j < n and (text[j].isalnum() or text[j] in ".+-"):
+                j += 1
+            if _next_significant(text, j).isalpha():   # e.g. 2 hours
+                while j < n and text[j] not in ",}]\r\n":
+                    j += 1
+            number = text[i:j].rstrip()
+            if number.startswith((".", "-.")):
+                number = number.replace(".", "0.", 1)
+            try:
+                float(number)
+            except ValueError:
+                number = json.dumps(number)   # e.g. 20-30
+            out.append(number)
+            i = j
+            continue
+        elif c.isalpha() or c == "_":
+            j = i
+            while j < n and (text[j].isalnum() or text[j] in "_-"):
+                j += 1
+            word = text[i:j]
+            if _last_significant(out) in "{[,:":
+                out.append(_LITERALS.get(word, json.dumps(word)))
+            elif _last_significant(out) in '"}]':
+                out.extend([",", _LITERALS.get(word, json.dumps(word))])
+            else:
+                out.append(word)   # e.g. the exponent of 1e5
+            i = j
+            continue
+        elif c not in " \t\r\n:" and _last_significant(out) in ":[":
+            j = i
+            while j < n and text[j] not in ",}]\r\n":
+                j += 1
+            out.append(json.dumps(text[i:j].rstrip()))   # bare value, e.g. $20-30
+            i = j
+            continue
+        else:
+            out.append(c)
+        i += 1
+
+    # Truncated (or invalid once closed): close what's open, then fall back to earlier cut points
+    if in_str:
+        out.append('"')
+    try:
+        return json.loads(_close(out, stack), strict=False)
+    except ValueError:
+        pass
+    for pos, st in reversed(cuts[-MAX_CUT_ATTEMPTS:]):
+        try:
+            return json.loads(_close(out[:pos], list(st)), strict=False)
+        except ValueError:
+            continue
+    raise ModelOutputError("AI response JSON could not be repaired")
+
+
+def extract_json(text: str) -> Tuple[dict, bool]:
+    """Return (first JSON object in `text`, whether it needed repair)."""
+    start = text.find("{")
+    if start < 0:
+        raise ModelOutputError("No valid JSON in response")
+    try:
+        obj, _ = _decoder.raw_decode(text, start)
+        return obj, False
+    except ValueError:
+        return repair_json(text, start), True
+
+
+# ─── Validation ───────────────────────────────────────────────────────────────
+
+def broken_sections(model: Type[BaseModel], data: dict) -> List[str]:
+    """Top-level fields of `data` that are missing or fail validation."""
+    try:
+        model.model_validate(data)
+        return []
+    except ValidationError as e:
+        return list(dict.fromkeys(str(err["loc"][0]) for err in e.errors() if err["loc"]))
+
+
+def validate(model: Type[BaseModel], data: dict) -> dict:
+    """Validated, type-normalized copy of `data` in its original shape."""
+    return model.model_validate(data).model_dump(exclude_unset=True)
+
+
+def is_usable(model: Type[BaseModel], text: str) -> bool:
+    """True if `text` parses (without repair) into a valid `model` — i.e. safe to cache."""
+    try:
+        data, repaired = extract_json(text)
+    except ValueError:
+        return False
+    return not repaired and not broken_sections(model, expand_wire(model, data))
+
+
+class OutputStats:
+    """Per-endpoint counts of how model output turned out."""
+
+    OUTCOMES = ("clean", "repaired", "section_retry", "failed")
+
+    def __init__(self):
+        self._counts: Dict[str, Counter] = {}
+
+    def record(self, kind: str, outcome: str, sections_retried: int = 0) -> None:
+        counts = self._counts.setdefault(kind, Counter())
+        counts[outcome] += 1
+        counts["sections_retried"] += sections_retried
+
+    def stats(self) -> dict:
+        report = {}
+        for kind, counts in self._counts.items():
+            total = sum(counts[o] for o in self.OUTCOMES)
+            report[kind] = dict(
+                {o: counts[o] for o in self.OUTCOMES},
+                sections_retried=counts["sections_retried"],
+                repair_rate=round((total - counts["clean"] - counts["failed"]) / total, 4) if total else 0.0,
+                failure_rate=round(counts["failed"] / total, 4) if total else 0.0,
+            )
+        return report
@@ -0,0 +1,111 @@
+"""
+Nova model routing
+Picks Nova Micro / Lite / Pro per call from the task's preferred tier, its
+latency SLO and each model's observed speed (EWMA of output tokens/s), and
+orders the other models as fail-over candidates — throttled ones last.
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from nova_governor import AdmissionError, OverloadedError
+
+TIERS = ("micro", "lite", "pro")   # fastest/cheapest first
+
+THROTTLE_CODES = {"ThrottlingException", "TooManyRequestsException",
+                  "ServiceUnavailableException", "ModelNotReadyException"}
+
+
+def is_throttle(exc: BaseException) -> bool:
+    """True for Bedrock errors (or retries the governor gave up on) worth retrying on another
+    model. Local admission rejections aren't: Bedrock never saw the call."""
+    if isinstance(exc, AdmissionError):
+        return False
+    if isinstance(exc, OverloadedError):
+        return True
+    code = (getattr(exc, "response", None) or {}).get("Error", {}).get("Code")
+    return code in THROTTLE_CODES
+
+
+@dataclass
+class ModelProfile:
+    model_id: str
+    overhead_s: float         # request overhead / time to first token
+    output_tps: float         # prior output tokens per second
+    input_tps: float = 20000  # prefill speed
+
+
+@dataclass
+class Route:
+    tier: str                 # preferred tier
+    slo_s: float              # latency budget for one call
+    min_tier: str = "micro"   # cheapest tier acceptable when the SLO forces a downgrade
+
+
+class ModelRouter:
+    def __init__(self, profiles: Dict[str, ModelProfile], routes: Dict[str, Route],
+                 default_route: Route, adaptive: bool = True, throttle_cooldown: float = 15.0,
+                 alpha: float = 0.2):
+        self.profiles = profiles
+        self.routes = routes
+        self.default_route = default_route
+        self.adaptive = adaptive
+        self.throttle_cooldown = throttle_cooldown
+        self.alpha = alpha
+        self._tier_of = {p.model_id: tier for tier, p in profiles.items()}
+        self.tps = {tier: p.output_tps for tier, p in profiles.items()}   # observed EWMA
+        self.throttled_until = dict.fromkeys(profiles, 0.0)
+        self.counts = {tier: {"calls": 0, "throttled": 0} for tier in profiles}
+
+    def predict(self, tier: str, input_tokens: int, output_tokens: int) -> float:
+        p = self.profiles[tier]
+        return p.overhead_s + input_tokens / p.input_tps + output_tokens / self.tps[tier]
+
+    def candidates(self, task: str, input_tokens: int, output_tokens: int,
+                   tier: Optional[str] = None) -> List[str]:
+        """Model ids to try for `task`, best first."""
+        route = self.routes.get(task, self.default_route)
+        preferred = tier or route.tier
+        if not self.adaptive:
+            return [self.profiles[preferred].model_id]
+        # Fall back down to the task's cheapest acceptable tier first, then up
+        i, floor = TIERS.index(preferred), min(TIERS.index(route.min_tier), TIERS.index(preferred))
+        order = [t for t in (preferred, *reversed(TIERS[floor:i]), *TIERS[i + 1:]) if t in self.profiles]
+        # Predicted to blow the SLO (worst case, max_tokens): step down to the best tier that fits
+        if tier is None and self.predict(preferred, input_tokens, output_tokens) > route.slo_s:
+            for t in reversed(TIERS[floor:i]):
+                if t in self.profiles and self.predict(t, input_tokens, output_tokens) <= route.slo_s:
+                    order.remove(t)
+                    order.insert(0, t)
+                    break
+        now = time.monotonic()
+        order.sort(key=lambda t: self.throttled_until[t] > now)   # stable: throttled go last
+        return [self.profiles[t].model_id for t in order]
+
+    def observe(self, model_id: str, elapsed: float, usage: dict) -> None:
+        """Fold one completed call into the model's output-speed estimate."""
+        tier = self._tier_of.get(model_id)
+        if tier is None:
+            return
+        self.counts[tier]["calls"] += 1
+        out = usage.get("outputTokens", 0)
+        if out < 20:
+            return   # too short to say anything about throughput
+        busy = max(elapsed - self.profiles[tier].overhead_s, 0.05)
+        self.tps[tier] += self.alpha * (out / busy - self.tps[tier])
+
+    def throttled(self, model_id: str) -> None:
+        tier = self._tier_of.get(model_id)
+        if tier is not None:
+            self.throttled_until[tier] = time.monotonic() + self.throttle_cooldown
+            self.counts[tier]["throttled"] += 1
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            tier: dict(self.counts[tier], model_id=p.model_id, output_tps=round(self.tps[tier], 1),
+                       throttled=self.throttled_until[tier] > now,
+                       throttle_events=self.counts[tier]["throttled"])
+            for tier, p in self.profiles.items()
+        }
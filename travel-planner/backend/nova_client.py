@@ -0,0 +1,332 @@
+"""
+Async Amazon Nova client
+Runs the blocking boto3 Bedrock calls on a bounded thread pool so the
+FastAPI event loop keeps serving /health, photos, etc. while Nova generates.
+Requests use Nova's Converse-style body with prompt-cache points after the
+static prefix, and token usage (including cache reads/writes) is tallied
+per model.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import AsyncExitStack
+from typing import AsyncIterator, Callable, Optional, Sequence, Union
+
+from llm_cache import ResponseCache, make_key
+from nova_governor import NovaGovernor
+
+
+class NovaTimeoutError(TimeoutError):
+    """Raised when a Nova call does not finish within its timeout."""
+
+
+CACHE_POINT = {"cachePoint": {"type": "default"}}
+
+
+def user_turn(parts: Union[str, Sequence[str]], cache: bool = True) -> dict:
+    """A user message built from one or more text parts, most static first.
+
+    With `cache`, a prompt-cache point follows every part but the last, so
+    requests sharing the leading parts reuse Bedrock's cached prefix.
+    """
+    if isinstance(parts, str):
+        parts = [parts]
+    content = []
+    for i, part in enumerate(parts):
+        content.append({"text": part})
+        if cache and i < len(parts) - 1:
+            content.append(CACHE_POINT)
+    return {"role": "user", "content": content}
+
+
+def build_body(messages: list, system_prompt: Union[str, Sequence[str]], max_tokens: int = 2048,
+               temperature: float = 0.7, top_p: float = 0.9, cache_system: bool = False) -> dict:
+    """Build a Nova request body (Converse-style system / messages / inferenceConfig).
+
+    `system_prompt` may be several parts, most static first; with
+    `cache_system`, a cache point follows each of them.
+    """
+    system = []
+    for part in [system_prompt] if isinstance(system_prompt, str) else system_prompt:
+        system.append({"text": part})
+        if cache_system:
+            system.append(CACHE_POINT)
+    return {
+        "messages": messages,
+        "system": system,
+        "inferenceConfig": {
+            "maxTokens": max_tokens,
+            "temperature": temperature,
+            "topP": top_p,
+        }
+    }
+
+
+def output_text(result: dict) -> str:
+    """Pull the generated text out of a Nova invoke_model response."""
+    return result["output"]["message"]["content"][0]["text"]
+
+
+def stream_text(chunk: dict) -> str:
+    """Text delta carried by one decoded Nova response-stream chunk ('' for other events)."""
+    return chunk.get("contentBlockDelta", {}).get("delta", {}).get("text", "")
+
+
+def token_usage(usage: dict) -> dict:
+    """Normalize a Nova `usage` block (invoke_model or Converse field names)."""
+    return {
+        "input_tokens": usage.get("inputTokens", 0),
+        "output_tokens": usage.get("outputTokens", 0),
+        "cache_read_tokens": usage.get("cacheReadInputTokenCount", usage.get("cacheReadInputTokens", 0)),
+        "cache_write_tokens": usage.get("cacheWriteInputTokenCount", usage.get("cacheWriteInputTokens", 0)),
+    }
+
+
+class AsyncNovaClient:
+    """Shared, concurrency-capped async wrapper around a bedrock-runtime client.
+
+    At most `max_concurrency` invoke_model calls run at once; extra callers
+    wait for a slot. A slot is only freed once the underlying boto3 call has
+    actually returned, so timeouts/cancellations never let more than
+    `max_concurrency` requests hit Bedrock at the same time. `observer`, if
+    set, is told (model id, seconds on the wire, usage) after every call.
+
+    With a `governor`, each model also gets an adaptive window below that
+    cap, retryable errors are retried within the call's timeout, and
+    overload raises OverloadedError instead of queueing indefinitely.
+    """
+
+    def __init__(self, client, model_id: str, max_concurrency: int = 8, timeout: float = 90.0,
+                 cache: Optional[ResponseCache] = None,
+                 observer: Optional[Callable[[str, float, dict], None]] = None,
+                 governor: Optional[NovaGovernor] = None):
+        self.client = client
+        self.model_id = model_id
+        self.cache = cache
+        self.observer = observer
+        self.governor = governor
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.in_flight = 0
+        self._pending: dict = {}   # request key -> [shared task, waiter count]
+        self.coalescing = {"leaders": 0, "collapsed": 0, "abandoned": 0}
+        self.usage: dict = {}   # model id -> summed token_usage() + call count
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="nova")
+
+    def _invoke_sync(self, body: dict, model_id: str) -> dict:
+        response = self.client.invoke_model(
+            modelId=model_id,
+            body=json.dumps(body),
+            contentType="application/json",
+            accept="application/json"
+        )
+        return json.loads(response["body"].read())
+
+    def _record_usage(self, model_id: str, usage: dict) -> None:
+        totals = self.usage.setdefault(model_id, dict.fromkeys(
+            ("calls", "input_tokens", "output_tokens", "cache_read_tokens", "cache_write_tokens"), 0))
+        totals["calls"] += 1
+        for k, v in token_usage(usage).items():
+            totals[k] += v
+
+    def _release(self, _future) -> None:
+        self.in_flight -= 1
+        self._slots.release()
+
+    async def invoke(self, body: dict, model_id: Optional[str] = None,
+                     timeout: Optional[float] = None, cache_ttl: Optional[float] = None,
+                     cache_tag: str = "default", coalesce: bool = False,
+                     cache_if: Optional[Callable[[dict], bool]] = None) -> dict:
+        """Run invoke_model off the event loop and return the parsed response.
+
+        Cancelling the awaiting task drops the call if it has not started yet;
+        a call already on the wire is left to finish and its result discarded.
+        With `cache_ttl` set (and a cache configured) identical requests are
+        answered from the response cache without touching Bedrock; `cache_if`
+        can veto storing a result (e.g. malformed output). With `coalesce`,
+        identical requests already in flight share one call.
+        """
+        model_id = model_id or self.model_id
+        use_cache = bool(cache_ttl) and self.cache is not None
+        key = make_key(model_id, body) if use_cache or coalesce else None
+        if use_cache:
+            cached = await self.cache.get(key, cache_tag)
+            if cached is not None:
+                return cached
+
+        async def call() -> dict:
+            result = await self._invoke(body, model_id, timeout)
+            if use_cache and (cache_if is None or cache_if(result)):
+                await self.cache.set(key, result, cache_ttl)
+            return result
+
+        if coalesce:
+            return await self._single_flight(key, call)
+        return await call()
+
+    async def _single_flight(self, key: str, call) -> dict:
+        """Await the in-flight call for `key`, starting it if there is none.
+
+        Every waiter gets the same result or exception. A waiter being
+        cancelled doesn't disturb the others; when the last one leaves, the
+        shared call is cancelled too.
+        """
+        entry = self._pending.get(key)
+        if entry is None:
+            entry = [asyncio.create_task(call()), 0]
+            self._pending[key] = entry
+            entry[0].add_done_callback(
+                lambda _: self._pending.pop(key) if self._pending.get(key) is entry else None)
+            self.coalescing["leaders"] += 1
+        else:
+            self.coalescing["collapsed"] += 1
+        task = entry[0]
+        entry[1] += 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0 and not task.done():
+                if self._pending.get(key) is entry:
+                    del self._pending[key]
+                task.cancel()
+                self.coalescing["abandoned"] += 1
+
+    async def _invoke(self, body: dict, model_id: str, timeout: Optional[float]) -> dict:
+        limit = timeout or self.timeout
+        if self.governor is None:
+            return await self._invoke_once(body, model_id, limit)
+        return await self.governor.call(model_id, lambda left: self._invoke_once(body, model_id, left),
+                                        time.monotonic() + limit)
+
+    async def _invoke_once(self, body: dict, model_id: str, limit: float) -> dict:
+        loop = asyncio.get_running_loop()
+        await self._slots.acquire()
+        self.in_flight += 1
+        started = time.perf_counter()
+        try:
+            cf = self._executor.submit(self._invoke_sync, body, model_id)
+        except BaseException:
+            self._release(None)
+            raise
+        cf.add_done_callback(lambda f: loop.call_soon_threadsafe(self._release, f))
+
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(cf), limit)
+        except asyncio.TimeoutError:
+            raise NovaTimeoutError(f"Amazon Nova did not respond within {limit:.0f}s")
+        self._record_usage(model_id, result.get("usage", {}))
+        if self.observer:
+            self.observer(model_id, time.perf_counter() - started, result.get("usage", {}))
+        return result
+
+    async def generate(self, system_prompt: str, user_message: Union[str, Sequence[str]],
+                       max_tokens: int = 2048, temperature: float = 0.7,
+                       timeout: Optional[float] = None, cache_ttl: Optional[float] = None,
+                       cache_tag: str = "default", coalesce: bool = False,
+                       cache_if: Optional[Callable[[str], bool]] = None,
+                       prompt_cache: bool = True, model_id: Optional[str] = None) -> str:
+        """Single-turn convenience wrapper — returns just the generated text.
+
+        `user_message` may be several parts (static first); with
+        `prompt_cache`, cache points follow the system prompt and each part
+        but the last.
+        """
+        body = build_body(
+            [user_turn(user_message, cache=prompt_cache)],
+            system_prompt, max_tokens=max_tokens, temperature=temperature, cache_system=prompt_cache,
+        )
+        result = await self.invoke(body, model_id=model_id, timeout=timeout, cache_ttl=cache_ttl, cache_tag=cache_tag,
+                                   coalesce=coalesce,
+                                   cache_if=(lambda r: cache_if(output_text(r))) if cache_if else None)
+        return output_text(result)
+
+    def _stream_sync(self, body: dict, model_id: str, loop, queue: asyncio.Queue,
+                     stop: threading.Event) -> None:
+        """Pump the blocking Bedrock event stream into an asyncio queue.
+
+        Runs on the executor; `stop` lets the consumer abort mid-stream, which
+        closes the HTTP response so Bedrock stops generating.
+        """
+        put = lambda item: loop.call_soon_threadsafe(queue.put_nowait, item)
+        try:
+            response = self.client.invoke_model_with_response_stream(
+                modelId=model_id,
+                body=json.dumps(body),
+                contentType="application/json",
+                accept="application/json"
+            )
+            stream = response["body"]
+            try:
+                for event in stream:
+                    if stop.is_set():
+                        break
+                    if "chunk" not in event:
+                        continue
+                    chunk = json.loads(event["chunk"]["bytes"])
+                    text = stream_text(chunk)
+                    if text:
+                        put(text)
+                    elif "metadata" in chunk:
+                        put(chunk["metadata"].get("usage", {}))
+            finally:
+                close = getattr(stream, "close", None)
+                if close:
+                    close()
+            put(None)
+        except BaseException as e:
+            put(e)
+
+    async def stream(self, body: dict, model_id: Optional[str] = None,
+                     first_token_timeout: Optional[float] = None) -> AsyncIterator[str]:
+        """Yield text deltas as Nova generates them.
+
+        Holds one concurrency slot (and governor permit) for the life of the
+        stream; streams are not retried. Closing the generator (e.g. the
+        client disconnected) aborts the upstream stream.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+        model_id = model_id or self.model_id
+        limit = first_token_timeout or self.timeout
+        async with AsyncExitStack() as permit:
+            if self.governor is not None:
+                await permit.enter_async_context(self.governor.slot(model_id, time.monotonic() + limit,
+                                                                      stream=True))
+            await self._slots.acquire()
+            self.in_flight += 1
+            started = time.perf_counter()
+            try:
+                cf = self._executor.submit(self._stream_sync, body, model_id, loop, queue, stop)
+            except BaseException:
+                self._release(None)
+                raise
+            cf.add_done_callback(lambda f: loop.call_soon_threadsafe(self._release, f))
+
+            try:
+                while True:
+                    try:
+                        item = await asyncio.wait_for(queue.get(), limit)
+                    except asyncio.TimeoutError:
+                        raise NovaTimeoutError(f"Amazon Nova stream stalled for more than {limit:.0f}s")
+                    limit = self.timeout
+                    if item is None:
+                        return
+                    if isinstance(item, BaseException):
+                        raise item
+                    if isinstance(item, dict):   # trailing usage metadata
+                        self._record_usage(model_id, item)
+                        if self.observer:
+                            self.observer(model_id, time.perf_counter() - started, item)
+                        continue
+                    yield item
+            finally:
+                stop.set()
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
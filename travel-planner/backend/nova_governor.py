@@ -0,0 +1,268 @@
+"""
+Bedrock call governor
+Per-model AIMD concurrency window (grows on success, shrinks on throttling),
+deadline-aware admission queue, jittered exponential backoff for retryable
+Bedrock errors, and a circuit breaker that fails fast while a model keeps
+throttling or timing out. Overload surfaces as OverloadedError carrying a
+Retry-After hint instead of a bare 500.
+"""
+
+import asyncio
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Dict, Optional
+
+# Bedrock errors that mean "busy, try again" — they shrink the window and trip the breaker
+RETRYABLE_CODES = {"ThrottlingException", "TooManyRequestsException", "ServiceUnavailableException",
+                   "ModelNotReadyException", "ModelTimeoutException", "InternalServerException"}
+
+
+class OverloadedError(Exception):
+    """A model can't take this call within its deadline; retry after `retry_after` seconds."""
+
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionError(OverloadedError):
+    """Rejected by this process's own admission control; Bedrock was never called."""
+
+
+class CircuitOpenError(AdmissionError):
+    """The model's circuit breaker is open — failing fast without calling Bedrock."""
+
+
+def error_code(exc: BaseException) -> Optional[str]:
+    return (getattr(exc, "response", None) or {}).get("Error", {}).get("Code")
+
+
+def is_retryable(exc: BaseException) -> bool:
+    return error_code(exc) in RETRYABLE_CODES or isinstance(exc, TimeoutError)
+
+
+class AIMDLimiter:
+    """Concurrency window: +1 per window of successes, ×`decrease` on overload.
+
+    Callers beyond the window queue FIFO. A caller whose predicted wait plus
+    service time won't fit its deadline (or exceeds `max_queue_wait`) is
+    rejected up front rather than left to time out in the queue.
+    """
+
+    def __init__(self, max_limit: int, initial: Optional[int] = None, min_limit: int = 1,
+                 decrease: float = 0.75, max_queue_wait: float = 10.0):
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.limit = float(initial or max_limit)
+        self.decrease = decrease
+        self.max_queue_wait = max_queue_wait
+        self.in_flight = 0
+        self.service_s = 0.0          # EWMA of successful call time (what queue waits are predicted from)
+        self.stream_service_s = 0.0   # same for streams, which hold a permit until their last token
+        self._waiters: deque = deque()
+        self._last_decrease = 0.0
+        self.rejected = 0
+
+    @property
+    def capacity(self) -> int:
+        return max(self.min_limit, int(self.limit))
+
+    def predicted_wait(self) -> float:
+        return (len(self._waiters) + 1) / self.capacity * self.service_s
+
+    async def acquire(self, deadline: float) -> None:
+        if self.in_flight < self.capacity and not self._waiters:
+            self.in_flight += 1
+            return
+        wait = self.predicted_wait()
+        remaining = deadline - time.monotonic()
+        if wait > self.max_queue_wait or wait + self.service_s > remaining:
+            self.rejected += 1
+            raise AdmissionError("Amazon Nova is at capacity — try again shortly", retry_after=wait)
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        try:
+            await asyncio.wait_for(asyncio.shield(fut), min(remaining, self.max_queue_wait))
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            self._abandon(fut)
+            raise AdmissionError("Amazon Nova queue wait exceeded the deadline",
+                                 retry_after=self.predicted_wait())
+        except BaseException:
+            self._abandon(fut)
+            raise
+
+    def _abandon(self, fut) -> None:
+        if fut.done() and not fut.cancelled():
+            self.release(None)   # woken just as we gave up — hand the permit on
+        else:
+            fut.cancel()
+            if fut in self._waiters:
+                self._waiters.remove(fut)
+
+    def release(self, outcome: Optional[str], elapsed: float = 0.0, stream: bool = False) -> None:
+        """Return a permit; `outcome` is "ok", "overload", or None (no signal)."""
+        self.in_flight -= 1
+        now = time.monotonic()
+        if outcome == "ok":
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            if stream:
+                self.stream_service_s = _ewma(self.stream_service_s, elapsed)
+            else:
+                self.service_s = _ewma(self.service_s, elapsed)
+        elif outcome == "overload" and now - self._last_decrease > max(self.service_s, 0.1):
+            # At most one cut per round trip — one burst of throttles is one signal
+            self.limit = max(self.min_limit, self.limit * self.decrease)
+            self._last_decrease = now
+        while self._waiters and self.in_flight < self.capacity:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                self.in_flight += 1
+                fut.set_result(None)
+
+
+def _ewma(current: float, sample: float) -> float:
+    return sample if not current else current + 0.2 * (sample - current)
+
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive overload failures spanning at least
+    `min_span` seconds without a success; one probe call after `cooldown`.
+
+    The span keeps a burst of throttles during a spike (which the AIMD window
+    handles) from looking like an outage.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, threshold: int = 5, cooldown: float = 20.0, min_span: float = 1.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.min_span = min_span
+        self.state = self.CLOSED
+        self.failures = 0
+        self.first_failure = 0.0
+        self.opened_at = 0.0
+        self.trips = 0
+        self._probing = False
+
+    def check(self) -> bool:
+        """Raise CircuitOpenError unless calls may pass; True if this caller is the probe."""
+        if self.state == self.CLOSED:
+            return False
+        wait = self.opened_at + self.cooldown - time.monotonic()
+        if self.state == self.OPEN and wait <= 0:
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        raise CircuitOpenError("Amazon Nova model is unavailable — try again shortly",
+                               retry_after=max(wait, 1.0))
+
+    def record(self, ok: Optional[bool], probe: bool = False) -> None:
+        """ok=True success, False overload failure, None no signal (e.g. cancelled)."""
+        if probe:
+            self._probing = False
+        now = time.monotonic()
+        if ok:
+            self.state, self.failures = self.CLOSED, 0
+        elif ok is False:
+            if not self.failures:
+                self.first_failure = now
+            self.failures += 1
+            if probe or (self.failures >= self.threshold and now - self.first_failure >= self.min_span):
+                if self.state != self.OPEN:
+                    self.trips += 1
+                self.state, self.opened_at = self.OPEN, now
+
+
+class NovaGovernor:
+    """One AIMD window + circuit breaker per model id, plus the retry policy."""
+
+    def __init__(self, max_limit: int, initial_limit: Optional[int] = None, max_retries: int = 2,
+                 backoff_base: float = 0.2, backoff_cap: float = 4.0, breaker_threshold: int = 5,
+                 breaker_cooldown: float = 20.0, max_queue_wait: float = 10.0):
+        self.max_limit = max_limit
+        self.initial_limit = initial_limit
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.max_queue_wait = max_queue_wait
+        self._limiters: Dict[str, AIMDLimiter] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self.retries = 0
+
+    def _for(self, model_id: str):
+        if model_id not in self._limiters:
+            self._limiters[model_id] = AIMDLimiter(self.max_limit, self.initial_limit,
+                                                   max_queue_wait=self.max_queue_wait)
+            self._breakers[model_id] = CircuitBreaker(self.breaker_threshold, self.breaker_cooldown)
+        return self._limiters[model_id], self._breakers[model_id]
+
+    @asynccontextmanager
+    async def slot(self, model_id: str, deadline: float, stream: bool = False):
+        """Hold one permit for `model_id`; the block's outcome feeds the window and breaker.
+
+        A `stream` block's duration goes to its own EWMA, not the one queue
+        waits are predicted from.
+        """
+        limiter, breaker = self._for(model_id)
+        probe = breaker.check()
+        try:
+            await limiter.acquire(deadline)
+        except BaseException:
+            breaker.record(None, probe)
+            raise
+        started = time.monotonic()
+        try:
+            yield
+        except Exception as e:
+            overload = is_retryable(e)
+            limiter.release("overload" if overload else None)
+            breaker.record(False if overload else None, probe)
+            raise
+        except BaseException:
+            limiter.release(None)
+            breaker.record(None, probe)
+            raise
+        limiter.release("ok", time.monotonic() - started, stream)
+        breaker.record(True, probe)
+
+    async def call(self, model_id: str, attempt: Callable[[float], Awaitable], deadline: float):
+        """Run `attempt(seconds_left)`, retrying retryable errors with full-jitter backoff.
+
+        When retries or the deadline run out on a retryable Bedrock error,
+        raises OverloadedError so callers can fail over or answer 429. A
+        timeout has spent the deadline already and is re-raised as is.
+        """
+        for n in range(self.max_retries + 1):
+            try:
+                async with self.slot(model_id, deadline):
+                    return await attempt(deadline - time.monotonic())
+            except Exception as e:
+                if not is_retryable(e) or isinstance(e, TimeoutError):
+                    raise
+                delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** n))
+                if n == self.max_retries or time.monotonic() + delay >= deadline:
+                    raise OverloadedError(f"Amazon Nova is busy ({error_code(e) or 'timeout'})",
+                                          retry_after=max(delay, 1.0)) from e
+                self.retries += 1
+                await asyncio.sleep(delay)
+
+    def stats(self) -> dict:
+        return {
+            "retries": self.retries,
+            "models": {
+                model_id: {"limit": round(lim.limit, 2), "in_flight": lim.in_flight,
+                           "queued": len(lim._waiters), "rejected": lim.rejected,
+                           "service_ms": round(lim.service_s * 1000, 1),
+                           "stream_service_ms": round(lim.stream_service_s * 1000, 1),
+                           "breaker": self._breakers[model_id].state,
+                           "breaker_trips": self._breakers[model_id].trips}
+                for model_id, lim in self._limiters.items()
+            },
+        }
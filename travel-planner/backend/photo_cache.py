@@ -0,0 +1,109 @@
+"""
+Destination photo cache
+Bounded LRU (entries + bytes) with an optional SQLite file shared by all
+uvicorn workers. Entries go stale after their TTL but can still be served
+while a background refresh runs; empty/partial results get a short TTL so a
+transient Wikipedia failure isn't remembered for long.
+"""
+
+import asyncio
+import json
+import re
+import sqlite3
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+
+def normalize_destination(destination: str) -> str:
+    """Cache key for a destination: "  Paris ,France." and "paris, france" share
+    one entry; "Paris, Texas" and "Paris" do not."""
+    key = re.sub(r"\s*,\s*", ", ", destination.casefold())
+    return re.sub(r"\s+", " ", key).strip(" \t\r\n.,;:!?-")
+
+
+class PhotoCache:
+    """The LRU lives on the event loop; SQLite calls run on one worker thread,
+    so a busy shared file never blocks the loop."""
+
+    FRESH = "fresh"
+    STALE = "stale"
+
+    def __init__(self, max_entries: int = 2000, max_bytes: int = 5_000_000,
+                 stale_ttl: float = 30 * 86400, db_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.stale_ttl = stale_ttl   # how long past expiry an entry may still be served
+        self._mem: OrderedDict = OrderedDict()   # key -> (fresh_until, value, size)
+        self._bytes = 0
+        self._sets = 0
+        self.counters = {"fresh_hits": 0, "stale_hits": 0, "misses": 0, "evictions": 0}
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None,
+                                       timeout=2)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS photo_cache "
+                "(key TEXT PRIMARY KEY, fresh_until REAL, value TEXT)"
+            )
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="photo-cache")
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def get(self, key: str) -> Tuple[Optional[list], Optional[str]]:
+        """Return (photos, "fresh" | "stale") or (None, None) on a miss."""
+        now = time.time()
+        entry = self._mem.get(key)
+        if (entry is None or entry[0] <= now) and self._db is not None:
+            # Another worker may have filled or refreshed it
+            row = await self._run(self._read, key)
+            if row and (entry is None or row[0] > entry[0]):
+                entry = self._put_mem(key, row[0], json.loads(row[1]), len(row[1]))
+        if entry is None or entry[0] + self.stale_ttl <= now:
+            self.counters["misses"] += 1
+            return None, None
+        if key in self._mem:
+            self._mem.move_to_end(key)
+        if entry[0] > now:
+            self.counters["fresh_hits"] += 1
+            return entry[1], self.FRESH
+        self.counters["stale_hits"] += 1
+        return entry[1], self.STALE
+
+    def _read(self, key: str) -> Optional[tuple]:
+        return self._db.execute("SELECT fresh_until, value FROM photo_cache WHERE key = ?", (key,)).fetchone()
+
+    def _put_mem(self, key: str, fresh_until: float, value: list, size: int) -> tuple:
+        old = self._mem.pop(key, None)
+        if old:
+            self._bytes -= old[2]
+        entry = (fresh_until, value, size)
+        self._mem[key] = entry
+        self._bytes += size
+        while self._mem and (len(self._mem) > self.max_entries or self._bytes > self.max_bytes):
+            _, evicted = self._mem.popitem(last=False)
+            self._bytes -= evicted[2]
+            self.counters["evictions"] += 1
+        return entry
+
+    async def set(self, key: str, value: list, ttl: float) -> None:
+        raw = json.dumps(value)
+        fresh_until = time.time() + ttl
+        self._put_mem(key, fresh_until, value, len(raw))
+        if self._db is not None:
+            self._sets += 1
+            await self._run(self._write, key, fresh_until, raw, self._sets % 500 == 0)
+
+    def _write(self, key: str, fresh_until: float, raw: str, purge: bool) -> None:
+        self._db.execute("INSERT OR REPLACE INTO photo_cache (key, fresh_until, value) VALUES (?, ?, ?)",
+                         (key, fresh_until, raw))
+        if purge:
+            self._db.execute("DELETE FROM photo_cache WHERE fresh_until + ? <= ?",
+                             (self.stale_ttl, time.time()))
+
+    def stats(self) -> dict:
+        return dict(self.counters, entries=len(self._mem), bytes=self._bytes,
+                    persistent=self._db is not None)
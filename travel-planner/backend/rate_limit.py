@@ -0,0 +1,298 @@
+"""
+Shared, cost-weighted rate limiting
+Token buckets measured in estimated output tokens instead of request counts,
+one per caller (Cognito sub, else client IP) plus an optional global bucket
+sized to the Bedrock quota. Backends: in-process memory, a SQLite file
+shared by every uvicorn worker on the host, or any Redis-protocol server
+(Redis, Valkey, KeyDB...) for several hosts — spoken directly over RESP, no
+client library needed.
+"""
+
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, NamedTuple, Optional, Tuple
+from urllib.parse import unquote, urlparse
+
+
+class Bucket(NamedTuple):
+    key: str
+    rate: float    # tokens refilled per second
+    burst: float   # capacity
+
+
+def _refill(tokens: float, ts: float, bucket: Bucket, now: float) -> float:
+    return min(bucket.burst, tokens + max(0.0, now - ts) * bucket.rate)
+
+
+def _settle(levels: List[float], buckets: List[Bucket], cost: float) -> float:
+    """Seconds until every bucket can pay `cost` (0 = now)."""
+    wait = 0.0
+    for tokens, b in zip(levels, buckets):
+        if tokens < cost:
+            wait = max(wait, (cost - tokens) / b.rate)
+    return wait
+
+
+# Buckets untouched for longer than it takes to refill from empty are full —
+# the same as having no entry — and are dropped every PURGE_EVERY takes
+PURGE_EVERY = 1000
+
+
+class MemoryBackend:
+    """Per-process buckets — fine for a single worker."""
+
+    def __init__(self):
+        self._state: dict = {}   # key -> (tokens, ts)
+        self._refill_s = 0.0     # longest empty-to-full time seen
+        self._takes = 0
+
+    async def take(self, buckets: List[Bucket], cost: float) -> float:
+        now = time.monotonic()
+        levels = [_refill(*self._state.get(b.key, (b.burst, now)), b, now) for b in buckets]
+        wait = _settle(levels, buckets, cost)
+        if not wait:
+            for tokens, b in zip(levels, buckets):
+                self._state[b.key] = (tokens - cost, now)
+        self._refill_s = max(self._refill_s, *(b.burst / b.rate for b in buckets))
+        self._takes += 1
+        if self._takes % PURGE_EVERY == 0:
+            self._state = {k: v for k, v in self._state.items() if v[1] > now - self._refill_s}
+        return wait
+
+
+class SQLiteBackend:
+    """Buckets in a SQLite file; BEGIN IMMEDIATE makes check-and-take atomic across workers.
+
+    The transaction runs on a single background thread, so waiting for another
+    worker's lock never stalls the event loop.
+    """
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rate-limit")
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=2)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS rate_buckets (key TEXT PRIMARY KEY, tokens REAL, ts REAL)")
+        self._refill_s = 0.0
+        self._takes = 0
+
+    async def take(self, buckets: List[Bucket], cost: float) -> float:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._take_sync, buckets, cost)
+
+    def _take_sync(self, buckets: List[Bucket], cost: float) -> float:
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()   # wall clock: shared by every process
+                levels = []
+                for b in buckets:
+                    row = self._db.execute("SELECT tokens, ts FROM rate_buckets WHERE key = ?",
+                                           (b.key,)).fetchone()
+                    levels.append(_refill(*(row or (b.burst, now)), b, now))
+                wait = _settle(levels, buckets, cost)
+                if not wait:
+                    self._db.executemany(
+                        "INSERT OR REPLACE INTO rate_buckets (key, tokens, ts) VALUES (?, ?, ?)",
+                        [(b.key, tokens - cost, now) for tokens, b in zip(levels, buckets)])
+                self._refill_s = max(self._refill_s, *(b.burst / b.rate for b in buckets))
+                self._takes += 1
+                if self._takes % PURGE_EVERY == 0:
+                    self._db.execute("DELETE FROM rate_buckets WHERE ts <= ?", (now - self._refill_s,))
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return wait
+
+
+# KEYS = bucket keys; ARGV = cost, then rate, burst per key. Uses the server
+# clock, returns the wait as a string (Lua numbers come back truncated).
+_TAKE_SCRIPT = """
+local cost = tonumber(ARGV[1])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1e6
+local wait, levels = 0, {}
+for i, key in ipairs(KEYS) do
+  local rate, burst = tonumber(ARGV[2 * i]), tonumber(ARGV[2 * i + 1])
+  local s = redis.call('HMGET', key, 'tokens', 'ts')
+  local tokens = math.min(burst, (tonumber(s[1]) or burst) + math.max(0, now - (tonumber(s[2]) or now)) * rate)
+  levels[i] = tokens
+  if tokens < cost then wait = math.max(wait, (cost - tokens) / rate) end
+end
+if wait > 0 then return tostring(wait) end
+for i, key in ipairs(KEYS) do
+  local rate, burst = tonumber(ARGV[2 * i]), tonumber(ARGV[2 * i + 1])
+  redis.call('HSET', key, 'tokens', levels[i] - cost, 'ts', now)
+  redis.call('EXPIRE', key, math.ceil(burst / rate) + 60)
+end
+return '0'
+"""
+
+
+class RedisError(Exception):
+    """Error reply from the Redis-protocol server."""
+
+
+class RedisBackend:
+    """Buckets on a Redis-protocol server, updated atomically by a Lua script.
+
+    `url` is redis://[:password@]host[:port][/db]. One connection per worker,
+    reconnected on failure.
+    """
+
+    def __init__(self, url: str, timeout: float = 0.5):
+        u = urlparse(url)
+        self.host, self.port = u.hostname or "localhost", u.port or 6379
+        self.password = unquote(u.password) if u.password else None
+        self.db = int(u.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self._sha = hashlib.sha1(_TAKE_SCRIPT.encode()).hexdigest()
+        self._conn: Optional[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = None
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def _encode(*args) -> bytes:
+        out = [b"*%d\r\n" % len(args)]
+        for a in args:
+            a = a if isinstance(a, bytes) else str(a).encode()
+            out.append(b"$%d\r\n%s\r\n" % (len(a), a))
+        return b"".join(out)
+
+    async def _reply(self, reader: asyncio.StreamReader):
+        line = (await reader.readline()).rstrip(b"\r\n")
+        if not line:
+            raise ConnectionError("Redis connection closed")
+        kind, rest = line[:1], line[1:]
+        if kind == b"+":
+            return rest.decode()
+        if kind == b"-":
+            raise RedisError(rest.decode())
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            n = int(rest)
+            return None if n < 0 else (await reader.readexactly(n + 2))[:-2].decode()
+        if kind == b"*":
+            n = int(rest)
+            return None if n < 0 else [await self._reply(reader) for _ in range(n)]
+        raise ConnectionError(f"Unexpected Redis reply: {line[:40]!r}")
+
+    async def _command(self, *args):
+        if self._conn is None:
+            self._conn = await asyncio.open_connection(self.host, self.port)
+            try:
+                if self.password:
+                    await self._roundtrip("AUTH", self.password)
+                if self.db:
+                    await self._roundtrip("SELECT", self.db)
+            except BaseException:
+                self._close()
+                raise
+        return await self._roundtrip(*args)
+
+    async def _roundtrip(self, *args):
+        reader, writer = self._conn
+        writer.write(self._encode(*args))
+        await writer.drain()
+        return await self._reply(reader)
+
+    async def take(self, buckets: List[Bucket], cost: float) -> float:
+        args = [len(buckets), *(b.key for b in buckets), cost]
+        for b in buckets:
+            args += [b.rate, b.burst]
+        async with self._lock:
+            try:
+                try:
+                    wait = await asyncio.wait_for(self._command("EVALSHA", self._sha, *args), self.timeout)
+                except RedisError as e:
+                    if not str(e).startswith("NOSCRIPT"):
+                        raise
+                    wait = await asyncio.wait_for(self._command("EVAL", _TAKE_SCRIPT, *args), self.timeout)
+            except RedisError:
+                raise
+            except BaseException:
+                self._close()   # timed out / cancelled mid-reply: the stream is out of sync
+                raise
+        return float(wait)
+
+    def _close(self) -> None:
+        if self._conn is not None:
+            self._conn[1].close()
+            self._conn = None
+
+
+class CostTooHighError(Exception):
+    """A request costs more than a bucket can ever hold, so it can never be admitted."""
+
+    def __init__(self, cost: float, burst: float):
+        super().__init__(f"Request costs {cost:.0f} tokens, more than the {burst:.0f} rate-limit burst")
+        self.cost = cost
+        self.burst = burst
+
+
+def backend_from_url(url: Optional[str]):
+    """"" -> memory, "sqlite:///path/to/file.db" -> SQLite, "redis://..." -> Redis protocol."""
+    if not url:
+        return MemoryBackend()
+    if url.startswith("sqlite:///"):
+        return SQLiteBackend(url[len("sqlite:///"):])
+    if url.startswith(("redis://", "valkey://")):
+        return RedisBackend(url)
+    raise ValueError(f"Unsupported rate-limit backend: {url}")
+
+
+class RateLimiter:
+    """Admits a request if the caller's bucket (and the global one) can pay its cost.
+
+    Costs and rates are in estimated output tokens (rates per minute). If the
+    backend is unreachable the request is let through — the Bedrock governor
+    still protects the model.
+    """
+
+    def __init__(self, backend, user_per_min: float, user_burst: float,
+                 global_per_min: float = 0, global_burst: float = 0, prefix: str = "rl"):
+        self.backend = backend
+        self.enabled = True
+        self.prefix = prefix
+        self.user = (user_per_min / 60.0, user_burst or user_per_min)
+        self.global_ = (global_per_min / 60.0, global_burst or global_per_min) if global_per_min else None
+        self.counters = {"admitted": 0, "rejected": 0, "too_large": 0, "tokens_admitted": 0, "backend_errors": 0}
+
+    async def admit(self, key: str, cost: float) -> float:
+        """0 if admitted (and charged), else seconds until it would be.
+
+        Raises CostTooHighError for a cost above a bucket's burst.
+        """
+        if not self.enabled:
+            return 0.0
+        buckets = [Bucket(f"{self.prefix}:{key}", *self.user)]
+        if self.global_:
+            buckets.append(Bucket(f"{self.prefix}:*", *self.global_))
+        burst = self.max_cost
+        if cost > burst:
+            self.counters["too_large"] += 1
+            raise CostTooHighError(cost, burst)
+        try:
+            wait = await self.backend.take(buckets, cost)
+        except Exception as e:
+            self.counters["backend_errors"] += 1
+            print(f"⚠  Rate limiter backend: {e}")
+            return 0.0
+        if wait:
+            self.counters["rejected"] += 1
+            return max(wait, 0.001)
+        self.counters["admitted"] += 1
+        self.counters["tokens_admitted"] += cost
+        return 0.0
+
+    @property
+    def max_cost(self) -> float:
+        """The largest cost a full bucket can pay."""
+        return min(self.user[1], self.global_[1]) if self.global_ else self.user[1]
+
+    def stats(self) -> dict:
+        return dict(self.counters, backend=type(self.backend).__name__)
@@ -0,0 +1,229 @@
+"""
+Performance telemetry
+Counters, gauges and histograms rendered in the Prometheus text format
+without a client library, an ASGI middleware timing every request by route
+template, and optional tracing spans written as one JSON log line each
+(trace id from X-Request-ID, else generated) so a slow request can be split
+into its Bedrock, Wikipedia, DynamoDB and JWT parts.
+"""
+
+import bisect
+import json
+import logging
+import math
+import random
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Seconds — from a cache hit to a long itinerary
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0, 80.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _num(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (),
+                 fn: Optional[Callable[[], Dict[Tuple, float]]] = None):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.fn = fn   # read at scrape time: {label values: value}, for state kept elsewhere
+        self._values: Dict[Tuple, float] = {}
+
+    def _lines(self) -> List[str]:
+        values = self.fn() if self.fn else self._values
+        return [f"{self.name}{_labels(self.label_names, k)} {_num(v)}" for k, v in values.items()]
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}", *self._lines()]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, by: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + by
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, *labels) -> None:
+        self._values[labels] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple, list] = {}   # labels -> [per-bucket counts (+Inf last), sum, count]
+
+    def observe(self, value: float, *labels) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def _lines(self) -> List[str]:
+        lines = []
+        for labels, (counts, total, count) in self._series.items():
+            cumulative = 0
+            for bound, n in zip((*self.buckets, math.inf), counts):
+                cumulative += n
+                le = f'le="{_num(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {_num(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {count}")
+        return lines
+
+
+class Registry:
+    """The metrics one worker exposes on /metrics."""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = (), fn=None) -> Counter:
+        return self._add(Counter(name, help, labels, fn))
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = (), fn=None) -> Gauge:
+        return self._add(Gauge(name, help, labels, fn))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labels, buckets))
+
+    def render(self) -> str:
+        return "\n".join(line for m in self._metrics for line in m.render()) + "\n"
+
+
+# (trace id, current span id) for this request; None when not traced
+_trace: ContextVar[Optional[Tuple[str, str]]] = ContextVar("trace", default=None)
+
+
+class Tracer:
+    """Tracing spans as structured logs: one JSON line per finished span.
+
+    A request is traced with probability `sample_rate`; spans opened while
+    handling it (including in tasks it spawns) share its trace id and point
+    at their parent span.
+    """
+
+    def __init__(self, enabled: bool = False, sample_rate: float = 1.0, logger: str = "tripchronicles.trace"):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.log = logging.getLogger(logger)
+        if enabled and not self.log.handlers:
+            handler = logging.StreamHandler(sys.stdout)
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self.log.addHandler(handler)
+            self.log.setLevel(logging.INFO)
+            self.log.propagate = False
+
+    @staticmethod
+    def trace_id() -> Optional[str]:
+        current = _trace.get()
+        return current[0] if current else None
+
+    def record(self, name: str, duration: float, **attrs) -> None:
+        """Log a span that was timed elsewhere (e.g. by a client's observer)."""
+        current = _trace.get()
+        if current is None:
+            return
+        self._emit(current[0], uuid.uuid4().hex[:16], current[1], name, time.time() - duration, duration, attrs)
+
+    @contextmanager
+    def span(self, name: str, root_id: Optional[str] = None, **attrs):
+        """Time the block as a span; yields its attrs dict so the block can add to it.
+
+        `root_id` starts a new trace (sampled) when none is active.
+        """
+        current = _trace.get()
+        if current is None and (root_id is None or not self.enabled or random.random() >= self.sample_rate):
+            yield attrs
+            return
+        trace_id, parent = current if current else (root_id, None)
+        span_id = uuid.uuid4().hex[:16]
+        token = _trace.set((trace_id, span_id))
+        started, wall = time.perf_counter(), time.time()
+        try:
+            yield attrs
+        except BaseException as e:
+            attrs["error"] = type(e).__name__
+            raise
+        finally:
+            _trace.reset(token)
+            self._emit(trace_id, span_id, parent, name, wall, time.perf_counter() - started, attrs)
+
+    def _emit(self, trace_id, span_id, parent, name, start, duration, attrs) -> None:
+        self.log.info(json.dumps({
+            "trace_id": trace_id, "span_id": span_id, "parent_id": parent, "name": name,
+            "start": round(start, 6), "duration_ms": round(duration * 1000, 3), **attrs,
+        }, default=str))
+
+
+class MetricsMiddleware:
+    """ASGI middleware: request latency by method / route template / status,
+    plus the root tracing span of each request.
+
+    Streaming responses are timed until their last byte. Unmatched paths
+    share one "unmatched" label so scanners can't blow up cardinality.
+    """
+
+    def __init__(self, app, histogram: Histogram, tracer: Tracer):
+        self.app = app
+        self.histogram = histogram
+        self.tracer = tracer
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        status = 500
+        request_id = dict(scope["headers"]).get(b"x-request-id", b"").decode()[:64] or uuid.uuid4().hex
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.tracer.trace_id():
+                    message.setdefault("headers", []).append((b"x-request-id", request_id.encode()))
+            await send(message)
+
+        started = time.perf_counter()
+        with self.tracer.span("http.request", root_id=request_id, method=scope["method"]) as span:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = getattr(scope.get("route"), "path", "unmatched")
+                span.update(route=route, status=status)
+                self.histogram.observe(time.perf_counter() - started, scope["method"], route, str(status))
@@ -0,0 +1,75 @@
+"""Chat context budgeting: bounded windows, rolling summaries and trip digests."""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from chat_context import build_window, estimate_tokens, summarize_turns, trip_digest
+
+
+def turn(role: str, text: str) -> dict:
+    return {"role": role, "content": [{"text": text}]}
+
+
+def conversation(n: int, words: int = 60) -> list:
+    return [turn("user" if i % 2 == 0 else "assistant", f"Turn {i} says hello. " + "word " * words)
+            for i in range(n)]
+
+
+def test_estimate_tokens_rounds_up():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcd") == 1
+    assert estimate_tokens("abcde") == 2
+
+
+def test_short_conversation_is_sent_whole():
+    messages = conversation(3, words=5)
+    window, summary = build_window(messages)
+    assert window == messages
+    assert summary == ""
+
+
+def test_long_conversation_is_windowed_and_summarized():
+    messages = conversation(41)
+    window, summary = build_window(messages, history_tokens=500, summary_tokens=100)
+    assert window[-1] is messages[-1]
+    assert window[0]["role"] == "user"
+    assert sum(estimate_tokens(m["content"][0]["text"]) for m in window) <= 500
+    assert 0 < estimate_tokens(summary) <= 100 + 1
+    assert summary.splitlines()[-1].endswith(f"Turn {41 - len(window) - 1} says hello.")
+
+
+def test_latest_message_always_kept():
+    huge = turn("user", "x" * 40_000)
+    window, _ = build_window([turn("user", "hi"), turn("assistant", "hello"), huge], history_tokens=100)
+    assert window == [huge]
+
+
+def test_summary_keeps_newest_turns_first_sentence():
+    summary = summarize_turns([turn("user", "First question. More detail."), turn("assistant", "Answer! Extra.")])
+    assert summary == "User: First question.\nYou: Answer!"
+
+
+def test_trip_digest_is_bounded_and_keeps_the_essentials():
+    itinerary = {
+        "trip_summary": {"title": "Lisbon Long Weekend", "destination": "Lisbon", "duration": 30,
+                         "highlights": ["Tram 28", "Fado"]},
+        "budget_breakdown": {"grand_total_per_person": "$900"},
+        "daily_itinerary": [{"day": n, "date": f"2026-06-{n:02d}", "title": f"Day title {n}",
+                             "activities": [{"name": f"Place {n}-{k}", "description": "d" * 500} for k in range(6)],
+                             "accommodation": {"name": "Hotel Lisboa"}} for n in range(1, 31)],
+    }
+    digest = trip_digest(itinerary, max_tokens=200)
+    assert estimate_tokens(digest) <= 200 + 1
+    assert digest.startswith("Lisbon Long Weekend — Lisbon, 30 days")
+    assert "Budget: $900 per person" in digest
+    assert "Day 1 (2026-06-01): Day title 1 — Place 1-0" in digest
+    assert digest.endswith("…")
+    assert estimate_tokens(digest) < estimate_tokens(json.dumps(itinerary)) / 20
+
+
+def test_trip_digest_of_a_trip_form():
+    digest = trip_digest({"destination": "Porto", "interests": ["wine", "food"]})
+    assert digest == 'destination: Porto\ninterests: ["wine", "food"]'
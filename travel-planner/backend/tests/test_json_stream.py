@@ -0,0 +1,60 @@
+"""Incremental section parsing: sections and array items come out as soon as they close."""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from json_stream import JSONSectionParser
+
+DOC = {"trip_summary": {"title": "Lisbon {weekend}", "note": "a \"quoted\" ]brace["},
+       "daily_itinerary": [{"day": 1, "title": "Alfama"}, {"day": 2, "title": "Belém"}],
+       "practical_info": {"currency": "EUR"}}
+
+
+def feed_in_chunks(parser: JSONSectionParser, text: str, size: int) -> list:
+    events = []
+    for i in range(0, len(text), size):
+        events += parser.feed(text[i:i + size])
+    return events
+
+
+def test_sections_and_items_in_order_across_any_chunking():
+    text = "Here is your plan:\n" + json.dumps(DOC)
+    for size in (1, 3, 17, len(text)):
+        parser = JSONSectionParser(item_keys=("daily_itinerary",))
+        assert feed_in_chunks(parser, text, size) == [
+            ("section", "trip_summary", DOC["trip_summary"]),
+            ("item", "daily_itinerary", DOC["daily_itinerary"][0]),
+            ("item", "daily_itinerary", DOC["daily_itinerary"][1]),
+            ("section", "practical_info", DOC["practical_info"]),
+        ]
+        assert parser.done
+        assert json.loads(parser.document()) == DOC
+
+
+def test_item_arrays_are_sections_unless_named():
+    events = JSONSectionParser().feed(json.dumps(DOC))
+    assert [(kind, key) for kind, key, _ in events] == [
+        ("section", "trip_summary"), ("section", "daily_itinerary"), ("section", "practical_info")]
+
+
+def test_section_emitted_before_document_ends():
+    parser = JSONSectionParser()
+    assert parser.feed('{"a": {"x": 1}, "b": {"y"') == [("section", "a", {"x": 1})]
+    assert not parser.done
+    assert parser.feed(': 2}}') == [("section", "b", {"y": 2})]
+    assert parser.done
+
+
+def test_malformed_fragment_is_skipped():
+    parser = JSONSectionParser()
+    assert parser.feed('{"a": {"x": 1,}, "b": {"y": 2}}') == [("section", "b", {"y": 2})]
+
+
+def test_text_after_root_is_ignored():
+    parser = JSONSectionParser()
+    assert parser.feed('{"a": {"x": 1}} and then') == [("section", "a", {"x": 1})]
+    assert parser.done
+    assert parser.feed(' {"b": {"y": 2}}') == []
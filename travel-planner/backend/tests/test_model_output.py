@@ -0,0 +1,61 @@
+"""Tolerant JSON extraction: malformed model output repairs or raises ModelOutputError."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pytest
+
+from model_output import ModelOutputError, QuickTips, extract_json, validate
+
+
+def test_missing_comma_between_members():
+    data, repaired = extract_json('{"tips": [{"title": "a" "description": "b"}]}')
+    assert repaired
+    assert data == {"tips": [{"title": "a", "description": "b"}]}
+
+
+def test_missing_comma_between_array_items_and_literals():
+    data, _ = extract_json('{"a": [1 2], "b": {"c": true "d": null} "e": {"f": 1}}')
+    assert data == {"a": [1, 2], "b": {"c": True, "d": None}, "e": {"f": 1}}
+
+
+def test_single_quoted_strings():
+    data, _ = extract_json("{'tips': [{'title': 'a', 'description': 'it\\'s \"b\"'}]}")
+    assert data == {"tips": [{"title": "a", "description": 'it\'s "b"'}]}
+
+
+def test_bare_currency_value():
+    data, _ = extract_json('{"cost_estimate": $20-30, "duration": 2 hours}')
+    assert data == {"cost_estimate": "$20-30", "duration": "2 hours"}
+
+
+def test_number_without_leading_zero():
+    data, _ = extract_json('{"x": .5, "y": -.25, "z": 1e3, "range": 20-30}')
+    assert data == {"x": 0.5, "y": -0.25, "z": 1000.0, "range": "20-30"}
+
+
+def test_repaired_output_validates():
+    data, _ = extract_json("{'tips': [{'title': 'Go early' 'description': 'Queues' 'icon': '⏰'}]}")
+    assert validate(QuickTips, data)["tips"][0]["title"] == "Go early"
+
+
+@pytest.mark.parametrize("text", [
+    '{"tips": [{"title": "a", "x": @@ }]}',
+    '{"a": : }',
+    '{"a": "x", "b": [1, 2',
+    "{'a': 'unterminated",
+    '{"a": {"b": [}}} "c"',
+])
+def test_unparseable_input_never_leaks_json_errors(text):
+    try:
+        data, _ = extract_json(text)
+    except ModelOutputError:
+        return
+    assert isinstance(data, dict)
+
+
+def test_no_object_raises_model_output_error():
+    with pytest.raises(ModelOutputError):
+        extract_json("Sorry, I can't help with that.")
@@ -0,0 +1,85 @@
+"""Token-bucket rate limiting on the memory and SQLite backends."""
+
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pytest
+
+from rate_limit import CostTooHighError, MemoryBackend, RateLimiter, SQLiteBackend, backend_from_url
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    return MemoryBackend() if request.param == "memory" else SQLiteBackend(str(tmp_path / "rl.db"))
+
+
+def limiter(backend, **kwargs) -> RateLimiter:
+    return RateLimiter(backend, **dict({"user_per_min": 600, "user_burst": 1000}, **kwargs))
+
+
+def test_burst_then_wait(backend):
+    async def run():
+        rl = limiter(backend)
+        assert await rl.admit("ip:1", 600) == 0
+        assert await rl.admit("ip:1", 400) == 0
+        wait = await rl.admit("ip:1", 100)
+        assert 9 < wait <= 10   # 100 tokens at 10 a second
+        assert await rl.admit("ip:2", 1000) == 0   # another caller has its own bucket
+        return rl.stats()
+
+    stats = asyncio.run(run())
+    assert (stats["admitted"], stats["rejected"], stats["tokens_admitted"]) == (3, 1, 2000)
+
+
+def test_refill_over_time(backend):
+    async def run():
+        rl = limiter(backend, user_per_min=60_000)   # 1000 tokens a second
+        assert await rl.admit("ip:1", 1000) == 0
+        assert await rl.admit("ip:1", 100) > 0
+        await asyncio.sleep(0.15)
+        return await rl.admit("ip:1", 100)
+
+    assert asyncio.run(run()) == 0
+
+
+def test_global_bucket_is_shared(backend):
+    async def run():
+        rl = limiter(backend, global_per_min=600, global_burst=1500)
+        assert rl.max_cost == 1000
+        assert await rl.admit("ip:1", 1000) == 0
+        return await rl.admit("ip:2", 1000)
+
+    assert asyncio.run(run()) > 0
+
+
+def test_cost_above_burst_is_refused_outright(backend):
+    rl = limiter(backend)
+    with pytest.raises(CostTooHighError):
+        asyncio.run(rl.admit("ip:1", 1001))
+    assert rl.counters["too_large"] == 1
+
+
+def test_disabled_limiter_admits_everything(backend):
+    rl = limiter(backend)
+    rl.enabled = False
+    assert asyncio.run(rl.admit("ip:1", 10**9)) == 0
+
+
+def test_backend_errors_fail_open():
+    class Broken:
+        async def take(self, buckets, cost):
+            raise ConnectionError("down")
+
+    rl = limiter(Broken())
+    assert asyncio.run(rl.admit("ip:1", 10)) == 0
+    assert rl.counters["backend_errors"] == 1
+
+
+def test_backend_from_url(tmp_path):
+    assert isinstance(backend_from_url(""), MemoryBackend)
+    assert isinstance(backend_from_url(f"sqlite:///{tmp_path / 'rl.db'}"), SQLiteBackend)
+    with pytest.raises(ValueError):
+        backend_from_url("memcached://localhost")
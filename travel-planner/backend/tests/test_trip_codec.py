@@ -0,0 +1,58 @@
+"""Saved-trip codec: compressed blobs round-trip, legacy JSON attributes still decode."""
+
+import json
+import os
+import sys
+import zlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pytest
+
+from trip_codec import (BLOB_FIELDS, CURRENT_FORMAT, LEGACY_FIELDS, decode_blob, decode_trip_fields,
+                        encode_blob, encode_trip_fields)
+
+ITINERARY = {"trip_summary": {"title": "Três dias em Lisboa"},
+             "daily_itinerary": [{"day": n, "title": f"Day {n}", "activities": []} for n in range(1, 8)]}
+FORM = {"destination": "Lisbon", "travelers": 2}
+
+
+def test_blob_round_trip_is_versioned_and_smaller():
+    blob = encode_blob(ITINERARY)
+    assert blob[0] == CURRENT_FORMAT
+    assert decode_blob(blob) == ITINERARY
+    assert len(blob) < len(json.dumps(ITINERARY))
+
+
+def test_decode_accepts_binary_wrappers_and_empty_blobs():
+    class Binary:   # boto3's resource layer wraps bytes like this
+        def __init__(self, value):
+            self.value = value
+
+    assert decode_blob(Binary(encode_blob(FORM))) == FORM
+    assert decode_blob(b"") == {}
+
+
+def test_unknown_format_raises():
+    with pytest.raises(ValueError, match="format 9"):
+        decode_blob(bytes([9]) + zlib.compress(b"{}"))
+
+
+def test_trip_fields_round_trip():
+    item = {"id": "t1", **encode_trip_fields(ITINERARY, FORM)}
+    assert set(item) == {"id", *BLOB_FIELDS.values()}
+    assert decode_trip_fields(item) == {"id": "t1", "itinerary": ITINERARY, "tripForm": FORM}
+
+
+def test_legacy_json_attributes_decode():
+    item = {"id": "t1", LEGACY_FIELDS["itinerary"]: json.dumps(ITINERARY), LEGACY_FIELDS["tripForm"]: ""}
+    assert decode_trip_fields(item) == {"id": "t1", "itinerary": ITINERARY, "tripForm": {}}
+
+
+def test_blob_wins_over_a_leftover_legacy_attribute():
+    item = {BLOB_FIELDS["itinerary"]: encode_blob(ITINERARY), LEGACY_FIELDS["itinerary"]: "{\"stale\": true}"}
+    assert decode_trip_fields(item) == {"itinerary": ITINERARY}
+
+
+def test_summary_projection_is_left_alone():
+    assert decode_trip_fields({"id": "t1", "title": "Lisbon"}) == {"id": "t1", "title": "Lisbon"}
@@ -0,0 +1,55 @@
+"""Compact wire format: compact_* and expand_* are inverses; verbose output passes through."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from wire_format import (compact_budget, compact_day, compact_itinerary, compact_packing, expand_budget,
+                         expand_day, expand_itinerary, expand_packing)
+
+DAY = {
+    "day": 1, "date": "2026-06-01", "title": "Alfama", "theme": "Old town",
+    "activities": [{"time": "9:00 AM", "name": "Castelo", "description": "Views", "duration": "2 hours",
+                    "cost_estimate": "$15", "tips": "Go early", "category": "sightseeing"}],
+    "meals": {"breakfast": {"name": "Café", "description": "Pastéis", "price_range": "$"},
+              "lunch": {"name": "Tasca", "description": "Sardines", "price_range": "$$"},
+              "dinner": {"name": "Fado house", "description": "Dinner and music", "price_range": "$$$"}},
+    "accommodation": {"name": "Hotel", "type": "boutique", "price_range": "$150"},
+    "transportation": "Tram 28",
+    "daily_budget_estimate": "$120-180 per person",
+}
+PACKING = {"weather_advisory": "Warm", "tips": ["Pack light"], "carry_on_essentials": ["Passport"],
+           "categories": [{"name": "Clothes", "icon": "👕", "items": [
+               {"item": "T-shirts", "quantity": "4", "essential": True, "notes": "Linen"}]}]}
+BUDGET = {"summary": "Moderate", "currency": "EUR",
+          "daily_breakdown": {"food": {"low": 20, "average": 40, "high": 80, "notes": "Tascas"}},
+          "total_per_person": {"low": 600, "recommended": 900, "comfortable": 1400},
+          "total_for_group": {"low": 1200, "recommended": 1800, "comfortable": 2800}}
+
+
+def test_day_round_trip_uses_short_keys_and_rows():
+    wire = compact_day(DAY)
+    assert {"acts", "meals", "stay", "transport", "budget"} <= set(wire)
+    assert wire["acts"][0] == ["9:00 AM", "Castelo", "Views", "2 hours", "$15", "Go early", "sightseeing"]
+    assert expand_day(wire) == DAY
+
+
+def test_itinerary_packing_budget_round_trip():
+    itinerary = {"trip_summary": {"title": "Lisbon"}, "daily_itinerary": [DAY, dict(DAY, day=2)]}
+    assert expand_itinerary(compact_itinerary(itinerary)) == itinerary
+    assert expand_packing(compact_packing(PACKING)) == PACKING
+    assert expand_budget(compact_budget(BUDGET)) == BUDGET
+
+
+def test_verbose_output_passes_through():
+    assert expand_day(DAY) == DAY
+    assert expand_packing(PACKING) == PACKING
+    assert expand_budget(BUDGET) == BUDGET
+
+
+def test_short_rows_and_missing_parts():
+    day = expand_day({"day": 1, "acts": [["9:00", "Walk"]], "meals": [["Café", "x", "$"], None, None]})
+    assert day == {"day": 1, "activities": [{"time": "9:00", "name": "Walk"}],
+                   "meals": {"breakfast": {"name": "Café", "description": "x", "price_range": "$"}}}
+    assert "total_for_group" not in expand_budget({"total_per_person": [1, 2, 3]})
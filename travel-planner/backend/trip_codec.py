@@ -0,0 +1,55 @@
+"""
+Saved-trip storage codec
+Itineraries are stored in DynamoDB as versioned, compressed binary blobs
+(1 format byte + zlib over compact JSON) instead of JSON strings — several
+times smaller, which cuts read/write capacity and keeps long trips well
+under the 400 KB item limit. Legacy *_json string attributes still decode.
+"""
+
+import json
+import zlib
+
+FORMAT_ZLIB_JSON = 1
+CURRENT_FORMAT = FORMAT_ZLIB_JSON
+
+# Attribute names: compressed blob vs legacy JSON string
+BLOB_FIELDS = {"itinerary": "itinerary_z", "tripForm": "tripForm_z"}
+LEGACY_FIELDS = {"itinerary": "itinerary_json", "tripForm": "tripForm_json"}
+
+
+def encode_blob(obj) -> bytes:
+    raw = json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
+    return bytes([CURRENT_FORMAT]) + zlib.compress(raw, 6)
+
+
+def decode_blob(blob):
+    # boto3's resource layer hands back Binary wrappers, the client layer bytes
+    data = bytes(getattr(blob, "value", blob))
+    if not data:
+        return {}
+    if data[0] == FORMAT_ZLIB_JSON:
+        return json.loads(zlib.decompress(data[1:]))
+    raise ValueError(f"Unknown saved-trip storage format {data[0]}")
+
+
+def encode_trip_fields(itinerary: dict, trip_form: dict) -> dict:
+    """Item attributes for the itinerary + tripForm payloads."""
+    return {
+        BLOB_FIELDS["itinerary"]: encode_blob(itinerary),
+        BLOB_FIELDS["tripForm"]: encode_blob(trip_form),
+    }
+
+
+def decode_trip_fields(item: dict) -> dict:
+    """Pop stored payload attributes off `item` and set decoded itinerary / tripForm.
+
+    Items without either attribute (e.g. summary projections) are left alone.
+    """
+    for name, blob_attr in BLOB_FIELDS.items():
+        legacy_attr = LEGACY_FIELDS[name]
+        if blob_attr in item:
+            item[name] = decode_blob(item.pop(blob_attr))
+            item.pop(legacy_attr, None)
+        elif legacy_attr in item:
+            item[name] = json.loads(item.pop(legacy_attr) or "{}")
+    return item
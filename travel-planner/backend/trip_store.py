@@ -0,0 +1,277 @@
+"""
+Async saved-trip store
+One shared DynamoDB Table handle whose blocking boto3 calls run on a small
+dedicated thread pool, plus batched writes/reads (BatchWriteItem /
+BatchGetItem) with retry of unprocessed items.
+"""
+
+import asyncio
+import functools
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from trip_codec import BLOB_FIELDS, LEGACY_FIELDS, decode_trip_fields, encode_blob, encode_trip_fields
+
+BATCH_WRITE_LIMIT = 25   # DynamoDB per-request caps
+BATCH_GET_LIMIT = 100
+
+
+class UnprocessedItemsError(Exception):
+    """DynamoDB kept returning unprocessed items after every retry."""
+
+
+def _chunks(seq: list, size: int) -> Iterable[list]:
+    for i in range(0, len(seq), size):
+        yield seq[i:i + size]
+
+
+class TripStore:
+    def __init__(self, resource, table_name: str, max_workers: int = 8, max_batch_retries: int = 6,
+                 observer: Optional[Callable[[str, float, bool], None]] = None):
+        self.resource = resource   # may be a LazyClient — only touched on the pool threads
+        self.table_name = table_name
+        self.observer = observer   # told (operation, seconds, ok) after every DynamoDB call
+        self._table = None
+        self.table_state = "unchecked"   # unchecked | active | creating | missing | error
+        self.max_batch_retries = max_batch_retries
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ddb")
+
+    @property
+    def table(self):
+        if self._table is None:
+            self._table = self.resource.Table(self.table_name)
+        return self._table
+
+    def _call(self, method: str, **kwargs):
+        return getattr(self.table, method)(**kwargs)
+
+    async def _run(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        started, ok = time.perf_counter(), False
+        try:
+            result = await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+            ok = True
+            return result
+        finally:
+            if self.observer:
+                op = args[0] if fn == self._call else fn.__name__.strip("_").removesuffix("_sync")
+                self.observer(op, time.perf_counter() - started, ok)
+
+    @staticmethod
+    def _backoff(attempt: int) -> None:
+        # Full jitter, capped — unprocessed items mean we're being throttled
+        time.sleep(random.uniform(0, min(2.0, 0.05 * 2 ** attempt)))
+
+    # ── Single-item operations ───────────────────────────────────────────────
+
+    async def query_page(self, user_id: str, limit: int, start_key: Optional[dict] = None,
+                         fields: Optional[Iterable[str]] = None) -> Tuple[List[dict], Optional[dict]]:
+        """One page of a user's trips; returns (items, LastEvaluatedKey)."""
+        from boto3.dynamodb.conditions import Key as DDBKey
+        query = {
+            "KeyConditionExpression": DDBKey("userId").eq(user_id),
+            "ScanIndexForward": False,
+            "Limit": limit,
+        }
+        if fields:
+            query["ProjectionExpression"] = ", ".join(f"#{f}" for f in fields)
+            query["ExpressionAttributeNames"] = {f"#{f}": f for f in fields}
+        if start_key:
+            query["ExclusiveStartKey"] = start_key
+        resp = await self._run(self._call, "query", **query)
+        return resp.get("Items", []), resp.get("LastEvaluatedKey")
+
+    async def query_all(self, user_id: str, fields: Optional[Iterable[str]] = None) -> List[dict]:
+        items, start_key = [], None
+        while True:
+            page, start_key = await self.query_page(user_id, BATCH_GET_LIMIT, start_key, fields)
+            items.extend(page)
+            if not start_key:
+                return items
+
+    async def get(self, user_id: str, trip_id: str) -> Optional[dict]:
+        resp = await self._run(self._call, "get_item", Key={"userId": user_id, "id": trip_id})
+        return resp.get("Item")
+
+    async def put(self, item: dict) -> None:
+        await self._run(self._call, "put_item", Item=item)
+
+    async def delete(self, user_id: str, trip_id: str) -> None:
+        await self._run(self._call, "delete_item", Key={"userId": user_id, "id": trip_id})
+
+    async def update_itinerary(self, item: dict, itinerary: dict) -> bool:
+        """Rewrite only the itinerary attribute of stored `item` (UpdateItem, not a whole put).
+
+        Conditional on the stored itinerary still being the one in `item`, so
+        a concurrent edit is never silently overwritten; returns False if it
+        changed (or the trip is gone).
+        """
+        from botocore.exceptions import ClientError
+        blob, legacy = BLOB_FIELDS["itinerary"], LEGACY_FIELDS["itinerary"]
+        names, values = {"#iz": blob}, {":iz": encode_blob(itinerary)}
+        if blob in item:
+            update, condition = "SET #iz = :iz", "#iz = :prev"
+            values[":prev"] = item[blob]
+        else:   # legacy JSON string: replace it with the blob
+            update, condition = "SET #iz = :iz REMOVE #ij", "attribute_exists(#ij)"
+            names["#ij"] = legacy
+        try:
+            await self._run(self._call, "update_item", Key={"userId": item["userId"], "id": item["id"]},
+                            UpdateExpression=update, ConditionExpression=condition,
+                            ExpressionAttributeNames=names, ExpressionAttributeValues=values)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") == "ConditionalCheckFailedException":
+                return False
+            raise
+        return True
+
+    # ── Batched operations ───────────────────────────────────────────────────
+
+    def _batch_write_sync(self, requests: list) -> list:
+        """Write one chunk; returns the requests still unprocessed after every retry."""
+        pending = requests
+        for attempt in range(self.max_batch_retries + 1):
+            resp = self.resource.batch_write_item(RequestItems={self.table_name: pending})
+            pending = resp.get("UnprocessedItems", {}).get(self.table_name, [])
+            if not pending:
+                return []
+            if attempt < self.max_batch_retries:
+                self._backoff(attempt)
+        return pending
+
+    def _batch_get_sync(self, keys: list, fields: Optional[Iterable[str]] = None) -> list:
+        items, pending = [], keys
+        spec = {}
+        if fields:
+            spec["ProjectionExpression"] = ", ".join(f"#{f}" for f in fields)
+            spec["ExpressionAttributeNames"] = {f"#{f}": f for f in fields}
+        for attempt in range(self.max_batch_retries + 1):
+            resp = self.resource.batch_get_item(RequestItems={self.table_name: {"Keys": pending, **spec}})
+            items.extend(resp.get("Responses", {}).get(self.table_name, []))
+            pending = resp.get("UnprocessedKeys", {}).get(self.table_name, {}).get("Keys", [])
+            if not pending:
+                return items
+            if attempt < self.max_batch_retries:
+                self._backoff(attempt)
+        raise UnprocessedItemsError(f"{len(pending)} reads still unprocessed after retries")
+
+    async def _batch_write(self, requests: list) -> list:
+        """Run every chunk concurrently and return the requests that weren't
+        applied (all of a chunk whose call failed). Chunks that succeeded stay
+        written; raises only if nothing at all was."""
+        chunks = list(_chunks(requests, BATCH_WRITE_LIMIT))
+        results = await asyncio.gather(*(self._run(self._batch_write_sync, chunk) for chunk in chunks),
+                                       return_exceptions=True)
+        failed, errors = [], []
+        for chunk, result in zip(chunks, results):
+            if isinstance(result, BaseException):
+                errors.append(result)
+                failed.extend(chunk)
+            else:
+                failed.extend(result)
+        if requests and len(failed) == len(requests):
+            raise errors[0] if errors else UnprocessedItemsError(
+                f"{len(failed)} writes still unprocessed after retries")
+        return failed
+
+    async def batch_put(self, items: List[dict]) -> List[str]:
+        """Put `items`; returns the ids of any that weren't written."""
+        failed = await self._batch_write([{"PutRequest": {"Item": item}} for item in items])
+        return [r["PutRequest"]["Item"]["id"] for r in failed]
+
+    async def batch_delete(self, user_id: str, trip_ids: Iterable[str]) -> List[str]:
+        """Delete the trips; returns the ids of any that weren't deleted."""
+        failed = await self._batch_write([{"DeleteRequest": {"Key": {"userId": user_id, "id": trip_id}}}
+                                          for trip_id in dict.fromkeys(trip_ids)])   # de-dupe, keep order
+        return [r["DeleteRequest"]["Key"]["id"] for r in failed]
+
+    async def batch_get(self, user_id: str, trip_ids: Iterable[str],
+                        fields: Optional[Iterable[str]] = None) -> List[dict]:
+        keys = [{"userId": user_id, "id": trip_id} for trip_id in dict.fromkeys(trip_ids)]
+        pages = await asyncio.gather(*(self._run(self._batch_get_sync, chunk, fields)
+                                       for chunk in _chunks(keys, BATCH_GET_LIMIT)))
+        return [item for page in pages for item in page]
+
+    # ── Table setup ──────────────────────────────────────────────────────────
+
+    def _ensure_table_sync(self, create: bool) -> str:
+        client = self.resource.meta.client
+        try:
+            status = client.describe_table(TableName=self.table_name)["Table"]["TableStatus"]
+        except client.exceptions.ResourceNotFoundException:
+            if not create:
+                return "missing"
+            client.create_table(
+                TableName=self.table_name,
+                KeySchema=[
+                    {"AttributeName": "userId", "KeyType": "HASH"},
+                    {"AttributeName": "id", "KeyType": "RANGE"},
+                ],
+                AttributeDefinitions=[
+                    {"AttributeName": "userId", "AttributeType": "S"},
+                    {"AttributeName": "id", "AttributeType": "S"},
+                ],
+                BillingMode="PAY_PER_REQUEST",
+            )
+            print(f"✓ Created DynamoDB table: {self.table_name}")
+            self.table_state = "creating"
+            status = "CREATING"
+        if status != "ACTIVE":
+            client.get_waiter("table_exists").wait(TableName=self.table_name)
+        return "active"
+
+    async def ensure_table(self, create: bool = True) -> str:
+        """One describe_table (plus create + wait if missing); result kept in `table_state`."""
+        try:
+            self.table_state = await self._run(self._ensure_table_sync, create)
+        except Exception as e:
+            self.table_state = "error"
+            print(f"⚠  DynamoDB table check: {e}")
+        return self.table_state
+
+    # ── Legacy format migration ──────────────────────────────────────────────
+
+    def _migrate_legacy_sync(self, batch_pause: float) -> int:
+        from boto3.dynamodb.conditions import Attr
+        legacy = LEGACY_FIELDS["itinerary"]
+        scan = {"FilterExpression": Attr(legacy).exists()}
+        conditional_failed = self.resource.meta.client.exceptions.ConditionalCheckFailedException
+        migrated = 0
+        while True:
+            resp = self.table.scan(**scan)
+            for item in resp.get("Items", []):
+                decoded = decode_trip_fields(dict(item))
+                fields = encode_trip_fields(decoded.get("itinerary", {}), decoded.get("tripForm", {}))
+                try:
+                    self.table.update_item(
+                        Key={"userId": item["userId"], "id": item["id"]},
+                        UpdateExpression="SET #iz = :iz, #fz = :fz REMOVE #ij, #fj",
+                        ConditionExpression="attribute_exists(#ij)",
+                        ExpressionAttributeNames={
+                            "#iz": BLOB_FIELDS["itinerary"], "#fz": BLOB_FIELDS["tripForm"],
+                            "#ij": LEGACY_FIELDS["itinerary"], "#fj": LEGACY_FIELDS["tripForm"],
+                        },
+                        ExpressionAttributeValues={
+                            ":iz": fields[BLOB_FIELDS["itinerary"]], ":fz": fields[BLOB_FIELDS["tripForm"]],
+                        },
+                    )
+                    migrated += 1
+                except conditional_failed:
+                    pass   # already migrated by someone else
+            if "LastEvaluatedKey" not in resp:
+                return migrated
+            scan["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+            time.sleep(batch_pause)   # stay gentle on table capacity
+
+    async def migrate_legacy(self, batch_pause: float = 0.2) -> int:
+        """Rewrite trips still stored as *_json strings into the compressed format.
+
+        Conditional updates make it safe alongside live traffic or in
+        several workers at once.
+        """
+        return await self._run(self._migrate_legacy_sync, batch_pause)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
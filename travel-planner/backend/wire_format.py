@@ -0,0 +1,155 @@
+"""
+Compact wire format for planning output
+What Nova is asked to write on the itinerary, day, packing and budget
+prompts: the repeated records (activities, meals, stays, packing items,
+cost bands) as positional arrays under short keys, minified. Output tokens
+dominate generation time, and the verbose schema spent most of them on key
+names. Top-level sections keep their public names so streaming and
+section retries work unchanged; expand_* turn the wire shape back into the
+public one and pass already-expanded (verbose) objects through untouched.
+"""
+
+ACTIVITY_FIELDS = ("time", "name", "description", "duration", "cost_estimate", "tips", "category")
+PLACE_FIELDS = ("name", "description", "price_range")
+STAY_FIELDS = ("name", "type", "price_range")
+MEALS = ("breakfast", "lunch", "dinner")
+PACKING_ITEM_FIELDS = ("item", "quantity", "essential", "notes")
+COST_BAND_FIELDS = ("low", "average", "high", "notes")
+TOTAL_FIELDS = ("low", "recommended", "comfortable")
+DAY_KEYS = {"acts": "activities", "stay": "accommodation", "transport": "transportation",
+            "budget": "daily_budget_estimate"}
+
+_DAY_OBJECT = """{"day": DAY_NUMBER, "date": "YYYY-MM-DD", "title": "Day title", "theme": "Day theme",
+ "acts": [["9:00 AM", "Activity name", "Detailed description", "2 hours", "$20-30", "Insider tip", "sightseeing|food|adventure|culture|shopping|relaxation"]],
+ "meals": [["Breakfast place", "Description", "Price range"], ["Lunch place", "...", "..."], ["Dinner place", "...", "..."]],
+ "stay": ["Accommodation name", "Type", "Price range"],
+ "transport": "How to get around this day",
+ "budget": "$X-Y per person"}"""
+
+_DAY_NOTES = """Each "acts" row is [time, name, description, duration, cost estimate, insider tip, category]; \
+"meals" is [breakfast, lunch, dinner], each [name, description, price range]; "stay" is [name, type, price range]."""
+
+DAY_WIRE = _DAY_OBJECT + "\n\n" + _DAY_NOTES
+
+ITINERARY_WIRE = """{"trip_summary": {"title": "Creative trip title", "destination": "Destination as given", \
+"duration": NUMBER_OF_DAYS, "best_time_to_visit": "...", "overall_theme": "...", "highlights": ["...", "...", "..."]},
+"daily_itinerary": [""" + _DAY_OBJECT.replace("DAY_NUMBER", "1") + """],
+"practical_info": {"getting_there": "...", "local_transportation": "...", "currency_tips": "...", \
+"safety_tips": "...", "local_customs": "...", "emergency_contacts": "..."},
+"budget_breakdown": {"accommodation_total": "$...", "food_total": "$...", "activities_total": "$...", \
+"transportation_total": "$...", "grand_total_per_person": "$..."}}
+
+""" + _DAY_NOTES
+
+PACKING_WIRE = """{"weather_advisory": "Expected weather and what to prepare for",
+"categories": [["Category name", "emoji", [["Item name", "X", true, "notes"]]]],
+"tips": ["tip1", "tip2"],
+"carry_on_essentials": ["item1", "item2"]}
+
+Each category is [name, icon, items]; each item is [item, quantity, essential (true/false), notes]."""
+
+BUDGET_WIRE = """{"summary": "Brief budget overview",
+"daily_breakdown": {"accommodation": [LOW, AVERAGE, HIGH, "notes"], "food": [...], "transportation": [...], \
+"activities": [...], "miscellaneous": [...]},
+"total_per_person": [LOW, RECOMMENDED, COMFORTABLE],
+"total_for_group": [LOW, RECOMMENDED, COMFORTABLE],
+"money_saving_tips": ["tip1", "tip2", "tip3"],
+"splurge_recommendations": ["experience1", "experience2"],
+"currency": "Local currency and exchange tips"}
+
+Each daily_breakdown band is [low, average, high, notes] per person per day, as numbers."""
+
+MINIFIED = "Write the JSON minified, on one line, without indentation."
+
+
+def _record(value, fields: tuple):
+    """A positional row as a dict of `fields` (dicts and anything else pass through)."""
+    if isinstance(value, list):
+        return {k: v for k, v in zip(fields, value) if v is not None}
+    return value
+
+
+# ─── Wire → public shape ──────────────────────────────────────────────────────
+
+def expand_day(day) -> dict:
+    if not isinstance(day, dict):
+        return day
+    day = {DAY_KEYS.get(k, k): v for k, v in day.items()}
+    if isinstance(day.get("activities"), list):
+        day["activities"] = [_record(a, ACTIVITY_FIELDS) for a in day["activities"]]
+    if isinstance(day.get("meals"), list):
+        day["meals"] = {meal: _record(place, PLACE_FIELDS) for meal, place in zip(MEALS, day["meals"]) if place}
+    day["accommodation"] = _record(day.get("accommodation"), STAY_FIELDS)
+    if day["accommodation"] is None:
+        del day["accommodation"]
+    return day
+
+
+def expand_itinerary(data: dict) -> dict:
+    if isinstance(data.get("daily_itinerary"), list):
+        data = dict(data, daily_itinerary=[expand_day(d) for d in data["daily_itinerary"]])
+    return data
+
+
+def expand_packing(data: dict) -> dict:
+    categories = data.get("categories")
+    if not isinstance(categories, list):
+        return data
+    expanded = []
+    for category in categories:
+        category = _record(category, ("name", "icon", "items"))
+        if isinstance(category, dict) and isinstance(category.get("items"), list):
+            category = dict(category, items=[_record(i, PACKING_ITEM_FIELDS) for i in category["items"]])
+        expanded.append(category)
+    return dict(data, categories=expanded)
+
+
+def expand_budget(data: dict) -> dict:
+    data = dict(data)
+    if isinstance(data.get("daily_breakdown"), dict):
+        data["daily_breakdown"] = {k: _record(v, COST_BAND_FIELDS) for k, v in data["daily_breakdown"].items()}
+    for key in ("total_per_person", "total_for_group"):
+        data[key] = _record(data.get(key), TOTAL_FIELDS)
+        if data[key] is None:
+            del data[key]
+    return data
+
+
+# ─── Public shape → wire (for recorded samples and benchmarks) ─────────────────
+
+def _row(obj: dict, fields: tuple) -> list:
+    return [obj.get(f, "") for f in fields]
+
+
+def compact_day(day: dict) -> dict:
+    wire = {k: v for k, v in day.items() if k not in ("activities", "meals", "accommodation",
+                                                       "transportation", "daily_budget_estimate")}
+    wire["acts"] = [_row(a, ACTIVITY_FIELDS) for a in day.get("activities", [])]
+    if day.get("meals"):
+        wire["meals"] = [_row(day["meals"].get(m) or {}, PLACE_FIELDS) for m in MEALS]
+    if day.get("accommodation"):
+        wire["stay"] = _row(day["accommodation"], STAY_FIELDS)
+    if "transportation" in day:
+        wire["transport"] = day["transportation"]
+    if "daily_budget_estimate" in day:
+        wire["budget"] = day["daily_budget_estimate"]
+    return wire
+
+
+def compact_itinerary(data: dict) -> dict:
+    return dict(data, daily_itinerary=[compact_day(d) for d in data.get("daily_itinerary", [])])
+
+
+def compact_packing(data: dict) -> dict:
+    return dict(data, categories=[[c.get("name", ""), c.get("icon", ""),
+                                   [_row(i, PACKING_ITEM_FIELDS) for i in c.get("items", [])]]
+                                  for c in data.get("categories", [])])
+
+
+def compact_budget(data: dict) -> dict:
+    wire = dict(data, daily_breakdown={k: _row(v, COST_BAND_FIELDS)
+                                       for k, v in data.get("daily_breakdown", {}).items()})
+    for key in ("total_per_person", "total_for_group"):
+        if key in data:
+            wire[key] = _row(data[key], TOTAL_FIELDS)
+    return wire
@@ -31,6 +31,7 @@ export function AppProvider({ children }) {
     if (COGNITO_ENABLED) return []
     try { return JSON.parse(localStorage.getItem('tripchronicles-itineraries')) || [] } catch { return [] }
   })
+  const [savedCursor, setSavedCursor] = useState(null) // next page of DynamoDB-backed trips
 
   // ── Auth modal state ───────────────────────────────────────────────────────
   const [showAuthModal, setShowAuthModal] = useState(false)
@@ -94,13 +95,31 @@ export function AppProvider({ children }) {
 
   // ── Load saved itineraries when user changes ───────────────────────────────
   useEffect(() => {
-    if (!user) { setSavedItineraries([]); return }
+    if (!user) { setSavedItineraries([]); setSavedCursor(null); return }
     if (!COGNITO_ENABLED) return  // localStorage already loaded in initial state
     travelAPI.listItineraries()
-      .then(res => setSavedItineraries(res.data || []))
+      .then(res => {
+        setSavedItineraries(res.data || [])
+        setSavedCursor(res.next_cursor || null)
+      })
       .catch(() => {})
   }, [user])
 
+  // ── Itinerary: next page of saved trips (summaries only) ──────────────────
+  const loadMoreItineraries = async () => {
+    if (!savedCursor) return
+    const res = await travelAPI.listItineraries(savedCursor)
+    setSavedItineraries(prev => [...prev, ...(res.data || [])])
+    setSavedCursor(res.next_cursor || null)
+  }
+
+  // ── Itinerary: full trip — the list only carries summaries ────────────────
+  const loadFullItinerary = async (entry) => {
+    if (entry.itinerary) return entry
+    const res = await travelAPI.getItinerary(entry.id)
+    return res.data
+  }
+
   // ── Auth: Sign In ──────────────────────────────────────────────────────────
   const signIn = async (email, password) => {
     if (!COGNITO_ENABLED) {
@@ -171,6 +190,7 @@ export function AppProvider({ children }) {
     }
     setUser(null)
     setSavedItineraries([])
+    setSavedCursor(null)
     localStorage.removeItem('tripchronicles-user')
     localStorage.removeItem('tripchronicles-itineraries')
   }
@@ -223,6 +243,7 @@ export function AppProvider({ children }) {
       theme, toggleTheme,
       user, userLoading, signIn, signUp, confirmSignUp, socialSignIn, signOut,
       savedItineraries, saveItinerary, deleteItinerary,
+      loadMoreItineraries, loadFullItinerary, hasMoreItineraries: !!savedCursor,
       showAuthModal, setShowAuthModal,
       authMode, setAuthMode,
       openSignIn, openSignUp,
@@ -85,11 +85,15 @@ export default function ChatPage() {
   const [loading, setLoading] = useState(false)
   const bottomRef = useRef(null)
   const inputRef = useRef(null)
+  const streamRef = useRef(null)
 
   useEffect(() => {
     bottomRef.current?.scrollIntoView({ behavior: 'smooth' })
   }, [messages])
 
+  // Leaving the page drops the stream so Nova stops generating the reply
+  useEffect(() => () => streamRef.current?.abort(), [])
+
   const sendMessage = async (text) => {
     const userText = text || input.trim()
     if (!userText || loading) return
@@ -111,12 +115,15 @@ export default function ChatPage() {
         .filter(m => m.content && !m.loading)
         .map(m => ({ role: m.role, content: m.content }))
 
-      const res = await travelAPI.chat(apiMessages)
+      streamRef.current = new AbortController()
+      const res = await travelAPI.streamChat(apiMessages, null, token => setMessages(m => m.map(msg =>
+        msg.loading ? { ...msg, content: msg.content + token } : msg)), streamRef.current.signal)
       setMessages(m => {
         const withoutLoading = m.filter(msg => !msg.loading)
         return [...withoutLoading, { role: 'assistant', content: res.reply }]
       })
     } catch (err) {
+      if (err.name === 'AbortError') return
       setMessages(m => {
         const withoutLoading = m.filter(msg => !msg.loading)
         return [...withoutLoading, {
@@ -28,6 +28,7 @@ export default function PlannerPage() {
   const navigate = useNavigate()
   const [searchParams] = useSearchParams()
   const [loading, setLoading] = useState(false)
+  const [progress, setProgress] = useState(null)
   const { theme } = useApp()
 
   const [form, setForm] = useState({
@@ -62,8 +63,12 @@ export default function PlannerPage() {
     }
 
     setLoading(true)
+    setProgress(null)
     try {
-      const result = await travelAPI.generateItinerary(form)
+      const result = await travelAPI.streamItinerary(form, (event, data) => {
+        if (event === 'trip_summary') setProgress({ title: data.title, days: 0, total: data.duration })
+        if (event === 'day') setProgress(p => p && { ...p, days: p.days + 1 })
+      })
       if (result.success) {
         // Store in session storage and navigate
         sessionStorage.setItem('itinerary', JSON.stringify(result.data))
@@ -74,6 +79,7 @@ export default function PlannerPage() {
       toast.error(err.message || 'Failed to generate itinerary. Check backend connection.')
     } finally {
       setLoading(false)
+      setProgress(null)
     }
   }
 
@@ -280,7 +286,9 @@ export default function PlannerPage() {
             <div style={{ display: 'flex', alignItems: 'center', justifyContent: 'center', gap: '0.5rem', marginTop: '1rem' }}>
               <span className="pulse-dot" />
               <p style={{ color: 'var(--text3)', fontSize: '0.82rem', fontFamily: "'JetBrains Mono',monospace" }}>
-                amazon.nova-lite-v1:0 processing · ~15–30s
+                {progress
+                  ? `${progress.title} · ${progress.days}/${progress.total} days ready`
+                  : 'amazon.nova-lite-v1:0 processing · ~15–30s'}
               </p>
             </div>
           )}
@@ -5,12 +5,28 @@ import toast from 'react-hot-toast'
 
 export default function SavedPage() {
   const navigate = useNavigate()
-  const { user, openSignIn, savedItineraries, deleteItinerary } = useApp()
+  const {
+    user, openSignIn, savedItineraries, deleteItinerary,
+    loadFullItinerary, loadMoreItineraries, hasMoreItineraries,
+  } = useApp()
 
-  const loadItinerary = (entry) => {
-    sessionStorage.setItem('itinerary', JSON.stringify(entry.itinerary))
-    sessionStorage.setItem('tripForm', JSON.stringify(entry.tripForm))
-    navigate('/itinerary')
+  const loadItinerary = async (entry) => {
+    try {
+      const full = await loadFullItinerary(entry)
+      sessionStorage.setItem('itinerary', JSON.stringify(full.itinerary))
+      sessionStorage.setItem('tripForm', JSON.stringify(full.tripForm))
+      navigate('/itinerary')
+    } catch {
+      toast.error('Failed to load trip — please try again')
+    }
+  }
+
+  const handleLoadMore = async () => {
+    try {
+      await loadMoreItineraries()
+    } catch {
+      toast.error('Failed to load more trips')
+    }
   }
 
   const handleDelete = async (id, title) => {
@@ -119,11 +135,11 @@ export default function SavedPage() {
               </div>
 
               {/* Highlights preview */}
-              {entry.itinerary?.trip_summary?.highlights && (
+              {(entry.highlights || entry.itinerary?.trip_summary?.highlights)?.length > 0 && (
                 <div style={{ marginBottom:'1rem' }}>
                   <p style={{ fontSize:'0.72rem', color:'var(--text3)', textTransform:'uppercase', letterSpacing:'0.06em', marginBottom:'0.4rem' }}>Highlights</p>
                   <div style={{ display:'flex', flexWrap:'wrap', gap:'0.35rem' }}>
-                    {entry.itinerary.trip_summary.highlights.slice(0, 3).map((h, i) => (
+                    {(entry.highlights || entry.itinerary.trip_summary.highlights).slice(0, 3).map((h, i) => (
                       <span key={i} style={{ fontSize:'0.78rem', color:'var(--text2)', background:'var(--bg2)', padding:'0.2rem 0.6rem', borderRadius:'50px', border:'1px solid var(--border)' }}>
                         ✦ {h}
                       </span>
@@ -145,6 +161,12 @@ export default function SavedPage() {
           ))}
         </div>
       )}
+
+      {hasMoreItineraries && (
+        <div style={{ textAlign:'center', marginTop:'2rem' }}>
+          <button className="btn btn-ghost" onClick={handleLoadMore}>Load more</button>
+        </div>
+      )}
     </div>
   )
 }
@@ -9,14 +9,19 @@ const api = axios.create({
 })
 
 // ── Inject Cognito JWT on every request ──────────────────────────────────────
-api.interceptors.request.use(async (config) => {
+async function authHeaders() {
   if (COGNITO_ENABLED) {
     try {
       const session = await fetchAuthSession()
       const token = session.tokens?.idToken?.toString()
-      if (token) config.headers.Authorization = `Bearer ${token}`
+      if (token) return { Authorization: `Bearer ${token}` }
     } catch { /* not signed in — continue without token */ }
   }
+  return {}
+}
+
+api.interceptors.request.use(async (config) => {
+  Object.assign(config.headers, await authHeaders())
   return config
 })
 
@@ -28,9 +33,60 @@ api.interceptors.response.use(
   }
 )
 
+// ── Server-Sent Events over POST (EventSource only supports GET) ─────────────
+// Aborting `signal` closes the connection, which stops generation server-side.
+async function streamSSE(path, body, onEvent, signal) {
+  const res = await fetch(`/api${path}`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json', ...(await authHeaders()) },
+    body: JSON.stringify(body),
+    signal,
+  })
+  if (!res.ok) {
+    let detail
+    try { detail = (await res.json()).detail } catch { /* non-JSON error body */ }
+    throw new Error(detail || `Request failed (${res.status})`)
+  }
+  const reader = res.body.getReader()
+  const decoder = new TextDecoder()
+  let buf = ''
+  while (true) {
+    const { value, done } = await reader.read()
+    if (done) break
+    buf += decoder.decode(value, { stream: true })
+    let sep
+    while ((sep = buf.indexOf('\n\n')) >= 0) {
+      const frame = buf.slice(0, sep)
+      buf = buf.slice(sep + 2)
+      const event = frame.match(/^event: (.*)$/m)?.[1]
+      const data = frame.match(/^data: (.*)$/m)?.[1]
+      if (!event || data === undefined) continue
+      const payload = JSON.parse(data)
+      if (event === 'error') throw new Error(payload.detail)
+      if (event === 'done') return payload
+      onEvent(event, payload)
+    }
+  }
+  throw new Error('Stream ended unexpectedly')
+}
+
+// ── Background jobs: submit, then long-poll (each poll well inside the timeout) ──
+async function runItineraryJob(tripData) {
+  const job = await api.post('/plan/jobs', tripData)
+  while (true) {
+    const status = await api.get(`/plan/jobs/${job.job_id}`, { params: { wait: 25 } })
+    if (status.status === 'done') return status.result
+    if (status.status === 'failed') throw new Error(status.error?.detail || 'Itinerary generation failed')
+  }
+}
+
 export const travelAPI = {
-  /** Generate full multi-day itinerary */
-  generateItinerary: (tripData) => api.post('/plan/full', tripData),
+  /** Generate full multi-day itinerary (as a background job — no request timeout) */
+  generateItinerary: (tripData) => runItineraryJob(tripData),
+
+  /** Stream itinerary — onEvent('trip_summary' | 'day' | 'section', data) fires as parts arrive */
+  streamItinerary: (tripData, onEvent = () => {}) =>
+    streamSSE('/plan/full/stream', tripData, onEvent),
 
   /** Generate packing list */
   getPackingList: (data) => api.post('/plan/packing-list', data),
@@ -42,6 +98,10 @@ export const travelAPI = {
   chat: (messages, tripContext = null) =>
     api.post('/chat', { messages, trip_context: tripContext }),
 
+  /** Stream a chat reply — onToken(text) fires per delta; abort `signal` to stop generating */
+  streamChat: (messages, tripContext = null, onToken = () => {}, signal) =>
+    streamSSE('/chat/stream', { messages, trip_context: tripContext }, (_, data) => onToken(data.text), signal),
+
   /** Get quick tips */
   getQuickTips: (destination, category = 'general') =>
     api.post(`/plan/quick-tips?destination=${encodeURIComponent(destination)}&category=${category}`),
@@ -54,9 +114,14 @@ export const travelAPI = {
   health: () => api.get('/health'),
 
   // ── Saved Itineraries (DynamoDB-backed, auth-required) ───────────────────
-  listItineraries:  ()     => api.get('/itineraries'),
+  listItineraries:  (cursor = null) =>
+    api.get('/itineraries', { params: cursor ? { cursor } : {} }),
+  getItinerary:     (id)   => api.get(`/itineraries/${id}`),
   saveItinerary:    (data) => api.post('/itineraries', data),
   deleteItinerary:  (id)   => api.delete(`/itineraries/${id}`),
+  saveItineraries:  (trips) => api.post('/itineraries/batch', { trips }),
+  deleteItineraries: (ids)  => api.post('/itineraries/batch-delete', ids ? { ids } : { all: true }),
+  exportItineraries: (ids)  => api.post('/itineraries/export', ids ? { ids } : { all: true }),
 }
 
 export default api